@@ -0,0 +1,191 @@
+"""
+load_test.py
+
+Exam-day load test for the FastAPI app.
+
+Virtual users loop over a weighted mix of routes (run-code, run-tests,
+submit, chatbot, evaluate, task listing) with optional think time. By
+default main.app is driven in-process through httpx.ASGITransport with the
+local in-memory store standing in for Firestore, so no network or
+credentials are needed; --url points the same load at a running server
+(e.g. uvicorn with several workers) instead. Each virtual user sends its
+own X-User-Id; admission control only honors it from a trusted proxy, so
+start that server with TRUSTED_PROXIES set to the load generator's address
+or every user shares one rate-limit bucket.
+
+Usage (from backend_final/):
+    python -m benchmarks.load_test --users 200 --duration 30
+    python -m benchmarks.load_test --mix run-code=50,submit=10 --think-ms 500
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --users 500
+
+Reports throughput and p50/p95/p99 latency per route, plus status code
+counts (429/503 come from admission control), and optionally writes JSON.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+from benchmarks.synthetic import AI_RESPONSES, session_attempt
+
+DEFAULT_MIX = "run-code=40,run-tests=20,chatbot=10,tasks=15,evaluate=5,submit=10"
+QUESTIONS = [f"Q{100 + i}" for i in range(20)]
+
+CODE = "def two_sum(nums, target):\n    seen = {}\n    for i, n in enumerate(nums):\n        if target - n in seen:\n            return [seen[target - n], i]\n        seen[n] = i\n"
+
+
+def _request(route: str, user: str, rng: random.Random, attempt: Dict[str, Any]) -> Tuple[str, str, Optional[Dict[str, Any]]]:
+    """(method, path, json body) for one request of `route`."""
+    question = rng.choice(QUESTIONS)
+    code = CODE + f"# {rng.randint(0, 10_000)}\n"
+    if route == "run-code":
+        return "POST", "/api/run-code", {"code": code, "language": "python", "input": "2 7 11 15\n9"}
+    if route == "run-tests":
+        return "POST", "/api/run-tests", {"code": code, "language": "python", "questionId": question, "userId": user}
+    if route == "submit":
+        return "POST", "/api/submit", {"code": code, "language": "python", "questionId": question, "userId": user}
+    if route == "chatbot":
+        return "POST", "/api/chatbot", {"prompt": f"Why does my loop fail? {rng.choice(AI_RESPONSES)[:40]}"}
+    if route == "evaluate":
+        return "POST", "/candidate/evaluate", dict(attempt, candidate_id=user)
+    if route == "tasks":
+        return "GET", "/tasks/", None
+    raise ValueError(f"unknown route {route!r}")
+
+
+def seed_local_store() -> None:
+    """Questions and test cases for the in-memory store, so run-tests does real lookups."""
+    from config import firebase_config
+    db = firebase_config.get_db()
+    if db is None or not hasattr(db, "seed"):
+        return
+    db.seed("questions", {q: {"title": f"Question {q}", "difficulty": "Easy", "tags": ["array"]} for q in QUESTIONS})
+    db.seed("test_cases", {
+        f"{q}-t{i}": {"questionId": q, "input": "2 7 11 15\n9", "expectedOutput": "0 1", "visible": i < 2}
+        for q in QUESTIONS for i in range(5)
+    })
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))]
+
+
+async def _virtual_user(client, uid: int, mix: List[Tuple[str, float]], deadline: float, think_s: float,
+                        seed: int, samples: Dict[str, List[float]], statuses: Dict[str, Dict[int, int]]) -> None:
+    rng = random.Random(seed * 100_003 + uid)
+    user = f"vu{uid}"
+    attempt = session_attempt(rng.randint(10, 60), seed=uid)
+    routes, weights = zip(*mix)
+    headers = {"X-User-Id": user}
+    # stagger the start so users do not all fire in the first millisecond
+    await asyncio.sleep(rng.random() * min(1.0, think_s or 0.1))
+    while time.perf_counter() < deadline:
+        route = rng.choices(routes, weights)[0]
+        method, path, body = _request(route, user, rng, attempt)
+        start = time.perf_counter()
+        try:
+            resp = await client.request(method, path, json=body, headers=headers)
+            status = resp.status_code
+        except Exception:
+            status = 0  # transport error
+        elapsed = time.perf_counter() - start
+        samples[route].append(elapsed)
+        statuses[route][status] = statuses[route].get(status, 0) + 1
+        if think_s:
+            await asyncio.sleep(rng.expovariate(1.0 / think_s))
+
+
+async def run_load(users: int, duration: float, mix: List[Tuple[str, float]], think_s: float = 0.0,
+                   url: Optional[str] = None, seed: int = 0) -> Dict[str, Any]:
+    import httpx
+
+    if url:
+        client = httpx.AsyncClient(base_url=url, timeout=60.0,
+                                   limits=httpx.Limits(max_connections=users, max_keepalive_connections=users))
+    else:
+        os.environ.setdefault("FIREBASE_BACKEND", "local")
+        # the transport stands in for an authenticating proxy at 127.0.0.1, so X-User-Id is honored
+        os.environ.setdefault("TRUSTED_PROXIES", "127.0.0.1")
+        import main
+        seed_local_store()
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://loadtest", timeout=60.0)
+
+    samples: Dict[str, List[float]] = {route: [] for route, _ in mix}
+    statuses: Dict[str, Dict[int, int]] = {route: {} for route, _ in mix}
+    started = time.perf_counter()
+    deadline = started + duration
+    async with client:
+        await asyncio.gather(*(
+            _virtual_user(client, uid, mix, deadline, think_s, seed, samples, statuses) for uid in range(users)
+        ))
+    elapsed = time.perf_counter() - started
+
+    routes = {}
+    for route, values in samples.items():
+        values.sort()
+        ok = sum(n for status, n in statuses[route].items() if 200 <= status < 300)
+        routes[route] = {
+            "requests": len(values),
+            "ok": ok,
+            "rps": round(len(values) / elapsed, 2),
+            "p50_ms": round(_percentile(values, 0.50) * 1e3, 2),
+            "p95_ms": round(_percentile(values, 0.95) * 1e3, 2),
+            "p99_ms": round(_percentile(values, 0.99) * 1e3, 2),
+            "max_ms": round(values[-1] * 1e3, 2) if values else 0.0,
+            "statuses": {str(k): v for k, v in sorted(statuses[route].items())},
+        }
+    total = sum(r["requests"] for r in routes.values())
+    return {
+        "target": url or "in-process",
+        "users": users,
+        "duration_s": round(elapsed, 2),
+        "think_ms": think_s * 1e3,
+        "requests": total,
+        "rps": round(total / elapsed, 2),
+        "routes": routes,
+    }
+
+
+def parse_mix(spec: str) -> List[Tuple[str, float]]:
+    mix = []
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        mix.append((name.strip(), float(weight or 1)))
+    return mix
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1], formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="route=weight pairs")
+    parser.add_argument("--think-ms", type=float, default=200.0, help="mean think time between a user's requests")
+    parser.add_argument("--url", help="base URL of a running server (default: drive main.app in-process)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the report as JSON")
+    args = parser.parse_args(argv)
+
+    mix = parse_mix(args.mix)
+    report = asyncio.run(run_load(args.users, args.duration, mix, args.think_ms / 1000.0, args.url, args.seed))
+
+    print(f"{report['target']}: {report['users']} users, {report['duration_s']}s, "
+          f"{report['requests']} requests, {report['rps']} req/s")
+    print(f"{'route':12s} {'reqs':>7s} {'ok':>7s} {'rps':>8s} {'p50':>9s} {'p95':>9s} {'p99':>9s}  statuses")
+    for route, r in report["routes"].items():
+        print(f"{route:12s} {r['requests']:>7d} {r['ok']:>7d} {r['rps']:>8.1f} {r['p50_ms']:>7.1f}ms "
+              f"{r['p95_ms']:>7.1f}ms {r['p99_ms']:>7.1f}ms  {r['statuses']}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,335 @@
+"""
+run.py
+
+Benchmark suite for the evaluation pipeline.
+
+Each benchmark runs at several session sizes on data from
+benchmarks.synthetic. For every (benchmark, size) the suite records latency
+percentiles over the repeats, throughput (items per second at the median:
+events, snapshots, metric sets or evaluations) and peak traced memory of
+one extra run, writes them to JSON and compares them with a stored baseline.
+
+Timings depend on the machine, so the baseline does not store them. Before
+each (benchmark, size) the suite times a fixed pure-Python calibration
+loop, and the baseline keeps every benchmark's best-of-repeats latency as a
+multiple of it ("rel") plus its peak memory. The gate compares those ratios, so a baseline recorded on
+one machine holds on a faster or slower one.
+
+Usage (from backend_final/):
+    python -m benchmarks.run                          # default sizes, compare to baseline
+    python -m benchmarks.run --sizes 100,1000000 --only evaluate_event_stream
+    python -m benchmarks.run --update-baseline        # record a new baseline
+
+Exit status is 1 when the relative best-of-repeats latency or the peak
+memory regresses past the baseline by more than --tolerance / --mem-tolerance.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+from benchmarks.synthetic import iter_session_events, session_attempt, session_events
+from models.candidate_model import CandidateAttempt
+from services import ai_usage_analyzer, data_processing, evaluation_engine, fuzzy_logic_engine, summary_generator
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(HERE, "baseline.json")
+DEFAULT_SIZES = (100, 1_000, 10_000, 100_000)
+LIST_LIMIT = 200_000  # list-based stages are skipped above this size (streaming ones are not)
+
+# name -> (setup(size) -> (arg, items), run(arg) -> None, streaming); items is what throughput counts
+BENCHMARKS: Dict[str, Tuple[Callable[[int], Any], Callable[[Any], Any], bool]] = {}
+
+
+def benchmark(name: str, streaming: bool = False):
+    def register(setup):
+        def decorate(run):
+            BENCHMARKS[name] = (setup, run, streaming)
+            return run
+        return decorate
+    return register
+
+
+def _events(n):
+    return session_events(n, seed=n), n
+
+
+def _stream(n):
+    return n, n  # the generator is created inside the timed call, so nothing is materialized
+
+
+def _stored_events(n):
+    # shape the event store returns: payload as a JSON string
+    return [dict(ev, payload=json.dumps(ev["payload"])) for ev in session_events(n, seed=n)], n
+
+
+def _attempt(n):
+    # one snapshot per ~10 events, which is what the frontend records
+    attempt = CandidateAttempt(**session_attempt(max(1, n // 10), seed=n))
+    return attempt, len(attempt.code_snapshots)
+
+
+@benchmark("data_processing.normalize_event_types")(_stored_events)
+def _(events):
+    data_processing.normalize_event_types(events)
+
+
+@benchmark("data_processing.clean_and_normalize_events")(_events)
+def _(events):
+    data_processing.clean_and_normalize_events(events)
+
+
+@benchmark("data_processing.merge_event_streams", streaming=True)(_stream)
+def _(n):
+    half = n // 2
+    for _ev in data_processing.merge_event_streams(iter_session_events(half, seed=1), iter_session_events(n - half, seed=2)):
+        pass
+
+
+@benchmark("data_processing.clean_candidate_attempt")(_attempt)
+def _(attempt):
+    data_processing.clean_candidate_attempt(attempt)
+
+
+@benchmark("evaluation_engine.extract_core_features", streaming=True)(_stream)
+def _(n):
+    evaluation_engine.extract_core_features(iter_session_events(n, seed=n))
+
+
+@benchmark("evaluation_engine.evaluate_event_stream", streaming=True)(_stream)
+def _(n):
+    evaluation_engine.evaluate_event_stream(iter_session_events(n, seed=n), timing=True)
+
+
+@benchmark("evaluation_engine.evaluate_attempt")(_attempt)
+def _(attempt):
+    evaluation_engine.evaluate_attempt(attempt)
+
+
+@benchmark("ai_usage_analyzer.analyze_ai_usage")(_events)
+def _(events):
+    ai_usage_analyzer.analyze_ai_usage(events)
+
+
+@benchmark("ai_usage_analyzer.analyze_ai_usage_windows")(_events)
+def _(events):
+    ai_usage_analyzer.analyze_ai_usage(events, paste_windows=(10, 20, 30, 60), edit_windows=(15, 30, 60, 120))
+
+
+def _metric_dicts(n):
+    rng = random.Random(n)
+    keys = ("reasoning_score", "debugging_efficiency", "adaptability", "ethical_ai_usage")
+    metrics = [{k: rng.random() for k in keys} for _ in range(min(n, LIST_LIMIT))]
+    return metrics, len(metrics)
+
+
+@benchmark("fuzzy_logic_engine.fuzzy_rules")(_metric_dicts)
+def _(metrics):
+    for m in metrics:
+        fuzzy_logic_engine.fuzzy_rules(m)
+
+
+def _evaluations(n):
+    results = [evaluation_engine.score_features(evaluation_engine.extract_core_features(session_events(200, seed=i)), None)
+               for i in range(max(1, min(n, LIST_LIMIT) // 100))]
+    return results, len(results)
+
+
+@benchmark("summary_generator.generate_summary")(_evaluations)
+def _(results):
+    for r in results:
+        summary_generator.generate_summary(r)
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    pos = (len(sorted_values) - 1) * q
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+def _calibration_work() -> None:
+    # dict/list/str/float work of the same kind as the pipeline stages, no I/O and no C extensions
+    rng = random.Random(0)
+    rows = [{"t": rng.random(), "k": str(i % 17)} for i in range(20_000)]
+    rows.sort(key=lambda r: r["t"])
+    totals: Dict[str, float] = {}
+    for r in rows:
+        totals[r["k"]] = totals.get(r["k"], 0.0) + r["t"]
+
+
+def calibrate(repeat: int = 15) -> float:
+    """Best-of-repeats time of the calibration loop in ms: this machine's unit for "rel"."""
+    _calibration_work()
+    timings = []
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            _calibration_work()
+            timings.append(time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return min(timings) * 1e3
+
+
+def run_one(name: str, size: int, repeat: int, calibration_ms: float) -> Optional[Dict[str, Any]]:
+    setup, run, streaming = BENCHMARKS[name]
+    if not streaming and size > LIST_LIMIT:
+        return None
+    arg, items = setup(size)
+    run(arg)  # warm-up (imports, memo caches, lazy pools)
+
+    timings = []
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run(arg)
+            timings.append(time.perf_counter() - start)
+    finally:
+        gc.enable()
+
+    tracemalloc.start()
+    try:
+        run(arg)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    timings.sort()
+    p50 = _percentile(timings, 0.50)
+    return {
+        "benchmark": name,
+        "size": size,
+        "items": items,
+        "repeat": repeat,
+        "min_ms": round(timings[0] * 1e3, 4),
+        "calibration_ms": round(calibration_ms, 4),
+        "rel": round(timings[0] * 1e3 / calibration_ms, 5),
+        "p50_ms": round(p50 * 1e3, 4),
+        "p95_ms": round(_percentile(timings, 0.95) * 1e3, 4),
+        "p99_ms": round(_percentile(timings, 0.99) * 1e3, 4),
+        "mean_ms": round(statistics.fmean(timings) * 1e3, 4),
+        "throughput_per_s": round(items / p50, 1) if p50 > 0 else None,
+        "peak_mem_kb": round(peak / 1024, 1),
+    }
+
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any], tolerance: float,
+            mem_tolerance: float, min_ms: float) -> List[Tuple[Tuple[str, int], str]]:
+    """Regressions of `results` against `baseline` as ((benchmark, size), message) pairs."""
+    base = {(r["benchmark"], r["size"]): r for r in baseline.get("results", [])}
+    failures = []
+    for r in results:
+        b = base.get((r["benchmark"], r["size"]))
+        if not b:
+            continue
+        # the fastest repeat is the least disturbed by other load on the machine, so it is
+        # what the gate compares; sub-millisecond timings also get an absolute floor
+        limit = max(b["rel"] * (1 + tolerance), b["rel"] + min_ms / r["calibration_ms"])
+        if r["rel"] > limit:
+            failures.append(((r["benchmark"], r["size"]), f"{r['benchmark']}[{r['size']}]: best {r['min_ms']}ms = "
+                             f"{r['rel']} calibration units > {limit:.4f} (baseline {b['rel']}, "
+                             f"{b['rel'] * r['calibration_ms']:.3f}ms on this machine)"))
+        mem_limit = b["peak_mem_kb"] * (1 + mem_tolerance) + 64
+        if r["peak_mem_kb"] > mem_limit:
+            failures.append(((r["benchmark"], r["size"]), f"{r['benchmark']}[{r['size']}]: peak memory "
+                             f"{r['peak_mem_kb']}KiB > {mem_limit:.0f}KiB (baseline {b['peak_mem_kb']}KiB)"))
+    return failures
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1], formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="comma-separated session sizes in events (100 .. 1000000)")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--only", action="append", help="run benchmarks whose name contains this (repeatable)")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.30, help="allowed best-of-repeats latency increase (fraction)")
+    parser.add_argument("--mem-tolerance", type=float, default=0.20, help="allowed peak memory increase (fraction)")
+    parser.add_argument("--min-ms", type=float, default=0.5, help="absolute latency slack for tiny benchmarks")
+    parser.add_argument("--retries", type=int, default=2, help="re-measure regressed entries before failing")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    names = [n for n in BENCHMARKS if not args.only or any(o in n for o in args.only)]
+
+    results = []
+    for name in names:
+        for size in sizes:
+            # calibrated next to each entry: on a shared machine the speed drifts during the suite
+            r = run_one(name, size, args.repeat, calibrate())
+            if r is None:
+                continue
+            results.append(r)
+            _print(r)
+
+    baseline = None
+    if not args.update_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    failures = []
+    if baseline:
+        failures = compare(results, baseline, args.tolerance, args.mem_tolerance, args.min_ms)
+        # a noisy neighbour can slow a single entry down; only a repeatable regression fails the gate
+        for _ in range(args.retries):
+            if not failures:
+                break
+            retry = {key for key, _ in failures}
+            for i, r in enumerate(results):
+                if (r["benchmark"], r["size"]) in retry:
+                    again = run_one(r["benchmark"], r["size"], args.repeat, calibrate())
+                    if again["rel"] < r["rel"]:
+                        results[i] = again
+            failures = compare(results, baseline, args.tolerance, args.mem_tolerance, args.min_ms)
+
+    report = {
+        "created_at": time.time(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        # only the machine-independent fields: latency relative to the calibration loop, and memory
+        portable = {
+            "python": report["python"],
+            "results": [{k: r[k] for k in ("benchmark", "size", "items", "rel", "peak_mem_kb")} for r in results],
+        }
+        with open(args.baseline, "w") as f:
+            json.dump(portable, f, indent=2)
+        print(f"baseline written to {args.baseline}")
+        return 0
+
+    if baseline is None:
+        print("no baseline to compare against (run with --update-baseline)")
+        return 0
+    for _, line in failures:
+        print("REGRESSION " + line)
+    return 1 if failures else 0
+
+
+def _print(r: Dict[str, Any]) -> None:
+    print(f"{r['benchmark']:48s} {r['size']:>8d}  p50 {r['p50_ms']:>10.3f}ms  p99 {r['p99_ms']:>10.3f}ms  "
+          f"{r['throughput_per_s'] or 0:>12.0f}/s  peak {r['peak_mem_kb']:>10.1f}KiB")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""
+startup.py
+
+Import-time profile and startup budget check for the app.
+
+Imports `main` in fresh interpreters, reports the median wall time and the
+modules that dominate it (from `python -X importtime`), and fails when the
+median exceeds the budget or when a module that is supposed to load lazily
+(NumPy, firebase_admin, LangChain) is imported at startup.
+
+Usage (from backend_final/):
+    python -m benchmarks.startup                    # report + enforce defaults
+    python -m benchmarks.startup --budget-ms 600 --runs 7 --top 30
+"""
+
+from typing import Dict, List, Optional, Tuple
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BUDGET_MS = float(os.environ.get("STARTUP_BUDGET_MS", "800"))
+LAZY_MODULES = ("numpy", "firebase_admin", "langchain")
+
+_PROBE = (
+    "import sys, time, json\n"
+    "t = time.perf_counter()\n"
+    "import main\n"
+    "elapsed = time.perf_counter() - t\n"
+    "print(json.dumps({'elapsed': elapsed, 'modules': sorted(sys.modules)}))\n"
+)
+
+
+def _run(importtime: bool = False) -> Tuple[Dict, str]:
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", _PROBE]
+    proc = subprocess.run(cmd, cwd=APP_DIR, capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1]), proc.stderr
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """(module, self_us, cumulative_us) for every line of -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def top_level_costs(rows: List[Tuple[str, int, int]]) -> Dict[str, int]:
+    """Self time summed per top-level package, in microseconds."""
+    totals: Dict[str, int] = {}
+    for name, self_us, _ in rows:
+        root = name.split(".")[0]
+        totals[root] = totals.get(root, 0) + self_us
+    return totals
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--allow", action="append", default=[], help="lazy module allowed at startup (repeatable)")
+    args = parser.parse_args(argv)
+
+    _run()  # populate bytecode caches so the first sample is not an outlier
+    samples = []
+    modules: List[str] = []
+    for _ in range(args.runs):
+        result, _ = _run()
+        samples.append(result["elapsed"] * 1e3)
+        modules = result["modules"]
+    _, stderr = _run(importtime=True)
+    rows = parse_importtime(stderr)
+
+    median = statistics.median(samples)
+    print(f"import main: median {median:.1f}ms over {args.runs} runs (min {min(samples):.1f}ms, max {max(samples):.1f}ms)")
+    print("\nslowest packages (self time, summed):")
+    for root, us in sorted(top_level_costs(rows).items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f"  {us / 1e3:8.1f}ms  {root}")
+    print("\nslowest app modules (cumulative):")
+    own = ("main", "routes", "services", "models", "utils", "config")
+    for name, _, cumulative in sorted((r for r in rows if r[0].split(".")[0] in own), key=lambda r: -r[2])[:args.top]:
+        print(f"  {cumulative / 1e3:8.1f}ms  {name}")
+
+    failures = []
+    if median > args.budget_ms:
+        failures.append(f"startup {median:.1f}ms exceeds budget {args.budget_ms:.0f}ms")
+    loaded = sorted(m for m in LAZY_MODULES if m in modules and m not in args.allow)
+    if loaded:
+        failures.append(f"imported at startup but should load lazily: {', '.join(loaded)}")
+    for line in failures:
+        print("FAIL " + line)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""
+synthetic.py
+
+Seeded generator of realistic candidate sessions for benchmarks and load tests.
+
+A session alternates typing bursts (edit events with keystroke counts and
+evolving code versions) with runs that fail early and pass more often as
+the session goes on, AI queries (some followed by a paste of the
+response), idle gaps, and a self-explanation at the end. The same seed
+always yields the same session, so benchmark runs are comparable.
+
+Functions:
+- iter_session_events(n, seed=0) -> iterator of event dicts (constant memory)
+- session_events(n, seed=0) -> list of event dicts
+- session_attempt(n_snapshots, seed=0) -> dict accepted by CandidateAttempt
+"""
+
+from typing import Any, Dict, Iterator, List
+import hashlib
+import random
+
+AI_RESPONSES = (
+    "def two_sum(nums, target):\n    seen = {}\n    for i, n in enumerate(nums):\n        if target - n in seen:\n            return [seen[target - n], i]\n        seen[n] = i",
+    "Use a dictionary to map each value to its index, then check the complement in one pass.",
+    "def is_valid(s):\n    stack = []\n    pairs = {')': '(', ']': '[', '}': '{'}\n    for c in s:\n        if c in pairs:\n            if not stack or stack.pop() != pairs[c]:\n                return False\n        else:\n            stack.append(c)\n    return not stack",
+    "The error means the list index is out of range; check the loop bound.",
+    "for i in range(len(nums) - 1):\n    if nums[i] > nums[i + 1]:\n        nums[i], nums[i + 1] = nums[i + 1], nums[i]",
+)
+
+# relative weight of each activity when the candidate is not in a typing burst
+_ACTIVITY = (("edit_burst", 0.62), ("run", 0.18), ("ai_query", 0.10), ("paste", 0.04), ("idle", 0.06))
+
+
+def _choose(rng: random.Random, table) -> str:
+    x = rng.random()
+    for name, weight in table:
+        x -= weight
+        if x < 0:
+            return name
+    return table[-1][0]
+
+
+def _code(version: int) -> str:
+    lines = [f"def solve(data):", f"    total = {version % 17}"]
+    lines += [f"    if data[{i}] > {version % (i + 3)}:\n        total += data[{i}]" for i in range(version % 6)]
+    lines.append("    return total")
+    return "\n".join(lines)
+
+
+def iter_session_events(n: int, seed: int = 0, start: float = 1_700_000_000.0) -> Iterator[Dict[str, Any]]:
+    """Yield exactly `n` events in timestamp order."""
+    rng = random.Random(seed)
+    t = start
+    version = 0
+    produced = 0
+    pass_p = 0.15
+    last_ai = None
+    while produced < n - 1:
+        activity = _choose(rng, _ACTIVITY)
+        if activity == "edit_burst":
+            for _ in range(min(rng.randint(3, 25), n - 1 - produced)):
+                t += rng.expovariate(1.2)
+                version += 1
+                code_hash = hashlib.sha1(str(version // 3).encode()).hexdigest()
+                yield {"event_type": "edit", "timestamp": round(t, 3),
+                       "payload": {"keystrokes": rng.randint(1, 12), "code_hash": code_hash}}
+                produced += 1
+            continue
+        if activity == "idle":
+            t += rng.uniform(30, 400)
+            continue
+        t += rng.expovariate(0.3)
+        if activity == "run":
+            ok = rng.random() < pass_p
+            pass_p = min(0.85, pass_p + 0.01)
+            payload = {"result": "pass" if ok else "fail"}
+            if not ok:
+                payload["error"] = rng.choice(("IndexError", "TypeError", "AssertionError", "SyntaxError"))
+        elif activity == "ai_query":
+            last_ai = rng.choice(AI_RESPONSES)
+            payload = {"prompt": "how do I fix this?", "response": last_ai, "relevant": rng.random() < 0.6}
+        else:  # paste, usually of the last AI answer
+            text = last_ai if last_ai and rng.random() < 0.7 else _code(version)
+            payload = {"text": text}
+        yield {"event_type": activity, "timestamp": round(t, 3), "payload": payload}
+        produced += 1
+    if n > 0:
+        t += rng.uniform(5, 60)
+        yield {"event_type": "self_explanation", "timestamp": round(t, 3),
+               "payload": {"text": "I used a hash map to get linear time and tested edge cases."}}
+
+
+def session_events(n: int, seed: int = 0) -> List[Dict[str, Any]]:
+    return list(iter_session_events(n, seed))
+
+
+def session_attempt(n_snapshots: int, seed: int = 0, candidate_id: str = "bench", task_id: str = "Q101") -> Dict[str, Any]:
+    """A CandidateAttempt payload with `n_snapshots` code snapshots and matching AI interactions."""
+    rng = random.Random(seed)
+    t = 0
+    snapshots = []
+    ai = []
+    for i in range(n_snapshots):
+        t += rng.randint(2, 40)
+        status = "pass" if rng.random() < min(0.85, 0.1 + i / max(1, n_snapshots)) else "fail"
+        snapshots.append({"timestamp": t, "code": _code(i // 2), "run_status": status if i % 3 == 0 else None})
+        if rng.random() < 0.1:
+            ai.append({"timestamp": t, "query": "how do I fix this?", "response": rng.choice(AI_RESPONSES),
+                       "response_snippet_used": rng.random() < 0.5})
+    return {
+        "candidate_id": candidate_id,
+        "task_id": task_id,
+        "session_start": 0,
+        "session_end": t + 30,
+        "code_snapshots": snapshots,
+        "ai_interactions": ai,
+        "self_explanation": "I used a hash map to get linear time and tested edge cases.",
+    }
@@ -24,19 +24,83 @@
 #         firebase_initialized = False
 import os
 import logging
+import threading
 
 firebase_initialized = False
 db = None
 bucket = None
+async_db = None
+_init_attempted = False
+_async_attempted = False
+_init_lock = threading.Lock()
+
+
+def get_db():
+    """Firestore client (or None in mock mode), initializing on first use."""
+    if not _init_attempted:
+        init_app()
+    return db
+
+
+
+def get_async_db():
+    """
+    Async Firestore client for async routes, or None (mock mode, or a
+    firebase_admin without firestore_async; callers then fall back to the
+    sync client on a worker thread). One client per process: its gRPC
+    channel is pooled and reused by every request on the event loop.
+    """
+    global async_db, _async_attempted
+    if not _async_attempted:
+        sync_db = get_db()
+        with _init_lock:
+            if not _async_attempted:
+                async_db = _async_client(sync_db)
+                _async_attempted = True
+    return async_db
+
+
+def _async_client(sync_db):
+    if sync_db is None:
+        return None
+    if os.environ.get("FIREBASE_BACKEND") == "local":
+        from services.local_store import AsyncLocalFirestore
+        return AsyncLocalFirestore(sync_db)
+    try:
+        from firebase_admin import firestore_async
+        return firestore_async.client()
+    except (ImportError, AttributeError, ValueError) as e:
+        logging.warning("Async Firestore client unavailable; async routes use the sync client. Error: %s", e)
+        return None
+
 
 def init_app():
     """Initialize Firebase Admin SDK using env var FIREBASE_CRED_JSON.
     If the credentials file is not present the module falls back to mock mode
-    (db will be None)."""
+    (db will be None). FIREBASE_BACKEND=local uses services.local_store instead.
+    Runs once; later calls return immediately."""
+    global _init_attempted
+    with _init_lock:
+        if _init_attempted:
+            return
+        _init()
+        _init_attempted = True
+
+
+def _init():
     global firebase_initialized, db, bucket
     if firebase_initialized:
         return
 
+    if os.environ.get("FIREBASE_BACKEND") == "local":
+        # in-memory Firestore stand-in (load tests, offline development)
+        from services.local_store import LocalFirestore
+        db = LocalFirestore()
+        bucket = None
+        firebase_initialized = True
+        logging.info("Using local in-memory store instead of Firestore.")
+        return
+
     cred_path = os.environ.get("FIREBASE_CRED_JSON")
     storage_bucket = os.environ.get("FIREBASE_STORAGE_BUCKET")
 
@@ -77,4 +141,4 @@ def init_app():
         bucket = None
 
 
-__all__ = ["init_app", "db", "bucket", "firebase_initialized"]
\ No newline at end of file
+__all__ = ["init_app", "get_db", "get_async_db", "db", "async_db", "bucket", "firebase_initialized"]
\ No newline at end of file
@@ -1,17 +1,111 @@
 import os, logging
+import importlib.util
+import json
+import threading
+import time
 OPENAI_KEY = os.getenv("OPENAI_API_KEY")
 LLM_AVAILABLE = False
+# "local" forces the deterministic stand-in even when an OpenAI key is set
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "auto")
+LOCAL_LLM_LATENCY_S = float(os.getenv("LOCAL_LLM_LATENCY_MS", "0")) / 1000.0
+_llm = None
+_llm_lock = threading.Lock()
+_provider = None
 
 def init_app():
+    """Decide whether an LLM is usable. Only checks that LangChain is installed;
+    the (slow) import happens in get_llm() on first use."""
     global LLM_AVAILABLE
     if OPENAI_KEY:
-        try:
-            from langchain import OpenAI
-            LLM_AVAILABLE = True
+        LLM_AVAILABLE = importlib.util.find_spec("langchain") is not None
+        if LLM_AVAILABLE:
             logging.info("LLM configured (OpenAI key found).")
-        except Exception as e:
-            logging.warning("LangChain/OpenAI not fully available: %s", e)
-            LLM_AVAILABLE = False
+        else:
+            logging.warning("LangChain not installed - LLM in MOCK mode.")
     else:
         logging.info("No OPENAI_API_KEY found - LLM in MOCK mode.")
         LLM_AVAILABLE = False
+
+def get_llm():
+    """LangChain OpenAI client, created on first use; None in mock mode."""
+    global _llm, LLM_AVAILABLE
+    if not LLM_AVAILABLE or _llm is not None:
+        return _llm
+    with _llm_lock:
+        if _llm is None:
+            try:
+                from langchain import OpenAI
+                _llm = OpenAI(openai_api_key=OPENAI_KEY)
+            except Exception as e:
+                logging.warning("LangChain/OpenAI not fully available: %s", e)
+                LLM_AVAILABLE = False
+    return _llm
+
+
+class LocalNarrativeProvider:
+    """
+    Deterministic stand-in for the LLM: the same items always give the same
+    narratives, with no network. One narrate() call is one simulated
+    provider round trip (LOCAL_LLM_LATENCY_MS), however many items it carries.
+    """
+
+    name = "local"
+
+    def narrate(self, items):
+        if LOCAL_LLM_LATENCY_S:
+            time.sleep(LOCAL_LLM_LATENCY_S)
+        return [self._narrative(item) for item in items]
+
+    @staticmethod
+    def _narrative(item):
+        metrics = item.get("metrics") or {}
+        ranked = sorted(metrics.items(), key=lambda kv: (-kv[1], kv[0]))
+        parts = [f"Grade {item.get('grade', '?')} ({item.get('score', 0):.1f}/100)."]
+        if ranked:
+            best, worst = ranked[0], ranked[-1]
+            parts.append(f"Strongest signal: {best[0].replace('_', ' ')} ({best[1]:.2f}).")
+            if worst[0] != best[0]:
+                parts.append(f"Weakest signal: {worst[0].replace('_', ' ')} ({worst[1]:.2f}).")
+        recs = item.get("recommendations") or []
+        if recs:
+            parts.append("Suggested focus: " + "; ".join(r.rstrip(". ") for r in recs) + ".")
+        return " ".join(parts)
+
+
+class LangChainNarrativeProvider:
+    """Sends a whole batch of candidates in one prompt and expects a JSON object {id: narrative} back."""
+
+    name = "openai"
+
+    PROMPT = (
+        "You write concise hiring-report narratives for a technical assessment.\n"
+        "For each candidate below write 2-3 neutral, specific sentences based only on the given grade, "
+        "score (0-100), metrics (0-1) and recommendations.\n"
+        "Answer with a single JSON object mapping each candidate id to its narrative, and nothing else.\n\n"
+        "Candidates:\n{candidates}\n"
+    )
+
+    def __init__(self, llm):
+        self.llm = llm
+
+    def narrate(self, items):
+        batch = [dict(item, id=f"c{i}") for i, item in enumerate(items)]
+        prompt = self.PROMPT.format(candidates=json.dumps(batch, sort_keys=True))
+        text = self.llm.invoke(prompt) if hasattr(self.llm, "invoke") else self.llm(prompt)
+        text = getattr(text, "content", text)
+        start, end = text.find("{"), text.rfind("}")
+        try:
+            answers = json.loads(text[start:end + 1]) if start >= 0 else {}
+        except ValueError:
+            answers = {}
+        # None for anything the model left out; the caller keeps the template text for those
+        return [answers.get(item["id"]) if isinstance(answers.get(item["id"]), str) else None for item in batch]
+
+
+def get_narrative_provider():
+    """The LLM narrative provider: LangChain when configured, otherwise the local stand-in."""
+    global _provider
+    if _provider is None:
+        llm = get_llm() if LLM_PROVIDER != "local" else None
+        _provider = LangChainNarrativeProvider(llm) if llm is not None else LocalNarrativeProvider()
+    return _provider
@@ -1,10 +1,54 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from routes import candidate_routes, task_routes, recruiter_routes, api_routes
+from routes import candidate_routes, task_routes, recruiter_routes, api_routes, job_routes, metrics_routes
 from config import firebase_config, langchain_config
+from utils import admission, metrics
+from utils.logger import CorrelationIdMiddleware, setup_logging
+import logging
 import os
+import threading
 
-app = FastAPI(title="FutureHire Backend - Hackathon MVP")
+# Nothing slow runs at import: the Firebase client, the LLM and NumPy-backed
+# services initialize on first use. WARMUP=1 does that in a background thread
+# at startup, so the first requests don't pay for it and the server still
+# accepts connections immediately.
+WARMUP = os.environ.get("WARMUP", "0") == "1"
+
+# one background writer for every logger (LOG_LEVEL, LOG_FORMAT=json, LOG_DEBUG_SAMPLE)
+setup_logging()
+
+
+def warm_up():
+    from services import code_analysis, scoring_profiles, similarity_index, timing_analysis
+    firebase_config.get_async_db()  # also creates the sync client
+    langchain_config.get_llm()
+    timing_analysis.analyze_timing([0.0, 1.0, 2.0])  # loads NumPy
+    similarity_index.cohort_index()
+    code_analysis.analyze_code("pass")
+    scoring_profiles.score({}, {}, scoring_profiles.get_profile(None))
+    logging.info("warm-up complete")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    from services import code_analysis, job_queue
+    # created before any request thread needs them; workers come from a forkserver, never a fork of this process
+    code_analysis.start_pool()
+    job_queue.start_queue()
+    if WARMUP:
+        threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+    yield
+    job_queue.shutdown_queue()
+    code_analysis.shutdown_pool()
+
+
+app = FastAPI(title="FutureHire Backend - Hackathon MVP", lifespan=lifespan)
+
+# per-route concurrency limits, wait queues and per-user rate limits (added first so CORS wraps its 429/503s)
+admission_controller = admission.AdmissionController()
+if admission.ENABLED:
+    app.add_middleware(admission.AdmissionMiddleware, controller=admission_controller)
 
 # Allow frontend dev server (Vite default port 5173 or 8080 depending on setup)
 app.add_middleware(
@@ -13,10 +57,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-Id", "ETag", "X-Total-Count"],
 )
 
-# initialize config (mock-safe)
-firebase_config.init_app()
+# outermost, so every log line of a request (admission rejections included) carries its ID
+app.add_middleware(CorrelationIdMiddleware)
+
+# initialize config (mock-safe); the Firebase client itself is created on first use
 try:
     langchain_config.init_app()
 except Exception:
@@ -27,9 +74,32 @@ app.include_router(candidate_routes.router, prefix="/candidate", tags=["Candidat
 app.include_router(task_routes.router, prefix="/tasks", tags=["Tasks"])
 app.include_router(recruiter_routes.router, prefix="/recruiter", tags=["Recruiter"])
 app.include_router(api_routes.router, prefix="/api", tags=["API"])
+app.include_router(job_routes.router, prefix="/jobs", tags=["Jobs"])
+app.include_router(metrics_routes.router, tags=["Ops"])
 
 
 @app.get("/")
 def root():
     return {"message": "FutureHire backend running. Visit /docs for API."}
 
+
+@app.get("/admission", tags=["Ops"])
+def admission_stats():
+    """Queue depth, in-flight requests and rejection counts per route class."""
+    return admission_controller.stats()
+
+
+def _collect_admission():
+    stats = admission_controller.stats()
+    for route, s in stats.items():
+        yield "admission_in_flight", "gauge", {"route": route}, s["in_flight"]
+    for route, s in stats.items():
+        yield "admission_queue_depth", "gauge", {"route": route}, s["queue_depth"]
+    for route, s in stats.items():
+        yield "admission_admitted_total", "counter", {"route": route}, s["admitted"]
+    for route, s in stats.items():
+        for reason, n in s["rejected"].items():
+            yield "admission_rejected_total", "counter", {"route": route, "reason": reason}, n
+
+
+metrics.register_collector(_collect_admission)
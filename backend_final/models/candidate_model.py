@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field, ValidationError
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Type
+from models.code_history import CodeHistory
 
 class CodeSnapshot(BaseModel):
     timestamp: int
@@ -7,12 +8,15 @@ class CodeSnapshot(BaseModel):
     run_status: Optional[str] = None
     error_message: Optional[str] = None
     ai_prompt_used: Optional[str] = None
+    version: Optional[int] = None  # index into CandidateAttempt.code_history when code is not inline
+    code_hash: Optional[str] = None  # key into services.blob_store when code is stored by content hash
 
 class AIInteraction(BaseModel):
     timestamp: int
     query: str
     response_snippet_used: bool = False
     category: Optional[str] = None
+    response: Optional[str] = None
 
 class BehaviorMetrics(BaseModel):
     total_runs: int = 0
@@ -25,6 +29,73 @@ class BehaviorMetrics(BaseModel):
     tabs_switched: int = 0
     unique_code_versions: int = 0
 
+class LazyModelList(list):
+    """
+    List of raw dicts that are validated into `model` the first time each item
+    is read. Used for trusted attempts so huge snapshot / interaction lists are
+    not traversed unless something actually looks at them. Indexing, iteration
+    and pop() validate the items they return; anything that reads or compares
+    the list as a whole (copy, index, count, +, ==, ...) validates every item.
+    """
+
+    def __init__(self, model: Type[BaseModel], items: List[Any]):
+        super().__init__(items)
+        self._model = model
+
+    def _coerce(self, i: int):
+        item = list.__getitem__(self, i)
+        if isinstance(item, dict):
+            item = self._model.model_validate(item)
+            list.__setitem__(self, i, item)
+        return item
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._coerce(j) for j in range(*i.indices(len(self)))]
+        return self._coerce(i if i >= 0 else i + len(self))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._coerce(i)
+
+    def __reversed__(self):
+        for i in range(len(self) - 1, -1, -1):
+            yield self._coerce(i)
+
+    def pop(self, i: int = -1):
+        item = self._coerce(i if i >= 0 else i + len(self))
+        list.pop(self, i)
+        return item
+
+    def raw(self):
+        """Iterate items as stored (raw dicts or already-validated models), validating nothing."""
+        return list.__iter__(self)
+
+    @property
+    def pending(self) -> bool:
+        return any(isinstance(item, dict) for item in list.__iter__(self))
+
+    def validate_all(self) -> "LazyModelList":
+        for i in range(len(self)):
+            self._coerce(i)
+        return self
+
+
+def _validating(name: str):
+    method = getattr(list, name)
+
+    def wrapper(self, *args, **kwargs):
+        return method(self.validate_all(), *args, **kwargs)
+
+    wrapper.__name__ = name
+    return wrapper
+
+
+for _name in ("__contains__", "__eq__", "__ne__", "__lt__", "__le__", "__gt__", "__ge__",
+              "__add__", "__mul__", "__rmul__", "__repr__", "copy", "count", "index", "remove", "sort"):
+    setattr(LazyModelList, _name, _validating(_name))
+
+
 class CandidateAttempt(BaseModel):
     candidate_id: str
     task_id: str
@@ -35,7 +106,72 @@ class CandidateAttempt(BaseModel):
     behavior_metrics: BehaviorMetrics = BehaviorMetrics()
     self_explanation: Optional[str] = None
     system_metadata: Optional[Dict[str, Any]] = {}
-    
+    code_history: Optional[CodeHistory] = None
+
+    def snapshot_code(self, index: int) -> Optional[str]:
+        """Code of snapshot `index`, whether stored inline, in the delta history or in the blob store."""
+        snap = self.code_snapshots[index]
+        if snap.code is not None:
+            return snap.code
+        if snap.version is not None and self.code_history is not None:
+            return self.code_history.get(snap.version)
+        if snap.code_hash:
+            from services import blob_store
+            return blob_store.get(snap.code_hash)
+        return None
+
+    def compact_code_history(self, keyframe_interval: int = 20) -> "CandidateAttempt":
+        """
+        Move inline snapshot code into `code_history` (in place). Consecutive
+        identical versions share one history entry.
+        """
+        if self.code_history is None:
+            self.code_history = CodeHistory(keyframe_interval=keyframe_interval)
+        history = self.code_history
+        last = history.get(-1) if len(history) else None
+        for snap in self.code_snapshots:
+            if snap.code is None:
+                continue
+            if snap.code != last:
+                history.append(snap.code)
+                last = snap.code
+            snap.version = len(history) - 1
+            snap.code = None
+        return self
+
+    @classmethod
+    def from_trusted(cls, data: Dict[str, Any]) -> "CandidateAttempt":
+        """
+        Build an attempt from an internal, already-validated source (stored attempts,
+        batch re-scoring, replay) without running validation. Snapshot and interaction
+        lists are validated item by item only when read through the model; bulk readers
+        can walk the raw items with LazyModelList.raw().
+        """
+        data = dict(data)
+        data["code_snapshots"] = LazyModelList(CodeSnapshot, data.get("code_snapshots") or [])
+        data["ai_interactions"] = LazyModelList(AIInteraction, data.get("ai_interactions") or [])
+        bm = data.get("behavior_metrics")
+        if isinstance(bm, dict):
+            data["behavior_metrics"] = BehaviorMetrics.model_construct(**bm)
+        history = data.get("code_history")
+        if isinstance(history, dict):
+            data["code_history"] = CodeHistory.model_validate(history)
+        return cls.model_construct(**data)
+
+    def _validate_lazy(self) -> None:
+        # raw trusted dicts lack the defaulted keys; validate them so dumps match a validated attempt
+        for value in (self.code_snapshots, self.ai_interactions):
+            if isinstance(value, LazyModelList):
+                value.validate_all()
+
+    def model_dump(self, **kwargs):
+        self._validate_lazy()
+        return super().model_dump(**kwargs)
+
+    def model_dump_json(self, **kwargs):
+        self._validate_lazy()
+        return super().model_dump_json(**kwargs)
+
     @classmethod
     def safe_create(cls, data: Dict[str, Any]) -> Optional['CandidateAttempt']:
         try:
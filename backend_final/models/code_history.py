@@ -0,0 +1,110 @@
+from pydantic import BaseModel, PrivateAttr
+from typing import List, Optional, Union
+import difflib
+
+# A delta is a flat list of line operations applied to the previous version:
+#   n > 0     copy the next n lines
+#   n < 0     skip (delete) the next -n lines
+#   "text"    insert text (one or more lines, newlines included)
+DeltaOp = Union[int, str]
+
+
+def diff_lines(old: str, new: str) -> List[DeltaOp]:
+    """Line-level delta turning `old` into `new`."""
+    a = old.splitlines(keepends=True)
+    b = new.splitlines(keepends=True)
+    ops: List[DeltaOp] = []
+    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, a, b, autojunk=False).get_opcodes():
+        if tag == "equal":
+            ops.append(i2 - i1)
+            continue
+        if i2 > i1:
+            ops.append(i1 - i2)
+        if j2 > j1:
+            ops.append("".join(b[j1:j2]))
+    return ops
+
+
+def apply_delta(old: str, ops: List[DeltaOp]) -> str:
+    lines = old.splitlines(keepends=True)
+    out = []
+    pos = 0
+    for op in ops:
+        if isinstance(op, str):
+            out.append(op)
+        elif op > 0:
+            out.extend(lines[pos:pos + op])
+            pos += op
+        else:
+            pos -= op
+    return "".join(out)
+
+
+class CodeVersion(BaseModel):
+    key: Optional[str] = None            # full text (keyframe)
+    delta: Optional[List[DeltaOp]] = None  # ops against the previous version
+
+
+class CodeHistory(BaseModel):
+    """
+    Delta-encoded sequence of code versions: a full keyframe every
+    `keyframe_interval` versions and line deltas in between. Any version is
+    rebuilt from its nearest preceding keyframe.
+    """
+    keyframe_interval: int = 20
+    versions: List[CodeVersion] = []
+
+    _last_code: Optional[str] = PrivateAttr(default=None)
+    _cache_index: int = PrivateAttr(default=-1)
+    _cache_code: Optional[str] = PrivateAttr(default=None)
+
+    @classmethod
+    def from_codes(cls, codes: List[str], keyframe_interval: int = 20) -> "CodeHistory":
+        history = cls(keyframe_interval=keyframe_interval)
+        for code in codes:
+            history.append(code)
+        return history
+
+    def __len__(self) -> int:
+        return len(self.versions)
+
+    def append(self, code: str) -> int:
+        """Add a version and return its index."""
+        index = len(self.versions)
+        if index % max(1, self.keyframe_interval) == 0:
+            self.versions.append(CodeVersion(key=code))
+        else:
+            previous = self._last_code if self._last_code is not None else self.get(index - 1)
+            self.versions.append(CodeVersion(delta=diff_lines(previous, code)))
+        self._last_code = code
+        return index
+
+    def get(self, index: int) -> str:
+        if index < 0:
+            index += len(self.versions)
+        if not 0 <= index < len(self.versions):
+            raise IndexError(index)
+        if index == self._cache_index:
+            return self._cache_code
+
+        # replay forward from the cached version when it is on the way, else from the keyframe
+        start = index
+        while self.versions[start].key is None and start > 0:
+            start -= 1
+        if start < self._cache_index < index:
+            start, code = self._cache_index, self._cache_code
+        else:
+            code = self.versions[start].key or ""
+        for i in range(start + 1, index + 1):
+            v = self.versions[i]
+            code = v.key if v.key is not None else apply_delta(code, v.delta or [])
+
+        self._cache_index, self._cache_code = index, code
+        return code
+
+    def iter_codes(self):
+        """Yield every version in order, replaying deltas once."""
+        code = ""
+        for v in self.versions:
+            code = v.key if v.key is not None else apply_delta(code, v.delta or [])
+            yield code
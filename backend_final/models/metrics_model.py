@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Dict
 
 class MetricWeights(BaseModel):
@@ -11,3 +11,10 @@ class MetricWeights(BaseModel):
 
 # Default weights configuration
 DEFAULT_WEIGHTS = MetricWeights().dict()
+
+
+class ScoringProfile(BaseModel):
+    """Per-task scoring: MetricWeights blended with the fuzzy rule base score."""
+    name: str = "default"
+    weights: MetricWeights = MetricWeights()
+    fuzzy_blend: float = Field(0.5, ge=0.0, le=1.0)  # 1.0 = fuzzy rules only, 0.0 = weighted sum only
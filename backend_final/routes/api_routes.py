@@ -1,8 +1,10 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Response
 from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from starlette.concurrency import run_in_threadpool
+from typing import Optional, List, Dict, Any, Tuple
+import asyncio
 import time
-from services import firebase_service
+from services import firebase_service, blob_store, similarity_index, job_queue
 
 router = APIRouter()
 
@@ -39,17 +41,27 @@ def run_code(req: RunCodeRequest):
 
 
 @router.post("/run-tests")
-def run_tests(req: RunTestsRequest):
-    # fetch test cases from firestore (mock-safe)
-    inputs = firebase_service.list_test_cases_for_question(req.questionId)
+async def run_tests(req: RunTestsRequest):
+    # test cases (mock-safe) and the code blob are independent, so fetch and store concurrently
+    inputs, code_hash = await asyncio.gather(
+        firebase_service.list_test_cases_for_question_async(req.questionId),
+        run_in_threadpool(blob_store.put, req.code),
+    )
+    test_cases, score = _grade(req.code, inputs)
+
+    # persist an evaluation result for frontend listeners; the code itself is stored once by hash
+    await firebase_service.save_evaluation_result_async(_evaluation_result(req, code_hash, test_cases, score))
+    return {"testCases": test_cases, "score": score}
+
+
+def _grade(code: str, inputs: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
     test_cases = []
     passed = 0
     for i, inp in enumerate(inputs, start=1):
         visible = inp.get("visible", True)
         expected = inp.get("expectedOutput") or inp.get("expected") or ""
         # mock check: pass if code length is odd (placeholder logic)
-        ok = len(req.code) % 2 == 1
-        status = "passed" if ok else "failed"
+        ok = len(code) % 2 == 1
         if ok:
             passed += 1
         test_cases.append({
@@ -62,45 +74,94 @@ def run_tests(req: RunTestsRequest):
         })
 
     score = int((passed / max(1, len(inputs))) * 100) if inputs else 0
+    return test_cases, score
+
 
-    # persist an evaluation result for frontend listeners
-    firebase_service.save_evaluation_result({
+def _evaluation_result(req, code_hash: str, test_cases: List[Dict[str, Any]], score: int) -> Dict[str, Any]:
+    return {
         "userId": req.userId,
         "questionId": req.questionId,
+        "codeHash": code_hash,
         "testCases": test_cases,
         "overallScore": score,
         "completedAt": time.time(),
-    })
-
-    return {"testCases": test_cases, "score": score}
+    }
 
 
-@router.post("/submit")
-def submit_solution(req: SubmitSolutionRequest):
-    # run tests and persist metrics/ai analysis (mock)
-    tests_res = run_tests(RunTestsRequest(code=req.code, language=req.language, questionId=req.questionId, userId=req.userId))
-    score = tests_res.get("score", 0)
-    firebase_service.save_metric({
+def _metric(req: SubmitSolutionRequest, code_hash: str, score: int, plagiarism: Dict[str, Any]) -> Dict[str, Any]:
+    return {
         "userId": req.userId,
         "questionId": req.questionId,
+        "codeHash": code_hash,
         "metric_type": "overall",
         "value": score,
-        "details": {},
-    })
-    firebase_service.save_ai_analysis({
+        "details": {"plagiarism": plagiarism},
+    }
+
+
+def _ai_analysis(req: SubmitSolutionRequest, code_hash: str, score: int) -> Dict[str, Any]:
+    return {
         "userId": req.userId,
         "questionId": req.questionId,
+        "codeHash": code_hash,
         "summary": "Mock summary - replace with LLM output",
         "overallRating": score,
-    })
-    return {"evaluationId": None, "score": score, "status": "completed"}
+    }
+
+
+def _submitted(score: int, code_hash: str, plagiarism: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "evaluationId": None,
+        "score": score,
+        "codeHash": code_hash,
+        "plagiarismFlag": plagiarism["plagiarism_flag"],
+        "status": "completed",
+    }
+
+
+@router.post("/submit")
+async def submit_solution(req: SubmitSolutionRequest, response: Response, background: bool = False):
+    if background:
+        # answer immediately; the client polls /jobs/{jobId} (or follows /jobs/{jobId}/events)
+        try:
+            job_id = job_queue.get_queue().submit("api_submit", _submit_solution, req)
+        except job_queue.QueueFull as e:
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+        response.status_code = 202
+        return {"evaluationId": None, "jobId": job_id, "status": job_queue.QUEUED}
+
+    # code blob referenced by the evaluation result, the metric and the analysis
+    inputs, code_hash = await asyncio.gather(
+        firebase_service.list_test_cases_for_question_async(req.questionId),
+        run_in_threadpool(blob_store.put, req.code, 3),
+    )
+    test_cases, score = _grade(req.code, inputs)
+    plagiarism = await run_in_threadpool(similarity_index.check_plagiarism, req.userId, req.questionId, req.code)
+    await asyncio.gather(
+        firebase_service.save_evaluation_result_async(_evaluation_result(req, code_hash, test_cases, score)),
+        firebase_service.save_metric_async(_metric(req, code_hash, score, plagiarism)),
+        firebase_service.save_ai_analysis_async(_ai_analysis(req, code_hash, score)),
+    )
+    return _submitted(score, code_hash, plagiarism)
+
+
+def _submit_solution(req: SubmitSolutionRequest) -> Dict[str, Any]:
+    # background job: runs on a worker thread, so it uses the blocking client
+    inputs = firebase_service.list_test_cases_for_question(req.questionId)
+    test_cases, score = _grade(req.code, inputs)
+    code_hash = blob_store.put(req.code, refs=3)
+    plagiarism = similarity_index.check_plagiarism(req.userId, req.questionId, req.code)
+    firebase_service.save_evaluation_result(_evaluation_result(req, code_hash, test_cases, score))
+    firebase_service.save_metric(_metric(req, code_hash, score, plagiarism))
+    firebase_service.save_ai_analysis(_ai_analysis(req, code_hash, score))
+    return _submitted(score, code_hash, plagiarism)
 
 
 @router.post("/chatbot")
-def chatbot(body: Dict[str, Any]):
+async def chatbot(body: Dict[str, Any]):
     prompt = body.get("prompt", "")
     response = {"response": f"Mock response for prompt: {prompt}"}
-    firebase_service.save_gpt_prompt({
+    await firebase_service.save_gpt_prompt_async({
         "prompt": prompt,
         "response": response["response"],
         "tokens": 0,
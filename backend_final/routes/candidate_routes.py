@@ -1,6 +1,9 @@
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
 from typing import Optional
+import json
+import anyio
 from models.candidate_model import CandidateAttempt
 try:
     from services import data_processing, evaluation_engine, summary_generator, firebase_service
@@ -11,25 +14,134 @@ except ImportError:
     summary_generator = None
     firebase_service = None
     evaluate_attempt = None
+try:
+    from services import event_ingest
+except ImportError:
+    event_ingest = None
+try:
+    from services import feature_store, scoring_profiles
+except ImportError:
+    feature_store = None
+    scoring_profiles = None
+try:
+    from services import job_queue
+except ImportError:
+    job_queue = None
+try:
+    from services import live_scoring
+except ImportError:
+    live_scoring = None
 
 router = APIRouter()
 
+def _evaluate_and_store(attempt: CandidateAttempt, store_to_firebase: bool) -> dict:
+    cleaned = data_processing.clean_candidate_attempt(attempt)
+    scores = evaluate_attempt(cleaned, record_submission=True)
+    if feature_store and scoring_profiles:
+        # keep features so the task can be re-scored later without the raw attempt
+        profile = scoring_profiles.get_profile(cleaned.task_id)
+        scores["profile_score"] = scoring_profiles.score(scores["core_metrics"], scores["features"], profile)
+        feature_store.save_features(f"{cleaned.candidate_id}_{cleaned.task_id}", cleaned.candidate_id, cleaned.task_id,
+                                    scores["features"], scores["core_metrics"], scores["profile_score"], profile.name)
+    summary = summary_generator.generate_summary(scores)
+    # persist result
+    if store_to_firebase:
+        firebase_service.save_evaluation(cleaned.candidate_id, cleaned.task_id, scores, summary)
+    return {"candidate_id": cleaned.candidate_id, "task_id": cleaned.task_id, "scores": scores, "summary": summary}
+
 @router.post("/submit", summary="Submit candidate attempt JSON")
-def submit_candidate(attempt: CandidateAttempt, store_to_firebase: Optional[bool]=False):
+def submit_candidate(attempt: CandidateAttempt, response: Response, store_to_firebase: Optional[bool]=False,
+                     background: Optional[bool]=False):
     if not all([data_processing, evaluate_attempt, summary_generator, firebase_service]):
         raise HTTPException(status_code=503, detail="Service unavailable")
     # Basic validation done by Pydantic
-    cleaned = data_processing.clean_candidate_attempt(attempt.dict())
-    scores = evaluate_attempt(cleaned)
-    summary = summary_generator.generate_summary(cleaned, scores)
-    # persist result
-    firebase_service.save_evaluation(cleaned["candidate_id"], cleaned["task_id"], scores, summary)
-    return {"candidate_id": cleaned["candidate_id"], "task_id": cleaned["task_id"], "scores": scores, "summary": summary}
+    if background:
+        if not job_queue:
+            raise HTTPException(status_code=503, detail="Service unavailable")
+        try:
+            job_id = job_queue.get_queue().submit("candidate_submit", _evaluate_and_store, attempt, bool(store_to_firebase))
+        except job_queue.QueueFull as e:
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+        response.status_code = 202
+        return {"jobId": job_id, "status": job_queue.QUEUED, "poll": f"/jobs/{job_id}"}
+    return _evaluate_and_store(attempt, bool(store_to_firebase))
 
 @router.post("/evaluate", summary="Evaluate using events path (firebase or direct payload)")
 def evaluate_direct(attempt: CandidateAttempt):
     if not all([data_processing, evaluate_attempt]):
         raise HTTPException(status_code=503, detail="Service unavailable")
-    cleaned = data_processing.clean_candidate_attempt(attempt.dict())
+    cleaned = data_processing.clean_candidate_attempt(attempt)
     scores = evaluate_attempt(cleaned)
-    return {"candidate_id": cleaned["candidate_id"], "task_id": cleaned["task_id"], "scores": scores}
+    return {"candidate_id": cleaned.candidate_id, "task_id": cleaned.task_id, "scores": scores}
+
+@router.post("/sessions/{session_id}/events", summary="Stream NDJSON events (optionally gzip) into session storage")
+async def ingest_events(session_id: str, request: Request):
+    if not event_ingest:
+        raise HTTPException(status_code=503, detail="Service unavailable")
+    encoding = request.headers.get("content-encoding", "").lower()
+    content_type = request.headers.get("content-type", "").lower()
+    gzipped = "gzip" in encoding or "gzip" in content_type
+    try:
+        return await event_ingest.ingest_ndjson_stream(session_id, request.stream(), gzipped=gzipped)
+    except event_ingest.IngestError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.websocket("/sessions/{session_id}/live")
+async def live_session(websocket: WebSocket, session_id: str):
+    """
+    Live telemetry: the editor sends events (a JSON object, a list, or {"events": [...]})
+    and receives an "update" message with metrics and flags after each one.
+    On connect the server answers "ready" with events_seen from the last checkpoint
+    (every event received, rejected ones included); a resuming client only sends
+    what came after that. Frames must be text: a binary frame closes with 1003.
+    """
+    if not live_scoring:
+        await websocket.close(code=1011)
+        return
+    await websocket.accept()
+    session = await run_in_threadpool(live_scoring.load_session, session_id)
+    await websocket.send_json({"type": "ready", "resumed": session.events_seen > 0,
+                               "events_seen": session.events_seen, "last_timestamp": session.last_timestamp})
+    pending = []
+    try:
+        while True:
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(frame.get("code", 1000))
+            if frame.get("text") is None:
+                await websocket.close(code=1003, reason="text frames only")
+                return
+            try:
+                message = json.loads(frame["text"])
+            except ValueError:
+                await websocket.send_json({"type": "error", "detail": "invalid JSON"})
+                continue
+            if isinstance(message, dict) and isinstance(message.get("events"), list):
+                message = message["events"]
+            rejected = 0
+            for raw in message if isinstance(message, list) else [message]:
+                ev = session.add(raw)
+                if ev is None:
+                    rejected += 1
+                elif event_ingest:
+                    pending.append(ev)
+            update = session.update()
+            if rejected:
+                update["rejected"] = rejected
+            await websocket.send_json(update)
+            if session.needs_checkpoint():
+                await _flush_live(session, pending)
+                pending = []
+    except WebSocketDisconnect:
+        pass
+    finally:
+        # a dropped connection may arrive as cancellation; the last checkpoint must still land
+        with anyio.CancelScope(shield=True):
+            await _flush_live(session, pending)
+
+async def _flush_live(session, pending):
+    # events are stored before the checkpoint that counts them
+    if pending:
+        await run_in_threadpool(event_ingest.store_events, session.session_id, pending)
+    if session.events_seen != session.checkpointed_at:
+        await run_in_threadpool(live_scoring.save_checkpoint, session)
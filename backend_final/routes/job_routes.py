@@ -0,0 +1,62 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+import asyncio
+import json
+try:
+    from services import job_queue
+except ImportError:
+    job_queue = None
+
+router = APIRouter()
+
+SSE_HEARTBEAT_S = 15.0
+SSE_POLL_S = 0.1
+
+
+def _get_job(job_id: str):
+    if not job_queue:
+        raise HTTPException(status_code=503, detail="Service unavailable")
+    job = job_queue.get_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/stats", summary="Job queue depth and worker status")
+def queue_stats():
+    if not job_queue:
+        raise HTTPException(status_code=503, detail="Service unavailable")
+    return job_queue.get_queue().stats()
+
+
+@router.get("/{job_id}", summary="Poll a background job")
+def get_job(job_id: str):
+    return _get_job(job_id).to_dict()
+
+
+@router.get("/{job_id}/events", summary="Follow a background job as server-sent events")
+async def job_events(job_id: str):
+    job = _get_job(job_id)
+
+    async def stream():
+        last = None
+        idle = 0.0
+        while True:
+            # done is set only after the final status, so check it on every pass: a status
+            # change seen just before done.set() must not swallow the final event
+            if job.done.is_set():
+                yield f"event: {job.status}\ndata: {json.dumps(job.to_dict(), default=str)}\n\n"
+                return
+            if job.status != last:
+                last = job.status
+                idle = 0.0
+                yield f"event: status\ndata: {json.dumps(job.to_dict(include_result=False))}\n\n"
+            # poll on the event loop: a watcher must not hold a threadpool thread
+            await asyncio.sleep(SSE_POLL_S)
+            idle += SSE_POLL_S
+            if idle >= SSE_HEARTBEAT_S:
+                idle = 0.0
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
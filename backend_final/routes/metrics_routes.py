@@ -0,0 +1,56 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from utils import metrics
+try:
+    from services import blob_store, code_analysis, job_queue
+except ImportError:
+    blob_store = None
+    code_analysis = None
+    job_queue = None
+try:
+    from services import narrative_store
+except ImportError:
+    narrative_store = None
+
+router = APIRouter()
+
+
+def _ratio(hits, misses):
+    total = hits + misses
+    return hits / total if total else None
+
+
+def _collect_caches():
+    caches = []
+    if blob_store:
+        caches.append(("blob_store", blob_store.cache_stats()))
+    if code_analysis:
+        caches.append(("code_analysis", code_analysis.cache_stats()))
+    if narrative_store:
+        caches.append(("narrative_store", narrative_store.cache_stats()))
+    for name, stats in caches:
+        yield "cache_hits_total", "counter", {"cache": name}, stats["hits"]
+    for name, stats in caches:
+        yield "cache_misses_total", "counter", {"cache": name}, stats["misses"]
+    for name, stats in caches:
+        yield "cache_hit_ratio", "gauge", {"cache": name}, _ratio(stats["hits"], stats["misses"])
+    for name, stats in caches:
+        yield "cache_entries", "gauge", {"cache": name}, stats["entries"]
+
+
+def _collect_jobs():
+    stats = job_queue.queue_stats() if job_queue else None
+    if not stats:
+        return
+    yield "job_queue_pending", "gauge", {}, stats["pending"]
+    for status, n in stats["jobs"].items():
+        yield "job_queue_jobs", "gauge", {"status": status}, n
+
+
+metrics.register_collector(_collect_caches)
+metrics.register_collector(_collect_jobs)
+
+
+@router.get("/metrics", response_class=PlainTextResponse, summary="Prometheus metrics")
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
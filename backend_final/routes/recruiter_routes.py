@@ -1,27 +1,100 @@
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+from typing import Optional
+from models.metrics_model import ScoringProfile
 try:
-    from services import firebase_service, ga_engine
+    from services import firebase_service, summary_generator
 except ImportError:
     firebase_service = None
+    summary_generator = None
+try:
+    from services import report_export
+except ImportError:
+    report_export = None
+try:
+    from services import ga_engine
+except ImportError:
     ga_engine = None
+try:
+    from services import scoring_profiles
+except ImportError:
+    scoring_profiles = None
+
+
+class RescoreRequest(BaseModel):
+    task_id: str
+    profile: Optional[ScoringProfile] = None  # defaults to the task's saved profile
+    save_profile: bool = False
 
 router = APIRouter()
 
 @router.get("/report/{candidate_id}/{task_id}")
-def get_report(candidate_id: str, task_id: str):
+async def get_report(candidate_id: str, task_id: str, narrative: bool = False):
     if not firebase_service:
         raise HTTPException(status_code=503, detail="Service unavailable")
-    data = firebase_service.get_evaluation(candidate_id, task_id)
+    data = await firebase_service.get_evaluation_async(candidate_id, task_id)
     if not data:
         raise HTTPException(status_code=404, detail="Report not found")
+    if narrative and summary_generator and data.get("scores"):
+        # cached per distinct result, so repeated views never reach the provider
+        data["summary"] = await run_in_threadpool(summary_generator.generate_summary, data["scores"], True)
     return data
 
+@router.get("/export")
+def export_evaluations(
+    format: str = Query(default="ndjson", pattern="^(ndjson|csv)$"),
+    fields: Optional[str] = Query(default=None, description="comma-separated dotted paths, e.g. candidate_id,summary.grade"),
+    task_id: Optional[str] = None,
+    narrative: bool = False,
+    gzip: bool = False,
+    page_size: int = Query(default=200, ge=1, le=1000),
+):
+    """Stream every stored evaluation (optionally of one task) with its summary, as NDJSON or CSV."""
+    if not firebase_service or not report_export:
+        raise HTTPException(status_code=503, detail="Service unavailable")
+    try:
+        columns = report_export.parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    headers = {"Content-Disposition": f'attachment; filename="evaluations.{format}"', "Cache-Control": "no-store"}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        report_export.export_chunks(format, columns, task_id, narrative, gzip, page_size),
+        media_type=media_type, headers=headers,
+    )
+
 @router.get("/recommend")
-def recommend():
+async def recommend():
     # returns a simple recommended candidate shortlist using GA engine on available evaluations
     if not firebase_service or not ga_engine:
         raise HTTPException(status_code=503, detail="Service unavailable")
-    evaluations = firebase_service.list_all_evaluations()
+    evaluations = await firebase_service.list_all_evaluations_async()
     suggested = ga_engine.suggest(evaluations)
     return {"suggested": suggested}
+
+@router.get("/profiles/{task_id}", response_model=ScoringProfile)
+def get_scoring_profile(task_id: str):
+    if not scoring_profiles:
+        raise HTTPException(status_code=503, detail="Service unavailable")
+    return scoring_profiles.get_profile(task_id)
+
+@router.put("/profiles/{task_id}", response_model=ScoringProfile)
+def put_scoring_profile(task_id: str, profile: ScoringProfile):
+    if not scoring_profiles:
+        raise HTTPException(status_code=503, detail="Service unavailable")
+    scoring_profiles.set_profile(task_id, profile)
+    return profile
+
+@router.post("/rescore")
+def rescore(req: RescoreRequest):
+    # re-applies a scoring profile to stored features; raw events are not touched
+    if not scoring_profiles:
+        raise HTTPException(status_code=503, detail="Service unavailable")
+    if req.profile and req.save_profile:
+        scoring_profiles.set_profile(req.task_id, req.profile)
+    return scoring_profiles.rescore_task(req.task_id, req.profile)
@@ -1,25 +1,79 @@
-
-from fastapi import APIRouter
-from typing import List
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional
 from models.task_model import Task
+from services import task_catalog
+try:
+    from services import adaptive_selection
+except ImportError:  # NumPy not installed
+    adaptive_selection = None
 
 router = APIRouter()
 
-# Simple in-memory tasks for hackathon
-_TASKS = [
-    Task(id="TAPI1", title="API Debug", description="Fix and document bug in API", tags=["backend","debug"], difficulty=3),
-    Task(id="TFE1", title="React Integration", description="Integrate public API into dashboard", tags=["frontend","integration"], difficulty=3),
-    Task(id="TFS1", title="Dockerize Service", description="Create Dockerfile and run container", tags=["devops"], difficulty=4),
-]
+MAX_PAGE = 500
+
+
+async def _catalog() -> task_catalog.TaskCatalog:
+    # (re)loading may hit Firestore; serving a fresh catalog never blocks
+    if task_catalog.is_stale():
+        return await run_in_threadpool(task_catalog.get_catalog)
+    return task_catalog.get_catalog()
+
+
+def _not_modified(request: Request, etag: str) -> bool:
+    inm = request.headers.get("if-none-match")
+    return bool(inm) and (inm.strip() == "*" or etag in (t.strip() for t in inm.split(",")))
+
+
+def _json(body: bytes, etag: str, **headers: str) -> Response:
+    return Response(content=body, media_type="application/json",
+                    headers={"ETag": etag, "Cache-Control": "no-cache", **headers})
+
 
 @router.get("/", response_model=List[Task])
-def list_tasks():
-    return _TASKS
+async def list_tasks(
+    request: Request,
+    tag: List[str] = Query(default=[], description="only tasks with all of these tags (repeatable)"),
+    difficulty: Optional[int] = None,
+    min_difficulty: Optional[int] = None,
+    max_difficulty: Optional[int] = None,
+    offset: int = Query(default=0, ge=0),
+    limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE),
+):
+    # the ETag identifies the catalog version, and any page of an unchanged catalog is
+    # unchanged, so a matching If-None-Match gets 304 before the query runs
+    catalog = await _catalog()
+    if _not_modified(request, catalog.etag):
+        return Response(status_code=304, headers={"ETag": catalog.etag, "Cache-Control": "no-cache"})
+    body, total = catalog.query(tag, difficulty, min_difficulty, max_difficulty, offset, limit)
+    return _json(body, catalog.etag, **{"X-Total-Count": str(total)})
+
+
+@router.get("/next")
+def next_task(candidate_id: str, tag: List[str] = Query(default=[])):
+    """Most informative unattempted task for the candidate's estimated ability (2PL IRT)."""
+    if not adaptive_selection:
+        raise HTTPException(status_code=503, detail="Service unavailable")
+    result = adaptive_selection.next_task(candidate_id, tag)
+    if result is None:
+        raise HTTPException(status_code=404, detail="No remaining tasks")
+    return result
+
+
+@router.post("/calibrate")
+def calibrate(min_responses: int = Query(default=20, ge=1)):
+    """Re-fit task difficulties from stored session scores."""
+    if not adaptive_selection:
+        raise HTTPException(status_code=503, detail="Service unavailable")
+    return adaptive_selection.calibrate(min_responses)
+
 
 @router.get("/{task_id}", response_model=Task)
-def get_task(task_id: str):
-    for t in _TASKS:
-        if t.id == task_id:
-            return t
-    from fastapi import HTTPException
-    raise HTTPException(status_code=404, detail="Task not found")
+async def get_task(task_id: str, request: Request):
+    catalog = await _catalog()
+    body = catalog.task_json(task_id)
+    if body is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    if _not_modified(request, catalog.etag):
+        return Response(status_code=304, headers={"ETag": catalog.etag, "Cache-Control": "no-cache"})
+    return _json(body, catalog.etag)
@@ -14,4 +14,20 @@ __all__ = [
     "fuzzy_logic_engine",
     "summary_generator",
     "firebase_service",
+    "event_store",
+    "event_ingest",
+    "event_log",
+    "blob_store",
+    "similarity_index",
+    "code_analysis",
+    "timing_analysis",
+    "feature_store",
+    "scoring_profiles",
+    "job_queue",
+    "live_scoring",
+    "local_store",
+    "task_catalog",
+    "adaptive_selection",
+    "narrative_store",
+    "report_export",
 ]
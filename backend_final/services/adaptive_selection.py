@@ -0,0 +1,190 @@
+"""
+adaptive_selection.py
+
+Adaptive next-task selection with a two-parameter logistic (2PL) IRT model.
+
+Every catalog task is an item with discrimination a and difficulty b. Until
+a task is calibrated, b comes from Task.difficulty (1..10 mapped onto
+-3..3) and a is 1. A candidate's ability theta is the EAP estimate over a
+fixed grid with a standard normal prior. Each prior session counts as a
+fractional response final_score / 100, so
+    log L(theta) = sum_j u_j log P_j(theta) + (1 - u_j) log Q_j(theta),
+with log P and log Q precomputed for every (item, grid point). Estimation is
+therefore one gather and one small matrix-vector product. The next task is
+the unanswered one with the most Fisher information a^2 P Q at theta.
+
+The item bank (parameters and grid tables) is built in bulk and cached,
+together with the catalog snapshot it was built from. It is rebuilt when
+the catalog changes or when the stored calibration changes (calibrate()
+in any worker re-fits every b from the stored session scores in one pass).
+The stored calibration version is read at most every CALIBRATION_CHECK_S
+seconds, so another worker's calibration is picked up within that time.
+
+Functions:
+- next_task(candidate_id, tags=()) -> dict or None
+- estimate_ability(responses) -> (theta, standard error)
+- calibrate(min_responses=MIN_RESPONSES) -> dict
+- get_bank() -> ItemBank
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import os
+import threading
+import time
+
+from services import feature_store, task_catalog
+from utils.lazy import lazy_import
+from utils.metrics import timed
+
+np = lazy_import("numpy")
+if np is None:
+    raise ImportError("adaptive_selection requires NumPy")
+
+GRID_POINTS = 81
+GRID_RANGE = 4.0
+MIN_RESPONSES = 20  # sessions a task needs before calibrate() replaces its default difficulty
+CALIBRATION_CHECK_S = float(os.environ.get("CALIBRATION_CHECK_S", "5"))
+_EPS = 1e-6
+
+
+def difficulty_to_b(difficulty: int) -> float:
+    """Map the 1..10 authoring scale onto the theta scale (-3..3)."""
+    return (min(max(difficulty, 1), 10) - 5.5) / 1.5
+
+
+class ItemBank:
+    """Item parameters and per-grid-point tables for one catalog version."""
+
+    def __init__(self, catalog: "task_catalog.TaskCatalog", a: Sequence[float], b: Sequence[float], version: Tuple):
+        self.catalog = catalog  # positions in the bank are positions in this snapshot
+        self.task_ids = [t.id for t in catalog.tasks]
+        self.index = {tid: i for i, tid in enumerate(self.task_ids)}
+        self.a = np.asarray(a, dtype=np.float64)
+        self.b = np.asarray(b, dtype=np.float64)
+        self.version = version
+
+        self.grid = np.linspace(-GRID_RANGE, GRID_RANGE, GRID_POINTS)
+        self.log_prior = -0.5 * self.grid ** 2
+        p = 1.0 / (1.0 + np.exp(-self.a[:, None] * (self.grid[None, :] - self.b[:, None])))
+        p = np.clip(p, _EPS, 1.0 - _EPS)
+        self.log_p = np.log(p)    # (items, grid)
+        self.log_q = np.log1p(-p)
+
+    def __len__(self) -> int:
+        return len(self.task_ids)
+
+    def estimate(self, idx: "np.ndarray", u: "np.ndarray") -> Tuple[float, float]:
+        """EAP theta and posterior SD from item rows `idx` and fractional responses `u`."""
+        log_post = self.log_prior + u @ self.log_p[idx] + (1.0 - u) @ self.log_q[idx]
+        post = np.exp(log_post - log_post.max())
+        post /= post.sum()
+        theta = float(post @ self.grid)
+        se = float(np.sqrt(post @ (self.grid - theta) ** 2))
+        return theta, se
+
+    def information(self, theta: float) -> "np.ndarray":
+        p = 1.0 / (1.0 + np.exp(-self.a * (theta - self.b)))
+        return self.a ** 2 * p * (1.0 - p)
+
+
+_bank: Optional[ItemBank] = None
+_calibration: Optional[Tuple[float, Tuple]] = None  # (checked at, stored calibration version)
+_lock = threading.Lock()
+
+
+def _calibration_version() -> Tuple:
+    global _calibration
+    checked = _calibration
+    if checked is None or time.monotonic() - checked[0] > CALIBRATION_CHECK_S:
+        checked = _calibration = (time.monotonic(), feature_store.item_params_version())
+    return checked[1]
+
+
+def get_bank() -> ItemBank:
+    global _bank
+    catalog = task_catalog.get_catalog()
+    # stored, not per-process: a calibrate() in another worker also invalidates this bank
+    version = (catalog.etag, _calibration_version())
+    bank = _bank
+    if bank is None or bank.version != version:
+        with _lock:
+            if _bank is None or _bank.version != version:
+                params = feature_store.load_item_params()
+                a, b = [], []
+                for task in catalog.tasks:
+                    ta, tb = params.get(task.id, (1.0, difficulty_to_b(task.difficulty)))
+                    a.append(ta)
+                    b.append(tb)
+                _bank = ItemBank(catalog, a, b, version)
+            bank = _bank
+    return bank
+
+
+def _responses(bank: ItemBank, scores: Iterable[Tuple[str, float]]) -> Tuple["np.ndarray", "np.ndarray"]:
+    # latest session per task wins; scores are 0..100
+    latest: Dict[int, float] = {}
+    for task_id, score in scores:
+        i = bank.index.get(task_id)
+        if i is not None and score is not None:
+            latest[i] = min(max(score / 100.0, 0.0), 1.0)
+    idx = np.fromiter(latest.keys(), dtype=np.intp, count=len(latest))
+    u = np.fromiter(latest.values(), dtype=np.float64, count=len(latest))
+    return idx, u
+
+
+def estimate_ability(responses: Iterable[Tuple[str, float]]) -> Tuple[float, float]:
+    """(theta, SE) from (task_id, final_score 0..100) pairs; unknown tasks are ignored."""
+    bank = get_bank()
+    idx, u = _responses(bank, responses)
+    return bank.estimate(idx, u)
+
+
+@timed("adaptive_selection.next_task")
+def next_task(candidate_id: str, tags: Sequence[str] = ()) -> Optional[Dict[str, Any]]:
+    """The most informative task the candidate has not attempted (optionally within `tags`), or None."""
+    bank = get_bank()
+    idx, u = _responses(bank, feature_store.candidate_scores(candidate_id))
+    theta, se = bank.estimate(idx, u)
+
+    info = bank.information(theta)
+    info[idx] = -1.0
+    if tags:
+        allowed = bank.catalog.positions(tags)
+        mask = np.ones(len(bank), dtype=bool)
+        mask[np.asarray(allowed, dtype=np.intp)] = False
+        info[mask] = -1.0
+    best = int(np.argmax(info))
+    if info[best] < 0:
+        return None
+
+    task = bank.catalog.get(bank.task_ids[best])
+    return {
+        "candidate_id": candidate_id,
+        "ability": round(theta, 4),
+        "ability_se": round(se, 4),
+        "answered": int(len(idx)),
+        "information": round(float(info[best]), 4),
+        "task": task.dict() if task else {"id": bank.task_ids[best]},
+    }
+
+
+def calibrate(min_responses: int = MIN_RESPONSES) -> Dict[str, Any]:
+    """
+    Re-fit item difficulties from stored session scores, in bulk.
+
+    With a = 1 and abilities centred on the prior, an item's mean response
+    p_bar gives b = -logit(p_bar). Tasks with fewer than `min_responses`
+    scored sessions keep their authored difficulty.
+    """
+    global _calibration
+    stats = feature_store.task_score_stats()
+    rows: List[Tuple[str, float, float, int]] = []
+    for task_id, (n, mean) in stats.items():
+        if n < min_responses or mean is None:
+            continue
+        p_bar = min(max(mean / 100.0, 0.01), 0.99)
+        b = float(-np.log(p_bar / (1.0 - p_bar)))
+        rows.append((task_id, 1.0, round(max(-GRID_RANGE, min(GRID_RANGE, b)), 4), n))
+    feature_store.save_item_params(rows)
+    _calibration = None  # re-read the stored version on the next get_bank()
+    return {"calibrated": len(rows), "skipped": len(stats) - len(rows), "min_responses": min_responses}
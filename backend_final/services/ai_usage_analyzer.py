@@ -4,96 +4,278 @@ ai_usage_analyzer.py
 Analyzes AI interaction patterns from candidate session data.
 
 Functions:
-- analyze_ai_usage(events: list) -> dict
+- analyze_ai_usage(events: iterable) -> dict
+- AIUsageTracker: incremental, single-event-at-a-time variant
+- WindowedAttribution: multi-window paste/edit attribution to every AI query in range
 """
 
-from typing import List, Dict, Any
+from typing import Dict, Any, Iterable
+from collections import deque
 import logging
 
-logger = logging.getLogger("ai_usage_analyzer")
-if not logger.handlers:
-    h = logging.StreamHandler()
-    fmt = logging.Formatter("%(asctime)s [ai_usage_analyzer] %(levelname)s: %(message)s")
-    h.setFormatter(fmt)
-    logger.addHandler(h)
-logger.setLevel(logging.INFO)
+try:
+    from services.similarity_index import MinHashLSHIndex
+except ImportError:
+    MinHashLSHIndex = None
 
+MAX_TRACKED_RESPONSES = 256  # AI responses kept per session for paste matching, most recent first
 
-def analyze_ai_usage(events: List[Dict[str, Any]]) -> Dict[str, Any]:
+logger = logging.getLogger("ai_usage_analyzer")  # handlers and level come from utils/logger.setup_logging
+
+
+class AIUsageTracker:
     """
-    Inspect sequence of candidate events and derive ethical AI usage patterns.
+    Incremental form of analyze_ai_usage: feed events one at a time with
+    update() and read the analysis with result(). State is O(1), plus a MinHash
+    index of the last MAX_TRACKED_RESPONSES AI responses when ai_query payloads
+    carry a "response".
+
+    A paste counts towards paste_after_ai when it follows an AI query closely in
+    time, or when its text ("text"/"code" payload) is a near-duplicate of a
+    recent AI response in the session.
     """
-    if not events:
-        return {"ai_queries": 0, "ethical_flag": "none", "engagement_score": 0.0}
 
-    ai_queries = 0
-    relevant_ai = 0
-    paste_after_ai = 0
-    edits_after_ai = 0
-    copy_paste_total = 0
-    time_of_last_ai = None
-    last_event_type = None
+    # the only event types whose payloads update() reads; callers may leave the others undecoded
+    PAYLOAD_TYPES = ("ai_query", "paste")
 
-    for ev in events:
+    def __init__(self, similarity_threshold: float = 0.6):
+        self.similarity_threshold = similarity_threshold
+        self._responses = None
+        self.paste_matched_ai = 0
+        self.max_paste_similarity = 0.0
+        self.ai_queries = 0
+        self.relevant_ai = 0
+        self.paste_after_ai = 0
+        self.edits_after_ai = 0
+        self.copy_paste_total = 0
+        self.time_of_last_ai = None
+        self.last_event_type = None
+        self.events_seen = 0
+
+    def update(self, ev: Dict[str, Any]) -> None:
         etype = ev.get("event_type")
-        payload = ev.get("payload", {})
-        ts = ev.get("timestamp", 0)
+        payload = ev.get("payload") or {}
+        if not isinstance(payload, dict):
+            return  # "payload": null reads as {}; a string or list payload cannot be read
+        ts = ev.get("timestamp") or 0
+        self.events_seen += 1
 
         if etype == "ai_query":
-            ai_queries += 1
-            time_of_last_ai = ts
+            self.ai_queries += 1
+            self.time_of_last_ai = ts
             if payload.get("relevant") or payload.get("used") or payload.get("response_snippet_used"):
-                relevant_ai += 1
+                self.relevant_ai += 1
+            response = payload.get("response")
+            if isinstance(response, str) and MinHashLSHIndex is not None:
+                if self._responses is None:
+                    self._responses = MinHashLSHIndex(max_entries=MAX_TRACKED_RESPONSES)
+                self._responses.insert(str(self.ai_queries), response, source="ai_response")
 
         elif etype == "paste":
-            copy_paste_total += 1
+            self.copy_paste_total += 1
             # If paste comes right after AI query → likely dependency
-            if last_event_type == "ai_query" or (time_of_last_ai and ts - time_of_last_ai < 20):
-                paste_after_ai += 1
+            near_ai = self.last_event_type == "ai_query" or (self.time_of_last_ai and ts - self.time_of_last_ai < 20)
+            # ...or if the pasted text matches an AI response seen earlier
+            text = payload.get("text") or payload.get("code")
+            if self._responses is not None and isinstance(text, str):
+                matches = self._responses.query(text, threshold=self.similarity_threshold)
+                if matches:
+                    self.paste_matched_ai += 1
+                    self.max_paste_similarity = max(self.max_paste_similarity, matches[0]["similarity"])
+                    near_ai = True
+            if near_ai:
+                self.paste_after_ai += 1
 
         elif etype == "edit":
             # edits following AI queries show engagement
-            if last_event_type == "ai_query" or (time_of_last_ai and ts - time_of_last_ai < 30):
-                edits_after_ai += 1
-
-        last_event_type = etype
-
-    # Compute ratios
-    relevance_ratio = (relevant_ai / ai_queries) if ai_queries > 0 else 0
-    paste_dependency = (paste_after_ai / copy_paste_total) if copy_paste_total > 0 else 0
-    engagement_ratio = (edits_after_ai / ai_queries) if ai_queries > 0 else 0
-
-    # Simple heuristic scoring (0..1)
-    base_score = relevance_ratio * (1 - paste_dependency) * (0.5 + engagement_ratio)
-    engagement_score = round(min(1.0, base_score), 3)
-
-    # Interpret behavior patterns
-    if ai_queries == 0:
-        ethical_flag = "neutral"
-        usage_pattern = "manual-only"
-    elif engagement_score > 0.7:
-        ethical_flag = "ethical"
-        usage_pattern = "balanced"
-    elif paste_dependency > 0.5 and engagement_score < 0.5:
-        ethical_flag = "overuse"
-        usage_pattern = "copy-heavy"
-    elif relevance_ratio < 0.3:
-        ethical_flag = "underuse"
-        usage_pattern = "inefficient"
-    else:
-        ethical_flag = "mixed"
-        usage_pattern = "unclear"
-
-    return {
-        "ai_queries": ai_queries,
-        "relevant_ai": relevant_ai,
-        "paste_after_ai": paste_after_ai,
-        "copy_paste_total": copy_paste_total,
-        "edits_after_ai": edits_after_ai,
-        "engagement_score": engagement_score,
-        "usage_pattern": usage_pattern,
-        "ethical_flag": ethical_flag
-    }
+            if self.last_event_type == "ai_query" or (self.time_of_last_ai and ts - self.time_of_last_ai < 30):
+                self.edits_after_ai += 1
+
+        self.last_event_type = etype
+
+    _STATE_FIELDS = ("similarity_threshold", "paste_matched_ai", "max_paste_similarity", "ai_queries", "relevant_ai",
+                     "paste_after_ai", "edits_after_ai", "copy_paste_total", "time_of_last_ai",
+                     "last_event_type", "events_seen")
+
+    def to_state(self) -> Dict[str, Any]:
+        """JSON-serializable tracker state, including the AI response signatures."""
+        state = {name: getattr(self, name) for name in self._STATE_FIELDS}
+        state["responses"] = self._responses.to_state() if self._responses is not None else None
+        return state
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "AIUsageTracker":
+        tracker = cls(similarity_threshold=state.get("similarity_threshold", 0.6))
+        for name in cls._STATE_FIELDS:
+            if name in state:
+                setattr(tracker, name, state[name])
+        if state.get("responses") and MinHashLSHIndex is not None:
+            tracker._responses = MinHashLSHIndex.from_state(state["responses"])
+        return tracker
+
+    def result(self) -> Dict[str, Any]:
+        if not self.events_seen:
+            return {"ai_queries": 0, "ethical_flag": "none", "engagement_score": 0.0}
+
+        ai_queries = self.ai_queries
+        relevant_ai = self.relevant_ai
+        paste_after_ai = self.paste_after_ai
+        edits_after_ai = self.edits_after_ai
+        copy_paste_total = self.copy_paste_total
+
+        # Compute ratios
+        relevance_ratio = (relevant_ai / ai_queries) if ai_queries > 0 else 0
+        paste_dependency = (paste_after_ai / copy_paste_total) if copy_paste_total > 0 else 0
+        engagement_ratio = (edits_after_ai / ai_queries) if ai_queries > 0 else 0
+
+        # Simple heuristic scoring (0..1)
+        base_score = relevance_ratio * (1 - paste_dependency) * (0.5 + engagement_ratio)
+        engagement_score = round(min(1.0, base_score), 3)
+
+        # Interpret behavior patterns
+        if ai_queries == 0:
+            ethical_flag = "neutral"
+            usage_pattern = "manual-only"
+        elif engagement_score > 0.7:
+            ethical_flag = "ethical"
+            usage_pattern = "balanced"
+        elif paste_dependency > 0.5 and engagement_score < 0.5:
+            ethical_flag = "overuse"
+            usage_pattern = "copy-heavy"
+        elif relevance_ratio < 0.3:
+            ethical_flag = "underuse"
+            usage_pattern = "inefficient"
+        else:
+            ethical_flag = "mixed"
+            usage_pattern = "unclear"
+
+        result = {
+            "ai_queries": ai_queries,
+            "relevant_ai": relevant_ai,
+            "paste_after_ai": paste_after_ai,
+            "copy_paste_total": copy_paste_total,
+            "edits_after_ai": edits_after_ai,
+            "engagement_score": engagement_score,
+            "usage_pattern": usage_pattern,
+            "ethical_flag": ethical_flag
+        }
+        if self._responses is not None:
+            result["paste_matched_ai"] = self.paste_matched_ai
+            result["max_paste_similarity"] = self.max_paste_similarity
+        return result
+
+
+DEFAULT_PASTE_WINDOWS = (10, 20, 30, 60)
+DEFAULT_EDIT_WINDOWS = (15, 30, 60, 120)
+
+
+class WindowedAttribution:
+    """
+    Single-pass, multi-window attribution of pastes and edits to AI queries.
+
+    Every paste/edit is attributed to *all* AI queries that happened within each
+    configured window before it (not just the latest query). Recent queries sit in
+    a deque trimmed to the largest window, so each event costs
+    O(queries in window x number of windows). Produces per-window totals and a
+    per-query engagement time series, which lets window sizes be tuned on
+    historical sessions without rescanning them once per candidate window.
+    """
+
+    def __init__(self, paste_windows=DEFAULT_PASTE_WINDOWS, edit_windows=DEFAULT_EDIT_WINDOWS):
+        self.paste_windows = tuple(sorted(paste_windows))
+        self.edit_windows = tuple(sorted(edit_windows))
+        self._horizon = max(self.paste_windows + self.edit_windows + (0,))
+        self._recent = deque()  # (timestamp, query index)
+        self.queries = []       # per-query engagement records
+        self.pastes = 0
+        self.edits = 0
+        self.pastes_attributed = {w: 0 for w in self.paste_windows}
+        self.edits_attributed = {w: 0 for w in self.edit_windows}
+
+    def update(self, ev: Dict[str, Any]) -> None:
+        if not isinstance(ev.get("payload") or {}, dict):
+            return  # skipped like AIUsageTracker.update, so both count the same events
+        etype = ev.get("event_type")
+        ts = ev.get("timestamp", 0) or 0
+        if etype == "ai_query":
+            self._recent.append((ts, len(self.queries)))
+            self.queries.append({
+                "timestamp": ts,
+                "pastes": {w: 0 for w in self.paste_windows},
+                "edits": {w: 0 for w in self.edit_windows},
+                "first_response_latency": None,
+            })
+        elif etype == "paste":
+            self.pastes += 1
+            self._attribute(ts, "pastes", self.paste_windows, self.pastes_attributed)
+        elif etype == "edit":
+            self.edits += 1
+            self._attribute(ts, "edits", self.edit_windows, self.edits_attributed)
+
+    def _attribute(self, ts, kind, windows, totals) -> None:
+        recent = self._recent
+        while recent and ts - recent[0][0] > self._horizon:
+            recent.popleft()
+        hit = set()
+        # newest first: once a query is older than the largest window, all earlier ones are too
+        for q_ts, q_idx in reversed(recent):
+            delta = ts - q_ts
+            if delta < 0:
+                continue
+            if delta > windows[-1]:
+                break
+            query = self.queries[q_idx]
+            if query["first_response_latency"] is None:
+                query["first_response_latency"] = delta
+            counts = query[kind]
+            for w in windows:
+                if delta <= w:
+                    counts[w] += 1
+                    hit.add(w)
+        for w in hit:
+            totals[w] += 1
+
+    def result(self) -> Dict[str, Any]:
+        return {
+            "paste_windows": {
+                str(w): {"attributed": n, "ratio": round(n / self.pastes, 3) if self.pastes else 0.0}
+                for w, n in self.pastes_attributed.items()
+            },
+            "edit_windows": {
+                str(w): {"attributed": n, "ratio": round(n / self.edits, 3) if self.edits else 0.0}
+                for w, n in self.edits_attributed.items()
+            },
+            "per_query": [
+                {
+                    "timestamp": q["timestamp"],
+                    "first_response_latency": q["first_response_latency"],
+                    "pastes": {str(w): n for w, n in q["pastes"].items()},
+                    "edits": {str(w): n for w, n in q["edits"].items()},
+                }
+                for q in self.queries
+            ],
+        }
+
+
+def analyze_ai_usage(events: Iterable[Dict[str, Any]], paste_windows=None, edit_windows=None) -> Dict[str, Any]:
+    """
+    Inspect sequence of candidate events and derive ethical AI usage patterns.
+    Accepts any iterable (list or generator); events are consumed in one pass.
+    If paste_windows / edit_windows are given, a multi-window attribution
+    (see WindowedAttribution) is computed in the same pass under "window_attribution".
+    """
+    tracker = AIUsageTracker()
+    windowed = None
+    if paste_windows or edit_windows:
+        windowed = WindowedAttribution(paste_windows or DEFAULT_PASTE_WINDOWS, edit_windows or DEFAULT_EDIT_WINDOWS)
+    for ev in events:
+        tracker.update(ev)
+        if windowed:
+            windowed.update(ev)
+    result = tracker.result()
+    if windowed:
+        result["window_attribution"] = windowed.result()
+    return result
 
 
 # ---------------------------------------------
@@ -109,4 +291,4 @@ if __name__ == "__main__":
     ]
 
     import pprint
-    pprint.pprint(analyze_ai_usage(demo_events))
+    pprint.pprint(analyze_ai_usage(demo_events, paste_windows=(5, 20), edit_windows=(10, 30)))
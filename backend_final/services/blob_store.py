@@ -0,0 +1,124 @@
+"""
+blob_store.py
+
+Content-addressed, reference-counted store for code text.
+
+Code is keyed by its SHA-256 hex digest, so identical templates and
+solutions submitted by many candidates are stored once. Documents that
+reference code (snapshots, submissions, evaluation results) keep only the
+hash. Reads go through an in-process LRU cache.
+
+Every put() adds references (one per document that will hold the hash)
+and release() drops them; a blob is deleted once its count reaches zero.
+Ingested session events hold one reference per code-bearing event, which
+event_ingest.delete_session() gives back; a submission holds three (the
+evaluation result, the metric and the AI analysis).
+
+Functions:
+- hash_code(code: str) -> str
+- put(code: str, refs: int = 1) -> str
+- put_many(codes: list, refs: int = 1) -> list
+- get(code_hash: str) -> Optional[str]
+- release(code_hash: str, refs: int = 1) -> int
+"""
+
+from typing import List, Optional
+import hashlib
+import os
+import sqlite3
+
+from utils.lru import LRUCache
+
+DB_PATH = os.environ.get("BLOB_STORE_DB", "blob_store.db")
+CACHE_MAX_ENTRIES = int(os.environ.get("BLOB_CACHE_ENTRIES", "1024"))
+CACHE_MAX_BYTES = int(os.environ.get("BLOB_CACHE_BYTES", str(32 * 1024 * 1024)))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    content TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    refcount INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+_initialized = set()
+
+
+_cache = LRUCache(CACHE_MAX_ENTRIES, CACHE_MAX_BYTES)
+
+
+def _connect(db_path: Optional[str] = None) -> sqlite3.Connection:
+    path = db_path or DB_PATH
+    conn = sqlite3.connect(path)
+    if path not in _initialized:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        _initialized.add(path)
+    return conn
+
+
+def hash_code(code: str) -> str:
+    return hashlib.sha256(code.encode("utf-8")).hexdigest()
+
+
+def put(code: str, refs: int = 1, db_path: Optional[str] = None) -> str:
+    """Store `code` (once) and add `refs` references to it. Returns its hash."""
+    return put_many([code], refs=refs, db_path=db_path)[0]
+
+
+def put_many(codes: List[str], refs: int = 1, db_path: Optional[str] = None) -> List[str]:
+    """Batch form of put(): one transaction, `refs` references per item."""
+    hashes = [hash_code(code) for code in codes]
+    conn = _connect(db_path)
+    try:
+        with conn:
+            conn.executemany(
+                "INSERT INTO blobs (hash, content, size, refcount) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(hash) DO UPDATE SET refcount = refcount + excluded.refcount",
+                [(h, code, len(code), refs) for h, code in zip(hashes, codes)],
+            )
+    finally:
+        conn.close()
+    for h, code in zip(hashes, codes):
+        _cache.put(h, code)
+    return hashes
+
+
+def get(code_hash: str, db_path: Optional[str] = None) -> Optional[str]:
+    if not code_hash:
+        return None
+    cached = _cache.get(code_hash)
+    if cached is not None:
+        return cached
+    conn = _connect(db_path)
+    try:
+        row = conn.execute("SELECT content FROM blobs WHERE hash = ?", (code_hash,)).fetchone()
+    finally:
+        conn.close()
+    if not row:
+        return None
+    _cache.put(code_hash, row[0])
+    return row[0]
+
+
+def release(code_hash: str, refs: int = 1, db_path: Optional[str] = None) -> int:
+    """Drop `refs` references; the blob is deleted once nothing points at it. Returns the new count."""
+    conn = _connect(db_path)
+    try:
+        with conn:
+            conn.execute("UPDATE blobs SET refcount = refcount - ? WHERE hash = ?", (refs, code_hash))
+            row = conn.execute("SELECT refcount FROM blobs WHERE hash = ?", (code_hash,)).fetchone()
+            if not row:
+                return 0
+            if row[0] <= 0:
+                conn.execute("DELETE FROM blobs WHERE hash = ?", (code_hash,))
+                _cache.discard(code_hash)
+                return 0
+            return int(row[0])
+    finally:
+        conn.close()
+
+
+def cache_stats() -> dict:
+    return {"hits": _cache.hits, "misses": _cache.misses, "entries": len(_cache), "bytes": _cache.nbytes}
@@ -0,0 +1,203 @@
+"""
+code_analysis.py
+
+Static code-quality features for candidate snapshots.
+
+Each distinct code version is parsed once with `ast` and summarized as:
+cyclomatic complexity, function count, maximum nesting depth and whether
+errors are handled. Results are memoized by code hash (SHA-256, the same
+key the blob store uses), so identical versions across snapshots and
+candidates are never re-parsed. Cache misses are parsed in a process pool
+when there are enough of them to pay for the dispatch.
+
+The pool never forks the server process: its workers come from a
+forkserver (spawn where that is unavailable; CODE_ANALYSIS_START_METHOD
+overrides), since forking a process that is already running threads can
+copy a lock held by another thread. The app starts the pool in its
+lifespan hook (start_pool / shutdown_pool); other callers get one created
+on first use.
+
+Functions:
+- analyze_code(code: str) -> dict
+- analyze_snapshots(codes: list) -> list
+- aggregate_code_features(results: list) -> dict
+- cache_stats() -> dict
+- start_pool() / shutdown_pool()
+"""
+
+from typing import Any, Dict, Iterable, List, Optional
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import ast
+import atexit
+import hashlib
+import multiprocessing
+import os
+import threading
+from utils.metrics import timed
+
+MAX_WORKERS = int(os.environ.get("CODE_ANALYSIS_WORKERS", "0")) or None  # None -> os.cpu_count()
+POOL_MIN_BATCH = 8      # fewer misses than this are parsed inline
+START_METHOD = os.environ.get("CODE_ANALYSIS_START_METHOD") or (
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn")
+CACHE_MAX_ENTRIES = 4096
+
+_BRANCH_NODES = (ast.If, ast.For, ast.AsyncFor, ast.While, ast.IfExp, ast.ExceptHandler, ast.Assert, ast.comprehension)
+_BLOCK_NODES = (ast.If, ast.For, ast.AsyncFor, ast.While, ast.With, ast.AsyncWith, ast.Try,
+                ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+if hasattr(ast, "TryStar"):
+    _BLOCK_NODES = _BLOCK_NODES + (ast.TryStar,)
+if hasattr(ast, "Match"):
+    _BRANCH_NODES = _BRANCH_NODES + (ast.match_case,)
+    _BLOCK_NODES = _BLOCK_NODES + (ast.Match,)
+
+_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_cache_lock = threading.Lock()
+_cache_hits = 0
+_cache_misses = 0
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def code_hash(code: str) -> str:
+    return hashlib.sha256(code.encode("utf-8")).hexdigest()
+
+
+def _nesting_depth(tree: ast.AST) -> int:
+    # explicit stack: a long expression chain is as deep as it is long and would overflow recursion
+    deepest = 0
+    stack = [(tree, 0)]
+    while stack:
+        node, depth = stack.pop()
+        deepest = max(deepest, depth)
+        for child in ast.iter_child_nodes(node):
+            stack.append((child, depth + 1 if isinstance(child, _BLOCK_NODES) else depth))
+    return deepest
+
+
+def analyze_code(code: str) -> Dict[str, Any]:
+    """Parse one code version and return its structural features."""
+    try:
+        tree = ast.parse(code or "")
+    except (SyntaxError, ValueError, RecursionError, MemoryError):
+        # RecursionError / MemoryError: nesting too deep for the parser, e.g. "x=1+1+...+1"
+        return {"parsed": False, "complexity": 0, "functions": 0, "max_nesting": 0, "error_handling": False}
+
+    complexity = 1
+    functions = 0
+    error_handling = False
+    for node in ast.walk(tree):
+        if isinstance(node, _BRANCH_NODES):
+            complexity += 1
+        elif isinstance(node, ast.BoolOp):
+            complexity += len(node.values) - 1
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)):
+            functions += 1
+        if isinstance(node, (ast.Try, ast.Raise)) or (hasattr(ast, "TryStar") and isinstance(node, ast.TryStar)):
+            error_handling = True
+
+    return {
+        "parsed": True,
+        "complexity": complexity,
+        "functions": functions,
+        "max_nesting": _nesting_depth(tree),
+        "error_handling": error_handling,
+    }
+
+
+def start_pool() -> ProcessPoolExecutor:
+    """Create the worker pool if it does not exist yet (workers start on first use)."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                context = multiprocessing.get_context(START_METHOD)
+                _pool = ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=context)
+                atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+    return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _cache_get(key: str) -> Optional[Dict[str, Any]]:
+    global _cache_hits, _cache_misses
+    with _cache_lock:
+        hit = _cache.get(key)
+        if hit is not None:
+            _cache.move_to_end(key)
+            _cache_hits += 1
+        else:
+            _cache_misses += 1
+        return hit
+
+
+def _cache_put(key: str, value: Dict[str, Any]) -> None:
+    with _cache_lock:
+        _cache[key] = value
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+
+
+@timed("code_analysis")
+def analyze_snapshots(codes: Iterable[Optional[str]], use_processes: bool = True) -> List[Optional[Dict[str, Any]]]:
+    """
+    Features for each code version in `codes` (None stays None). Each distinct
+    version is looked up in the memo first; remaining ones are parsed once,
+    in the process pool when there are at least POOL_MIN_BATCH of them.
+    """
+    codes = list(codes)
+    keys = [code_hash(c) if c is not None else None for c in codes]
+    results: Dict[str, Dict[str, Any]] = {}
+    missing: Dict[str, str] = {}
+    for key, code in zip(keys, codes):
+        if key is None or key in results or key in missing:
+            continue
+        cached = _cache_get(key)
+        if cached is not None:
+            results[key] = cached
+        else:
+            missing[key] = code
+
+    if missing:
+        todo = list(missing.items())
+        if use_processes and len(todo) >= POOL_MIN_BATCH:
+            chunksize = max(1, len(todo) // (4 * (MAX_WORKERS or os.cpu_count() or 1)))
+            parsed = list(start_pool().map(analyze_code, [c for _, c in todo], chunksize=chunksize))
+        else:
+            parsed = [analyze_code(c) for _, c in todo]
+        for (key, _), features in zip(todo, parsed):
+            _cache_put(key, features)
+            results[key] = features
+
+    return [results[key] if key is not None else None for key in keys]
+
+
+def cache_stats() -> dict:
+    return {"hits": _cache_hits, "misses": _cache_misses, "entries": len(_cache)}
+
+
+def aggregate_code_features(results: List[Optional[Dict[str, Any]]]) -> Dict[str, float]:
+    """
+    Collapse per-version features into the keys compute_core_metrics understands.
+    The final parsable version describes the submitted code; parse_ratio says how
+    often the candidate's code was syntactically valid along the way.
+    """
+    present = [r for r in results if r is not None]
+    if not present:
+        return {}
+    parsed = [r for r in present if r["parsed"]]
+    final = parsed[-1] if parsed else present[-1]
+    return {
+        "code_complexity": final["complexity"],
+        "code_functions": final["functions"],
+        "code_max_nesting": final["max_nesting"],
+        "code_error_handling": 1 if final["error_handling"] else 0,
+        "code_parse_ratio": round(len(parsed) / len(present), 3),
+    }
@@ -6,34 +6,42 @@ Prepares and sanitizes candidate session data before evaluation.
 Functions:
 - load_raw_session(source: Union[str, dict, list]) -> list
 - clean_and_normalize_events(events: list) -> list
+- merge_event_streams(*streams) -> iterator (lazy k-way merge of ordered sources)
 - preprocess_session_data(raw_data: Any) -> dict
+- attempt_to_events(attempt: CandidateAttempt) -> list
+- clean_candidate_attempt(attempt: CandidateAttempt) -> CandidateAttempt
 """
 
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+from collections import deque
+from itertools import pairwise
+import heapq
 import json
 import logging
 from datetime import datetime
 
+from models.candidate_model import CandidateAttempt
+from services import blob_store
+from utils.metrics import count, timed
+
 # Import evaluation engine for integration
 try:
-    from app.services.evaluation_engine import evaluate_candidate_session
+    from app.services.evaluation_engine import evaluate_candidate_session, evaluate_event_stream
 except ImportError:
     try:
-        from services.evaluation_engine import evaluate_candidate_session
+        from services.evaluation_engine import evaluate_candidate_session, evaluate_event_stream
     except ImportError:
         evaluate_candidate_session = None
+        evaluate_event_stream = None
+
+logger = logging.getLogger("data_processing")  # handlers and level come from utils/logger.setup_logging
 
-logger = logging.getLogger("data_processing")
-if not logger.handlers:
-    h = logging.StreamHandler()
-    fmt = logging.Formatter("%(asctime)s [data_processing] %(levelname)s: %(message)s")
-    h.setFormatter(fmt)
-    logger.addHandler(h)
-logger.setLevel(logging.INFO)
+VALID_EVENT_TYPES = ("run", "edit", "ai_query", "paste", "self_explanation")
 
 # ------------------------------------------------
 # Load + Parse
 # ------------------------------------------------
+@timed("load_raw_session")
 def load_raw_session(source: Union[str, Dict[str, Any], List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
     """
     Load raw events from different input formats:
@@ -53,75 +61,242 @@ def load_raw_session(source: Union[str, Dict[str, Any], List[Dict[str, Any]]]) -
             elif isinstance(parsed, list):
                 return parsed
         except Exception as e:
-            logger.error(f"JSON parse failed: {e}")
+            logger.error("JSON parse failed: %s", e)
     return []
 
 
 # ------------------------------------------------
 # Normalization + Cleaning
 # ------------------------------------------------
+@timed("normalize_event_types")
 def normalize_event_types(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
     Normalizes event naming and structure (handles variations from different frontends).
     """
-    normalized = []
-    mapping = {
-        "run_code": "run",
-        "code_run": "run",
-        "query_ai": "ai_query",
-        "chatgpt_call": "ai_query",
-        "paste_action": "paste",
-        "text_edit": "edit",
-    }
+    return [normalize_event(ev) for ev in events]
 
-    for ev in events:
-        etype = ev.get("event_type") or ev.get("type")
-        etype = mapping.get(etype, etype)
-        payload = ev.get("payload", {})
-        timestamp = ev.get("timestamp")
 
-        # fix timestamp
-        try:
-            if isinstance(timestamp, str):
-                timestamp = float(datetime.fromisoformat(timestamp).timestamp())
-        except Exception:
-            timestamp = 0.0
+_EVENT_TYPE_ALIASES = {
+    "run_code": "run",
+    "code_run": "run",
+    "query_ai": "ai_query",
+    "chatgpt_call": "ai_query",
+    "paste_action": "paste",
+    "text_edit": "edit",
+}
+
 
-        normalized.append({
-            "event_type": etype,
-            "payload": payload,
-            "timestamp": timestamp
-        })
+def normalize_event(ev: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalize a single event (type aliases, ISO timestamps)."""
+    etype = ev.get("event_type") or ev.get("type")
+    etype = _EVENT_TYPE_ALIASES.get(etype, etype)
+    payload = ev.get("payload", {})
+    timestamp = ev.get("timestamp")
 
-    return normalized
+    # fix timestamp
+    try:
+        if isinstance(timestamp, str):
+            timestamp = float(datetime.fromisoformat(timestamp).timestamp())
+    except Exception:
+        timestamp = 0.0
+
+    return {
+        "event_type": etype,
+        "payload": payload,
+        "timestamp": timestamp
+    }
 
 
+@timed("clean_events")
 def clean_and_normalize_events(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
     Removes duplicates, invalid entries, and sorts by timestamp.
     """
     seen = set()
     clean = []
+    # checked once per call: with DEBUG off the loop never builds a log record
+    debug = logger.isEnabledFor(logging.DEBUG)
 
     for ev in events:
         if not isinstance(ev, dict):
+            if debug:
+                logger.debug("dropped non-dict event of type %s", type(ev).__name__)
             continue
         etype = ev.get("event_type")
         ts = ev.get("timestamp")
         key = (etype, ts)
         if key in seen:
+            if debug:
+                logger.debug("dropped duplicate event %s at %s", etype, ts)
             continue
         seen.add(key)
 
         # minimal validation
-        if etype not in ["run", "edit", "ai_query", "paste", "self_explanation"]:
+        if etype not in VALID_EVENT_TYPES:
+            if debug:
+                logger.debug("dropped event with unknown type %r", etype)
             continue
         clean.append(ev)
 
     clean.sort(key=lambda e: e.get("timestamp", 0))
+    count("pipeline_events_total", len(events), stage="clean_events")
+    count("pipeline_events_dropped_total", len(events) - len(clean), stage="clean_events")
     return clean
 
 
+def _items(seq):
+    # trusted attempts hold raw dicts in a LazyModelList; read them without validating
+    return seq.raw() if hasattr(seq, "raw") else iter(seq)
+
+
+def _field(item, name, default=None):
+    if isinstance(item, dict):
+        return item.get(name, default)
+    return getattr(item, name, default)
+
+
+@timed("attempt_to_events")
+def attempt_to_events(attempt: CandidateAttempt) -> List[Dict[str, Any]]:
+    """
+    Turn a CandidateAttempt model into the event list the evaluator consumes,
+    reading model attributes directly (no .dict() round-trip). Each snapshot is a
+    code version ("edit"), plus a "run" when it carries a run status.
+
+    Editor snapshots, AI interactions and the self-explanation are separate
+    sources, each recorded in time order, so they are k-way merged
+    (merge_event_streams) instead of concatenated and sorted.
+    """
+    editor = []
+    history = getattr(attempt, "code_history", None)
+    history_hashes = {}  # history index -> content hash; compacted snapshots share versions
+    for snap in _items(attempt.code_snapshots):
+        ts = _field(snap, "timestamp", 0)
+        # always the content hash, so a compacted attempt counts the same versions as the inline one
+        version = _field(snap, "code_hash")
+        index = _field(snap, "version")
+        if version is None and index is not None and history is not None:
+            version = history_hashes.get(index)
+            if version is None:
+                version = history_hashes[index] = blob_store.hash_code(history.get(index))
+        if version is None and _field(snap, "code") is not None:
+            version = blob_store.hash_code(_field(snap, "code"))
+        editor.append({"event_type": "edit", "payload": {"code_hash": version}, "timestamp": ts})
+        run_status = _field(snap, "run_status")
+        if run_status:
+            editor.append({"event_type": "run", "payload": {"result": run_status}, "timestamp": ts})
+    ai = [
+        {
+            "event_type": "ai_query",
+            "payload": {
+                "response_snippet_used": _field(item, "response_snippet_used", False),
+                "category": _field(item, "category"),
+                "response": _field(item, "response"),
+            },
+            "timestamp": _field(item, "timestamp", 0),
+        }
+        for item in _items(attempt.ai_interactions)
+    ]
+    explanation = []
+    if attempt.self_explanation:
+        explanation.append({"event_type": "self_explanation", "payload": {"text": attempt.self_explanation}, "timestamp": attempt.session_end})
+    # every snapshot is its own version, so nothing is dropped as a duplicate here
+    return list(merge_event_streams(_in_order(editor), _in_order(ai), explanation, dedup_window=None))
+
+
+def _in_order(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # clients record each source in order; the rare one that is not gets a (stable) sort of its own
+    if any(b["timestamp"] < a["timestamp"] for a, b in pairwise(events)):
+        events.sort(key=lambda e: e["timestamp"])
+    return events
+
+
+@timed("clean_candidate_attempt")
+def clean_candidate_attempt(attempt: CandidateAttempt) -> CandidateAttempt:
+    """
+    Sanitize the scalar parts of an attempt (session bounds, behavior aggregates).
+    Snapshot / interaction lists are left untouched so this stays O(1).
+    """
+    bm = attempt.behavior_metrics
+    counts = {
+        name: max(0, getattr(bm, name) or 0)
+        for name in ("total_runs", "successful_runs", "idle_time_sec", "copy_paste_events", "tabs_switched", "unique_code_versions")
+    }
+    counts["successful_runs"] = min(counts["successful_runs"], counts["total_runs"])
+    if bm.total_keystrokes is not None:
+        counts["total_keystrokes"] = max(0, bm.total_keystrokes)
+    attempt.behavior_metrics = bm.model_copy(update=counts)
+    if attempt.session_end < attempt.session_start:
+        logger.warning("session_end before session_start for %s/%s", attempt.candidate_id, attempt.task_id)
+        attempt.session_end = attempt.session_start
+    return attempt
+
+
+def merge_event_streams(*streams: Iterable[Dict[str, Any]],
+                        dedup_window: Optional[float] = 1.0) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily k-way merge several per-source event iterators that are each already
+    ordered by timestamp (editor, AI chat, tab tracker, activity logs...).
+
+    Events are normalized and validated as they are pulled. Duplicates on
+    (event_type, timestamp) are dropped, but only remembered for `dedup_window`
+    seconds behind the merge front, so memory is O(sources + window) instead of
+    O(events); dedup_window=None keeps every event. Yields events in timestamp
+    order; ties keep source order.
+    """
+    heap = []
+    for source_idx, stream in enumerate(streams):
+        it = iter(stream)
+        _push_next(heap, it, source_idx)
+
+    recent = deque()  # (timestamp, key) in emission order
+    seen = set()
+    while heap:
+        ts, source_idx, ev, it = heapq.heappop(heap)
+        _push_next(heap, it, source_idx)
+        if dedup_window is None:
+            yield ev
+            continue
+
+        while recent and recent[0][0] < ts - dedup_window:
+            seen.discard(recent.popleft()[1])
+        key = (ev["event_type"], ts)
+        if key in seen:
+            continue
+        seen.add(key)
+        recent.append((ts, key))
+        yield ev
+
+
+def _push_next(heap: list, it: Iterator[Dict[str, Any]], source_idx: int) -> None:
+    """Push the next valid event of a source onto the merge heap."""
+    for raw in it:
+        if not isinstance(raw, dict):
+            continue
+        ts = raw.get("timestamp")
+        if raw.get("event_type") in VALID_EVENT_TYPES and type(ts) in (int, float) and "payload" in raw:
+            # already canonical (e.g. built by attempt_to_events): no normalized copy needed
+            heapq.heappush(heap, (ts, source_idx, raw, it))
+            return
+        ev = normalize_event(raw)
+        if ev["event_type"] not in VALID_EVENT_TYPES:
+            continue
+        try:
+            ts = float(ev["timestamp"] or 0.0)
+        except (TypeError, ValueError):
+            ts = 0.0
+        ev["timestamp"] = ts
+        # source_idx breaks timestamp ties, so dicts are never compared
+        heapq.heappush(heap, (ts, source_idx, ev, it))
+        return
+
+
+def evaluate_event_streams(*streams: Iterable[Dict[str, Any]], dedup_window: float = 1.0) -> Dict[str, Any]:
+    """Merge ordered per-source streams and evaluate them without materializing the session."""
+    if not evaluate_event_stream:
+        return {"error": "Evaluation engine not available"}
+    return evaluate_event_stream(merge_event_streams(*streams, dedup_window=dedup_window))
+
+
 # ------------------------------------------------
 # Main preprocessing entry
 # ------------------------------------------------
@@ -6,6 +6,11 @@ Core orchestrator for evaluating a candidate session.
 Functions:
 - evaluate_candidate_session(candidate_data: dict) -> dict
 - evaluate_session_from_sqlite(db_path: str, session_id: str) -> dict
+- evaluate_session_from_log(log_path: str) -> dict
+- evaluate_attempt(attempt: CandidateAttempt, record_submission=False) -> dict
+- evaluate_event_stream(events: iterable) -> dict
+- score_features(features: dict, ai_analysis=None, timing=None) -> dict
+- fuzzy_score(core_metrics: dict, features: dict) -> (score, summary, membership)
 
 This module:
 1. extracts numerical features from raw events
@@ -15,30 +20,50 @@ This module:
 5. returns a structured evaluation result suitable for storing or returning to frontend
 """
 
-from typing import Dict, Any, List, Tuple, Optional
+from typing import Dict, Any, Iterable, List, Tuple, Optional, Union
+from array import array
 import math
 import json
 import logging
 
+from models.candidate_model import CandidateAttempt
+from utils.time_utils import duration_seconds
+from utils.metrics import timed
+
 # Optional imports (if provided elsewhere in your codebase).
 try:
-    from app.services.ai_usage_analyzer import analyze_ai_usage  # type: ignore
+    from app.services.ai_usage_analyzer import analyze_ai_usage, AIUsageTracker  # type: ignore
 except (ImportError, ModuleNotFoundError):
-    analyze_ai_usage = None  # fallback used below
+    try:
+        from services.ai_usage_analyzer import analyze_ai_usage, AIUsageTracker
+    except ImportError:
+        analyze_ai_usage = None  # fallback used below
+        AIUsageTracker = None
 
 try:
     from app.services.fuzzy_logic_engine import fuzzy_evaluate  # type: ignore
 except (ImportError, ModuleNotFoundError):
     fuzzy_evaluate = None  # fallback defined below
 
+try:
+    from services.similarity_index import check_plagiarism, cohort_is_complete
+except ImportError:
+    check_plagiarism = None
+    cohort_is_complete = None
+
+try:
+    from services.code_analysis import analyze_snapshots, aggregate_code_features
+except ImportError:
+    analyze_snapshots = None
+    aggregate_code_features = None
+
+from services.timing_analysis import HAS_NUMPY, analyze_timing, timing_arrays
+if not HAS_NUMPY:  # the import itself never fails: NumPy is loaded lazily
+    analyze_timing = None
+    timing_arrays = None
+
 # Logging setup
-logger = logging.getLogger("evaluation_engine")
-if not logger.handlers:
-    h = logging.StreamHandler()
-    fmt = logging.Formatter("%(asctime)s %(levelname)s %(message)s")
-    h.setFormatter(fmt)
-    logger.addHandler(h)
-logger.setLevel(logging.INFO)
+logger = logging.getLogger("evaluation_engine")  # handlers and level come from utils/logger.setup_logging
 
 
 # -----------------------------
@@ -48,24 +73,30 @@ def _safe_get(ev: Dict[str, Any], key: str, default=None):
     return ev.get(key, default) if isinstance(ev, dict) else default
 
 
-def extract_core_features(events: List[Dict[str, Any]]) -> Dict[str, float]:
+class FeatureAccumulator:
     """
-    From a list of event dicts, extract numeric features used by the evaluator.
-    Expects events to be dictionaries with fields: 'type', 'payload' (optional dict), 'timestamp' (optional).
-    Returns a feature dict with raw counts / durations.
+    Single-pass feature extraction: add() one event at a time, features() at any point.
+    Keeps O(1) state apart from the set of distinct code versions, so it can consume
+    generators (e.g. data_processing.merge_event_streams) without materializing them.
     """
-    runs = 0
-    successful_runs = 0
-    edits = 0
-    ai_queries = 0
-    relevant_ai = 0
-    paste_events = 0
-    keystrokes = 0
-    unique_versions = set()
-    self_explanations = 0
-    timestamps = []
 
-    for ev in events:
+    def __init__(self, collect_timing: bool = False):
+        self.collect_timing = collect_timing
+        self._ts = array("d")
+        self._ks = array("d")
+        self.runs = 0
+        self.successful_runs = 0
+        self.edits = 0
+        self.ai_queries = 0
+        self.relevant_ai = 0
+        self.paste_events = 0
+        self.keystrokes = 0
+        self.unique_versions = set()
+        self.self_explanations = 0
+        self.t_min = None
+        self.t_max = None
+
+    def add(self, ev: Dict[str, Any]) -> None:
         ev_type = ev.get("event_type") or ev.get("type") or ev.get("event")  # support variations
         payload = ev.get("payload") or {}
         # payload may be JSON string
@@ -75,68 +106,108 @@ def extract_core_features(events: List[Dict[str, Any]]) -> Dict[str, float]:
             except (json.JSONDecodeError, ValueError):
                 payload = {"raw": payload}
 
+        ts = None
         if "timestamp" in ev:
             try:
-                timestamps.append(float(ev["timestamp"]))
+                ts = float(ev["timestamp"])
+                if self.t_min is None or ts < self.t_min:
+                    self.t_min = ts
+                if self.t_max is None or ts > self.t_max:
+                    self.t_max = ts
             except (ValueError, TypeError):
-                pass
+                ts = None
+        if self.collect_timing and ts is not None:
+            ks = payload.get("keystrokes") if isinstance(payload, dict) else None
+            self._ts.append(ts)
+            self._ks.append(ks if isinstance(ks, (int, float)) else 0)
 
         if ev_type == "run":
-            runs += 1
+            self.runs += 1
             # attempt to detect success flag
             meta = payload if isinstance(payload, dict) else {}
             result = meta.get("result") or meta.get("status")
             if isinstance(result, str) and result.lower() in ("pass", "ok", "success"):
-                successful_runs += 1
+                self.successful_runs += 1
             elif result is True:
-                successful_runs += 1
+                self.successful_runs += 1
         elif ev_type == "edit" or ev_type == "code_change":
-            edits += 1
+            self.edits += 1
             code_hash = payload.get("code_hash") if isinstance(payload, dict) else None
             if code_hash:
-                unique_versions.add(code_hash)
+                self.unique_versions.add(code_hash)
             # keystroke count optional
             ks = payload.get("keystrokes") if isinstance(payload, dict) else None
             if isinstance(ks, (int, float)):
-                keystrokes += int(ks)
+                self.keystrokes += int(ks)
         elif ev_type == "ai_query" or ev_type == "ai_interaction":
-            ai_queries += 1
+            self.ai_queries += 1
             meta = payload if isinstance(payload, dict) else {}
             if meta.get("relevant") or meta.get("used") or meta.get("response_snippet_used"):
-                relevant_ai += 1
+                self.relevant_ai += 1
         elif ev_type == "paste" or ev_type == "copy_paste":
-            paste_events += 1
+            self.paste_events += 1
         elif ev_type == "self_explanation" or ev_type == "explain":
-            self_explanations += 1
+            self.self_explanations += 1
         # other event types can be added as needed
 
-    duration_s = 0.0
-    if timestamps:
-        try:
-            duration_s = max(timestamps) - min(timestamps)
-            if duration_s < 0:
-                duration_s = 0.0
-        except (ValueError, TypeError):
-            duration_s = 0.0
-
-    features = {
-        "runs": runs,
-        "successful_runs": successful_runs,
-        "edits": edits,
-        "unique_versions": len(unique_versions),
-        "ai_queries": ai_queries,
-        "relevant_ai": relevant_ai,
-        "paste_events": paste_events,
-        "keystrokes": keystrokes,
-        "self_explanations": self_explanations,
-        "duration_s": duration_s,
-    }
-    return features
+    _STATE_FIELDS = ("runs", "successful_runs", "edits", "ai_queries", "relevant_ai", "paste_events",
+                     "keystrokes", "self_explanations", "t_min", "t_max")
+
+    def to_state(self) -> Dict[str, Any]:
+        """JSON-serializable counters (timing buffers are not included)."""
+        state = {name: getattr(self, name) for name in self._STATE_FIELDS}
+        state["unique_versions"] = sorted(self.unique_versions)
+        return state
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "FeatureAccumulator":
+        acc = cls()
+        for name in cls._STATE_FIELDS:
+            if name in state:
+                setattr(acc, name, state[name])
+        acc.unique_versions = set(state.get("unique_versions", ()))
+        return acc
+
+    def timing_arrays(self):
+        """Collected (timestamps, keystrokes) as NumPy views over the buffers."""
+        import numpy as np
+        return np.frombuffer(self._ts, dtype=np.float64), np.frombuffer(self._ks, dtype=np.float64)
+
+    def features(self) -> Dict[str, float]:
+        duration_s = 0.0
+        if self.t_min is not None:
+            duration_s = max(0.0, self.t_max - self.t_min)
+        return {
+            "runs": self.runs,
+            "successful_runs": self.successful_runs,
+            "edits": self.edits,
+            "unique_versions": len(self.unique_versions),
+            "ai_queries": self.ai_queries,
+            "relevant_ai": self.relevant_ai,
+            "paste_events": self.paste_events,
+            "keystrokes": self.keystrokes,
+            "self_explanations": self.self_explanations,
+            "duration_s": duration_s,
+        }
+
+
+@timed("extract_core_features")
+def extract_core_features(events: Iterable[Dict[str, Any]]) -> Dict[str, float]:
+    """
+    From a list (or any iterable) of event dicts, extract numeric features used by the evaluator.
+    Expects events to be dictionaries with fields: 'type', 'payload' (optional dict), 'timestamp' (optional).
+    Returns a feature dict with raw counts / durations.
+    """
+    acc = FeatureAccumulator()
+    for ev in events:
+        acc.add(ev)
+    return acc.features()
 
 
 # -----------------------------
 # Core metric computations (normalize 0..1)
 # -----------------------------
+@timed("compute_core_metrics")
 def compute_core_metrics(features: Dict[str, float]) -> Dict[str, float]:
     """
     Compute normalized core metrics from raw features.
@@ -146,6 +217,7 @@ def compute_core_metrics(features: Dict[str, float]) -> Dict[str, float]:
       - adaptability
       - ethical_ai_usage
     These formulas are heuristic and can be tuned or replaced later.
+    Optional code_* features (from code_analysis) refine reasoning and adaptability.
     """
 
     runs = features.get("runs", 0)
@@ -164,6 +236,9 @@ def compute_core_metrics(features: Dict[str, float]) -> Dict[str, float]:
     debugging_efficiency = max(0.0, min(1.0, debug_eff))
 
     # Adaptability: edits + unique versions normalized by session duration
+    # (active time excluding idle gaps when the timing stage provided it)
+    if features.get("active_time_s"):
+        duration_s = max(1.0, features["active_time_s"])
     edits_per_min = (edits / (duration_s / 60.0)) if duration_s > 0 else edits
     # normalize edits_per_min roughly: 0..10 -> 0..1
     adaptability = 1.0 - math.exp(-edits_per_min / 3.0)  # quick saturating transform
@@ -193,6 +268,16 @@ def compute_core_metrics(features: Dict[str, float]) -> Dict[str, float]:
     # clamp
     ethical_ai = max(0.0, min(1.0, ethical_ai))
 
+    # Code-quality signals (present when snapshots were analyzed, see code_analysis)
+    if "code_complexity" in features:
+        # functions and error handling are evidence of deliberate structure
+        structure = 0.5 * min(1.0, features.get("code_functions", 0) / 3.0) + 0.5 * features.get("code_error_handling", 0)
+        reasoning_score = max(0.0, min(1.0, 0.8 * reasoning_score + 0.2 * structure))
+        # very branchy or deeply nested code suggests patching rather than adapting
+        complexity_penalty = min(1.0, max(0.0, (features["code_complexity"] - 10) / 20.0))
+        nesting_penalty = min(1.0, max(0.0, (features.get("code_max_nesting", 0) - 4) / 4.0))
+        adaptability *= 1.0 - 0.3 * max(complexity_penalty, nesting_penalty)
+
     metrics = {
         "reasoning_score": round(reasoning_score, 3),
         "debugging_efficiency": round(debugging_efficiency, 3),
@@ -284,9 +369,10 @@ def _fallback_fuzzy_evaluate(metrics: Dict[str, float]) -> Tuple[float, str, Dic
 # -----------------------------
 # Top-level API
 # -----------------------------
-def evaluate_candidate_session(candidate_data: Dict[str, Any]) -> Dict[str, Any]:
+def evaluate_candidate_session(candidate_data: Union[Dict[str, Any], CandidateAttempt]) -> Dict[str, Any]:
     """
-    Main entry: accepts candidate_data with key 'events' (list).
+    Main entry: accepts candidate_data with key 'events' (list), or a CandidateAttempt
+    model whose snapshots / AI interactions are read directly as events.
     Returns:
       {
         "features": {...},
@@ -296,20 +382,66 @@ def evaluate_candidate_session(candidate_data: Dict[str, Any]) -> Dict[str, Any]
         "recommendations": [str,...]
       }
     """
-    events = candidate_data.get("events", []) if isinstance(candidate_data, dict) else []
+    if isinstance(candidate_data, CandidateAttempt):
+        from services.data_processing import attempt_to_events
+        events = attempt_to_events(candidate_data)
+    else:
+        events = candidate_data.get("events", []) if isinstance(candidate_data, dict) else []
+    if not isinstance(events, list):
+        return evaluate_event_stream(events)
     features = extract_core_features(events)
-    core_metrics = compute_core_metrics(features)
+    timing = analyze_timing(*timing_arrays(events)) if analyze_timing else None
+    return score_features(features, _run_ai_analysis(events), timing)
+
 
+@timed("evaluate_event_stream")
+def evaluate_event_stream(events: Iterable[Dict[str, Any]], timing: bool = False) -> Dict[str, Any]:
+    """
+    Evaluate a one-shot event iterator (e.g. a generator from
+    data_processing.merge_event_streams) in a single pass, feeding the feature
+    accumulator and the AI usage tracker side by side. With `timing=True` the
+    timestamps are also kept (8 bytes each) for the timing-dynamics stage.
+    """
+    acc = FeatureAccumulator(collect_timing=timing and analyze_timing is not None)
+    tracker = AIUsageTracker() if AIUsageTracker else None
+    for ev in events:
+        acc.add(ev)
+        if tracker:
+            tracker.update(ev)
+    ai_analysis = tracker.result() if tracker else None
+    timing_result = analyze_timing(*acc.timing_arrays()) if acc.collect_timing else None
+    return score_features(acc.features(), ai_analysis, timing_result)
+
+
+@timed("analyze_ai_usage")
+def _run_ai_analysis(events) -> Optional[Dict[str, Any]]:
     # AI usage analyzer (optional external)
-    ai_analysis = None
-    if analyze_ai_usage:
-        try:
-            ai_analysis = analyze_ai_usage(events)  # expected to return dict with more signals if implemented
-        except (AttributeError, TypeError, ValueError) as e:
-            logger.warning("analyze_ai_usage failed: %s", e)
-            ai_analysis = None
+    if not analyze_ai_usage:
+        return None
+    try:
+        return analyze_ai_usage(events)  # expected to return dict with more signals if implemented
+    except (AttributeError, TypeError, ValueError) as e:
+        logger.warning("analyze_ai_usage failed: %s", e)
+        return None
 
-    # Fuzzy scoring (prefer external if present)
+
+@timed("analyze_ai_usage")
+def _stream_ai_analysis(events: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    tracker = AIUsageTracker()
+    for ev in events:
+        tracker.update(ev)
+    return tracker.result()
+
+
+@timed("fuzzy_scoring")
+def fuzzy_score(core_metrics: Dict[str, float], features: Dict[str, Any]) -> Tuple[float, str, Optional[Dict[str, float]]]:
+    """
+    The fuzzy score behind final_score: an app-provided fuzzy_logic_engine when one is
+    installed (it reads the raw run / AI query / edit counts), otherwise the built-in
+    rule base over the core metrics. services.fuzzy_logic_engine is not used here: it
+    rebuilds its inputs from raw counts and would ignore the core metrics. Anything
+    scoring a session (e.g. scoring_profiles) goes through here so both scores agree.
+    """
     if fuzzy_evaluate:
         try:
             score, summary = fuzzy_evaluate(
@@ -317,12 +449,22 @@ def evaluate_candidate_session(candidate_data: Dict[str, Any]) -> Dict[str, Any]
                 ai_queries=int(features.get("ai_queries", 0)),
                 edits=int(features.get("edits", 0))
             )
-            fuzzy_membership = None
+            return score, summary, None
         except (AttributeError, TypeError, ValueError) as e:
             logger.exception("external fuzzy_evaluate failed, falling back: %s", e)
-            score, summary, fuzzy_membership = _fallback_fuzzy_evaluate(core_metrics)
-    else:
-        score, summary, fuzzy_membership = _fallback_fuzzy_evaluate(core_metrics)
+    return _fallback_fuzzy_evaluate(core_metrics)
+
+
+def score_features(features: Dict[str, float], ai_analysis: Optional[Dict[str, Any]],
+                    timing: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Turn extracted features into the full evaluation result (metrics, fuzzy score, recommendations)."""
+    if timing:
+        tf = timing["features"]
+        for key in ("active_time_s", "idle_time_s", "idle_ratio", "burst_count", "interval_cv"):
+            if key in tf:
+                features[key] = tf[key]
+    core_metrics = compute_core_metrics(features)
+    score, summary, fuzzy_membership = fuzzy_score(core_metrics, features)
 
     # Recommendations (simple heuristics)
     recs = []
@@ -345,8 +487,95 @@ def evaluate_candidate_session(candidate_data: Dict[str, Any]) -> Dict[str, Any]
             "ai_analysis": ai_analysis
         },
         "final_score": float(score),
-        "recommendations": recs
+        "recommendations": recs,
+        "anomaly_flags": list(timing["flags"]) if timing else []
+    }
+    return result
+
+
+# -----------------------------
+# Fast path: pre-aggregated BehaviorMetrics
+# -----------------------------
+def _has_behavior_aggregates(attempt: CandidateAttempt) -> bool:
+    bm = attempt.behavior_metrics
+    return bool(bm.total_runs or bm.unique_code_versions or bm.total_keystrokes)
+
+
+def features_from_behavior_metrics(attempt: CandidateAttempt) -> Dict[str, float]:
+    """
+    Build the extract_core_features() dict from the frontend's aggregated
+    BehaviorMetrics plus snapshot / interaction counts, without replaying events.
+    """
+    bm = attempt.behavior_metrics
+    interactions = attempt.ai_interactions
+    items = interactions.raw() if hasattr(interactions, "raw") else interactions
+    relevant_ai = 0
+    for ai in items:
+        used = ai.get("response_snippet_used") if isinstance(ai, dict) else ai.response_snippet_used
+        if used:
+            relevant_ai += 1
+    return {
+        "runs": bm.total_runs,
+        "successful_runs": min(bm.successful_runs, bm.total_runs),
+        "edits": len(attempt.code_snapshots),
+        "unique_versions": bm.unique_code_versions,
+        "ai_queries": len(interactions),
+        "relevant_ai": relevant_ai,
+        "paste_events": bm.copy_paste_events,
+        "keystrokes": bm.total_keystrokes or 0,
+        "self_explanations": 1 if attempt.self_explanation else 0,
+        "duration_s": float(duration_seconds(attempt.session_start, attempt.session_end)),
     }
+
+
+def _distinct_codes(attempt: CandidateAttempt) -> List[str]:
+    """Each distinct code version of an attempt, in order."""
+    if attempt.code_history is not None and len(attempt.code_history):
+        codes = list(attempt.code_history.iter_codes())
+    else:
+        codes = [attempt.snapshot_code(i) for i in range(len(attempt.code_snapshots))]
+    seen = set()
+    distinct = []
+    for code in codes:
+        if code is not None and code not in seen:
+            seen.add(code)
+            distinct.append(code)
+    return distinct
+
+
+@timed("evaluate_attempt")
+def evaluate_attempt(attempt: CandidateAttempt, record_submission: bool = False) -> Dict[str, Any]:
+    """
+    Evaluate a CandidateAttempt. Uses the pre-aggregated BehaviorMetrics when the
+    client sent them and only falls back to replaying snapshot/interaction events
+    when the aggregates are missing.
+
+    The final code is checked against the cohort of earlier submissions. Only a
+    submission (`record_submission=True`) is added to that cohort. A plain
+    evaluation leaves "plagiarism" out when other server workers hold part of the
+    cohort, since the answer would depend on which worker handled the request.
+    """
+    if _has_behavior_aggregates(attempt):
+        features = features_from_behavior_metrics(attempt)
+        ai_analysis = None
+        timing = None
+        source = "behavior_metrics"
+    else:
+        from services.data_processing import attempt_to_events
+        events = attempt_to_events(attempt)
+        features = extract_core_features(events)
+        ai_analysis = _run_ai_analysis(events)
+        timing = analyze_timing(*timing_arrays(events)) if analyze_timing else None
+        source = "events"
+
+    if analyze_snapshots:
+        features.update(aggregate_code_features(analyze_snapshots(_distinct_codes(attempt))))
+    result = score_features(features, ai_analysis, timing)
+    result["feature_source"] = source
+
+    if check_plagiarism and len(attempt.code_snapshots) and (record_submission or cohort_is_complete()):
+        result["plagiarism"] = check_plagiarism(attempt.candidate_id, attempt.task_id, attempt.snapshot_code(-1),
+                                                record=record_submission)
     return result
 
 
@@ -379,6 +608,23 @@ def evaluate_session_from_sqlite(db_path: str, session_id: str) -> Dict[str, Any
             conn.close()
 
 
+def evaluate_session_from_log(log_path: str) -> Dict[str, Any]:
+    """
+    Evaluate an archived session stored in the binary event log format (see services.event_log).
+    Features come straight from the memory-mapped fixed-width records. The AI usage tracker
+    is fed one event at a time, and only the payloads it reads (AI queries, pastes) are decoded.
+    """
+    from services.event_log import EventLogReader
+    with EventLogReader(log_path) as reader:
+        features = reader.extract_features()
+        ai_analysis = _stream_ai_analysis(reader.iter_events(payload_types=AIUsageTracker.PAYLOAD_TYPES)) \
+            if AIUsageTracker else None
+        timing = None
+        if analyze_timing and len(reader):
+            timing = analyze_timing(*reader.timing_arrays())
+    return score_features(features, ai_analysis, timing)
+
+
 # -----------------------------
 # If run as script, run a small smoke demo
 # -----------------------------
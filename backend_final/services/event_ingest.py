@@ -0,0 +1,184 @@
+"""
+event_ingest.py
+
+Incremental ingestion of NDJSON event streams (optionally gzip-compressed).
+
+Request bodies are consumed chunk by chunk: bytes are decompressed with a
+bounded output size, split into lines, parsed, normalized and flushed to
+the event store in fixed-size batches. Peak memory is bounded by the batch
+size and the longest line, not by the size of the session. A gzip body may
+hold several concatenated members (e.g. a client appending as it goes);
+each is decoded in turn.
+
+Functions:
+- ingest_ndjson_stream(session_id, chunks, gzipped=False) -> dict
+- store_events(session_id, batch) -> int
+- delete_session(session_id) -> int
+"""
+
+from typing import Any, AsyncIterator, Dict, List
+from collections import Counter
+import json
+import logging
+import zlib
+
+from starlette.concurrency import run_in_threadpool
+
+from services import blob_store, event_store
+from services.data_processing import VALID_EVENT_TYPES, normalize_event_types
+from utils.metrics import count
+
+logger = logging.getLogger("event_ingest")
+
+BATCH_SIZE = 500
+MAX_LINE_BYTES = 1 << 20  # a single event larger than 1 MiB is rejected
+_DECOMPRESS_CHUNK = 64 * 1024
+
+
+class IngestError(ValueError):
+    """Raised when the stream cannot be decoded (bad gzip, oversized line)."""
+
+
+def _new_decoder():
+    # 16 + MAX_WBITS accepts a gzip header; 32 + MAX_WBITS would also take zlib
+    return zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+
+class _GzipDecoder:
+    """Streaming decoder for a gzip body of one or more concatenated members."""
+
+    def __init__(self):
+        self._decoder = _new_decoder()
+        self._member_started = False
+
+    def decompress(self, chunk: bytes):
+        """Yield decompressed pieces of at most _DECOMPRESS_CHUNK bytes each."""
+        data = chunk
+        while data:
+            if not self._member_started:
+                # zero padding between / after members is allowed, as in the gzip module
+                data = data.lstrip(b"\x00")
+                if not data:
+                    return
+                self._member_started = True
+            try:
+                out = self._decoder.decompress(data, _DECOMPRESS_CHUNK)
+            except zlib.error as e:
+                raise IngestError(f"invalid gzip stream: {e}")
+            if out:
+                yield out
+            if self._decoder.eof:
+                # end of this member: whatever follows starts the next one
+                data = self._decoder.unused_data
+                self._decoder = _new_decoder()
+                self._member_started = False
+            else:
+                data = self._decoder.unconsumed_tail
+
+    def flush(self) -> bytes:
+        tail = self._decoder.flush()
+        if self._member_started and not self._decoder.eof:
+            raise IngestError("truncated gzip stream")
+        return tail
+
+
+def store_events(session_id: str, batch: List[Dict[str, Any]]) -> int:
+    # keep only content hashes in events; code text goes to the blob store once
+    with_code = [ev for ev in batch if isinstance(ev["payload"], dict) and isinstance(ev["payload"].get("code"), str)]
+    if with_code:
+        hashes = blob_store.put_many([ev["payload"]["code"] for ev in with_code])
+        for ev, code_hash in zip(with_code, hashes):
+            payload = dict(ev["payload"])
+            del payload["code"]
+            payload["code_hash"] = code_hash
+            ev["payload"] = payload
+    return event_store.append_events(session_id, batch)
+
+
+def delete_session(session_id: str) -> int:
+    """Delete a session's events and give back the blob references they held."""
+    refs = Counter(ev["payload"]["code_hash"] for ev in event_store.iter_events(session_id)
+                   if isinstance(ev["payload"], dict) and ev["payload"].get("code_hash"))
+    deleted = event_store.delete_events(session_id)
+    for code_hash, n in refs.items():
+        blob_store.release(code_hash, n)
+    return deleted
+
+
+async def ingest_ndjson_stream(
+    session_id: str,
+    chunks: AsyncIterator[bytes],
+    gzipped: bool = False,
+    batch_size: int = BATCH_SIZE,
+) -> Dict[str, Any]:
+    """
+    Parse an NDJSON byte stream and append its events to `session_id`.
+    Blank lines are skipped; lines that are not JSON objects or carry an
+    unknown event type are counted as rejected rather than failing the upload.
+    """
+    decoder = _GzipDecoder() if gzipped else None
+    pending = b""
+    batch: List[Dict[str, Any]] = []
+    accepted = 0
+    rejected = 0
+    lines = 0
+
+    async def flush():
+        nonlocal accepted, batch
+        if batch:
+            accepted += await run_in_threadpool(store_events, session_id, batch)
+            batch = []
+
+    debug = logger.isEnabledFor(logging.DEBUG)
+
+    def parse_line(raw: bytes):
+        nonlocal rejected, lines
+        raw = raw.strip()
+        if not raw:
+            return
+        lines += 1
+        try:
+            ev = json.loads(raw)
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            rejected += 1
+            if debug:
+                logger.debug("rejected line %d of session %s: %s", lines, session_id, e)
+            return
+        if not isinstance(ev, dict):
+            rejected += 1
+            if debug:
+                logger.debug("rejected line %d of session %s: not an object", lines, session_id)
+            return
+        normalized = normalize_event_types([ev])[0]
+        if normalized["event_type"] not in VALID_EVENT_TYPES:
+            rejected += 1
+            if debug:
+                logger.debug("rejected line %d of session %s: unknown event type %r", lines, session_id, normalized["event_type"])
+            return
+        batch.append(normalized)
+
+    async for chunk in chunks:
+        if not chunk:
+            continue
+        pieces = decoder.decompress(chunk) if decoder else (chunk,)
+        for piece in pieces:
+            pending += piece
+            *complete, pending = pending.split(b"\n")
+            for raw in complete:
+                parse_line(raw)
+            if len(pending) > MAX_LINE_BYTES:
+                raise IngestError(f"line exceeds {MAX_LINE_BYTES} bytes")
+            if len(batch) >= batch_size:
+                await flush()
+
+    if decoder:
+        tail = decoder.flush()
+        if tail:
+            pending += tail
+    parse_line(pending)
+    await flush()
+
+    logger.info("ingested session=%s lines=%d accepted=%d rejected=%d", session_id, lines, accepted, rejected)
+    count("pipeline_events_total", accepted + rejected, stage="ingest")
+    count("pipeline_events_dropped_total", rejected, stage="ingest")
+    return {"session_id": session_id, "lines": lines, "accepted": accepted, "rejected": rejected}
@@ -0,0 +1,322 @@
+"""
+event_log.py
+
+Compact binary, append-only event log with a memory-mapped reader.
+
+Layout (all little-endian):
+- `<path>`       : 16-byte header followed by fixed-width 40-byte records
+- `<path>.blob`  : side section holding the JSON payload of each event
+
+Each record carries everything the evaluator needs (type, timestamp, run
+success / AI relevance flags, keystrokes and a 64-bit hash of the code
+version), so features can be computed straight from the mapped records
+without decoding a single payload. Payloads are only read on demand.
+An event without a usable timestamp is stored with NaN there: it is left
+out of the session duration and the timing analysis, and read back
+without a "timestamp" key.
+
+Classes / functions:
+- EventLogWriter(path)            append events to a log
+- EventLogReader(path)            mmap a log; iterate events or get NumPy column views
+- write_event_log(path, events)   convenience wrapper around EventLogWriter
+- convert_sqlite_session(db_path, session_id, log_path)
+"""
+
+from typing import Any, Dict, Iterable, Iterator, Optional
+import hashlib
+import json
+import math
+import mmap
+import os
+import struct
+
+from utils.lazy import lazy_import
+
+np = lazy_import("numpy")  # optional; without it the reader falls back to struct unpacking
+
+MAGIC = b"FHEVLOG1"
+VERSION = 1
+HEADER = struct.Struct("<8sHHI")  # magic, version, record size, reserved
+RECORD = struct.Struct("<BBHIdQQII")  # type, flags, reserved, value, timestamp, version_hash, blob_off, blob_len, pad
+
+EVENT_CODES = {"run": 1, "edit": 2, "ai_query": 3, "paste": 4, "self_explanation": 5}
+EVENT_NAMES = {code: name for name, code in EVENT_CODES.items()}
+
+# accept the same aliases as evaluation_engine.extract_core_features
+_ALIASES = {"code_change": "edit", "ai_interaction": "ai_query", "copy_paste": "paste", "explain": "self_explanation"}
+
+FLAG_SUCCESS = 0x01      # run event reported pass/ok/success
+FLAG_AI_RELEVANT = 0x02  # ai_query marked relevant/used
+FLAG_HAS_PAYLOAD = 0x04  # a payload blob is stored for this record
+MISSING_TIMESTAMP = float("nan")
+
+if np is not None:
+    RECORD_DTYPE = np.dtype([
+        ("type", "u1"),
+        ("flags", "u1"),
+        ("reserved", "<u2"),
+        ("value", "<u4"),
+        ("timestamp", "<f8"),
+        ("version_hash", "<u8"),
+        ("blob_offset", "<u8"),
+        ("blob_length", "<u4"),
+        ("pad", "<u4"),
+    ])
+    assert RECORD_DTYPE.itemsize == RECORD.size
+else:
+    RECORD_DTYPE = None
+
+
+def _version_hash(code_hash: Any) -> int:
+    if not code_hash:
+        return 0
+    digest = hashlib.blake2b(str(code_hash).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") or 1
+
+
+def _encode_record(ev: Dict[str, Any], blob_offset: int, blob: bytes) -> bytes:
+    ev_type = ev.get("event_type") or ev.get("type") or ev.get("event")
+    ev_type = _ALIASES.get(ev_type, ev_type)
+    payload = ev.get("payload") or {}
+    if isinstance(payload, str):
+        try:
+            payload = json.loads(payload)
+        except (json.JSONDecodeError, ValueError):
+            payload = {"raw": payload}
+    meta = payload if isinstance(payload, dict) else {}
+
+    flags = FLAG_HAS_PAYLOAD if blob else 0
+    value = 0
+    vhash = 0
+    if ev_type == "run":
+        result = meta.get("result") or meta.get("status")
+        if (isinstance(result, str) and result.lower() in ("pass", "ok", "success")) or result is True:
+            flags |= FLAG_SUCCESS
+    elif ev_type == "edit":
+        vhash = _version_hash(meta.get("code_hash"))
+        ks = meta.get("keystrokes")
+        if isinstance(ks, (int, float)):
+            value = max(0, min(0xFFFFFFFF, int(ks)))
+    elif ev_type == "ai_query":
+        if meta.get("relevant") or meta.get("used") or meta.get("response_snippet_used"):
+            flags |= FLAG_AI_RELEVANT
+
+    try:
+        ts = float(ev["timestamp"]) if ev.get("timestamp") is not None else MISSING_TIMESTAMP
+    except (TypeError, ValueError):
+        ts = MISSING_TIMESTAMP
+    return RECORD.pack(EVENT_CODES.get(ev_type, 0), flags, 0, value, ts, vhash, blob_offset, len(blob), 0)
+
+
+class EventLogWriter:
+    """Appends events to a binary log. Safe to reopen: existing records are kept."""
+
+    def __init__(self, path: str):
+        self.path = path
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._records = open(path, "ab")
+        self._blobs = open(path + ".blob", "ab")
+        if new:
+            self._records.write(HEADER.pack(MAGIC, VERSION, RECORD.size, 0))
+        self._blob_offset = self._blobs.tell()
+
+    def append(self, ev: Dict[str, Any]) -> None:
+        payload = ev.get("payload")
+        blob = json.dumps(payload, separators=(",", ":")).encode("utf-8") if payload else b""
+        self._records.write(_encode_record(ev, self._blob_offset, blob))
+        if blob:
+            self._blobs.write(blob)
+            self._blob_offset += len(blob)
+
+    def extend(self, events: Iterable[Dict[str, Any]]) -> int:
+        n = 0
+        for ev in events:
+            self.append(ev)
+            n += 1
+        return n
+
+    def close(self) -> None:
+        # blobs first, so a record never points past the end of the blob file
+        self._blobs.close()
+        self._records.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class EventLogReader:
+    """Memory-maps a log written by EventLogWriter."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._rec_file = open(path, "rb")
+        self._rec_map = None
+        self._count = 0
+        # a writer that has not flushed yet leaves an empty file, which mmap refuses: no events
+        if os.fstat(self._rec_file.fileno()).st_size > 0:
+            self._rec_map = mmap.mmap(self._rec_file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, rec_size, _ = HEADER.unpack_from(self._rec_map, 0)
+            if magic != MAGIC or rec_size != RECORD.size:
+                self.close()
+                raise ValueError(f"{path} is not an event log (version {VERSION})")
+            self._count = (len(self._rec_map) - HEADER.size) // RECORD.size
+
+        self._blob_file = None
+        self._blob_map = None
+        blob_path = path + ".blob"
+        if os.path.exists(blob_path) and os.path.getsize(blob_path) > 0:
+            self._blob_file = open(blob_path, "rb")
+            self._blob_map = mmap.mmap(self._blob_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self) -> None:
+        for m in (self._rec_map, getattr(self, "_blob_map", None)):
+            if m is not None:
+                try:
+                    m.close()
+                except BufferError:
+                    # a NumPy view still references the map; it is released with the view
+                    pass
+        for f in (self._rec_file, getattr(self, "_blob_file", None)):
+            if f is not None:
+                f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def columns(self):
+        """Zero-copy NumPy structured view over all records (fields as in RECORD_DTYPE)."""
+        if np is None:
+            raise RuntimeError("NumPy is required for column views")
+        if self._rec_map is None:
+            return np.zeros(0, dtype=RECORD_DTYPE)
+        return np.frombuffer(self._rec_map, dtype=RECORD_DTYPE, count=self._count, offset=HEADER.size)
+
+    def timing_arrays(self):
+        """(timestamps, values) of the records that have a timestamp, for timing_analysis."""
+        cols = self.columns()
+        known = ~np.isnan(cols["timestamp"])
+        return cols["timestamp"][known], cols["value"][known]
+
+    def payload(self, blob_offset: int, blob_length: int) -> Dict[str, Any]:
+        if not blob_length or self._blob_map is None:
+            return {}
+        raw = self._blob_map[blob_offset:blob_offset + blob_length]
+        try:
+            return json.loads(raw)
+        except (json.JSONDecodeError, ValueError):
+            return {"raw": raw.decode("utf-8", "replace")}
+
+    def iter_events(self, decode_payload: bool = True,
+                    payload_types: Optional[Iterable[str]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield event dicts in log order. Payloads are only parsed when requested, and
+        with `payload_types` only for events of those types (the rest get {}).
+        """
+        decode_codes = None if payload_types is None else {EVENT_CODES[t] for t in payload_types if t in EVENT_CODES}
+        for rec in self._iter_records():
+            ev_code, flags, _, _, ts, _, off, length, _ = rec
+            ev = {"event_type": EVENT_NAMES.get(ev_code, "unknown")}
+            if not math.isnan(ts):
+                ev["timestamp"] = ts
+            decode = decode_payload and (decode_codes is None or ev_code in decode_codes)
+            ev["payload"] = self.payload(off, length) if decode else {}
+            yield ev
+
+    def _iter_records(self):
+        if self._rec_map is None:
+            return
+        end = HEADER.size + self._count * RECORD.size
+        with memoryview(self._rec_map) as view:
+            yield from RECORD.iter_unpack(view[HEADER.size:end])
+
+    __iter__ = iter_events
+
+    def extract_features(self) -> Dict[str, float]:
+        """
+        Same feature dict as evaluation_engine.extract_core_features, computed from the
+        fixed-width records only (no payload decoding).
+        """
+        if self._count == 0:
+            return {
+                "runs": 0, "successful_runs": 0, "edits": 0, "unique_versions": 0,
+                "ai_queries": 0, "relevant_ai": 0, "paste_events": 0, "keystrokes": 0,
+                "self_explanations": 0, "duration_s": 0.0,
+            }
+        if np is None:
+            return self._extract_features_scalar()
+
+        cols = self.columns()
+        types = cols["type"]
+        flags = cols["flags"]
+        is_run = types == EVENT_CODES["run"]
+        is_edit = types == EVENT_CODES["edit"]
+        is_ai = types == EVENT_CODES["ai_query"]
+        hashes = cols["version_hash"][is_edit]
+        ts = cols["timestamp"]
+        ts = ts[~np.isnan(ts)]
+        return {
+            "runs": int(is_run.sum()),
+            "successful_runs": int((is_run & ((flags & FLAG_SUCCESS) != 0)).sum()),
+            "edits": int(is_edit.sum()),
+            "unique_versions": int(np.unique(hashes[hashes != 0]).size),
+            "ai_queries": int(is_ai.sum()),
+            "relevant_ai": int((is_ai & ((flags & FLAG_AI_RELEVANT) != 0)).sum()),
+            "paste_events": int((types == EVENT_CODES["paste"]).sum()),
+            "keystrokes": int(cols["value"][is_edit].sum(dtype=np.int64)),
+            "self_explanations": int((types == EVENT_CODES["self_explanation"]).sum()),
+            "duration_s": max(0.0, float(ts.max() - ts.min())) if ts.size else 0.0,
+        }
+
+    def _extract_features_scalar(self) -> Dict[str, float]:
+        counts = {code: 0 for code in EVENT_NAMES}
+        successful = relevant = keystrokes = 0
+        versions = set()
+        t_min = t_max = None
+        for rec in self._iter_records():
+            ev_code, flags, _, value, ts, vhash, _, _, _ = rec
+            if ev_code in counts:
+                counts[ev_code] += 1
+            if ev_code == EVENT_CODES["run"] and flags & FLAG_SUCCESS:
+                successful += 1
+            elif ev_code == EVENT_CODES["edit"]:
+                keystrokes += value
+                if vhash:
+                    versions.add(vhash)
+            elif ev_code == EVENT_CODES["ai_query"] and flags & FLAG_AI_RELEVANT:
+                relevant += 1
+            if math.isnan(ts):
+                continue
+            t_min = ts if t_min is None else min(t_min, ts)
+            t_max = ts if t_max is None else max(t_max, ts)
+        return {
+            "runs": counts[EVENT_CODES["run"]],
+            "successful_runs": successful,
+            "edits": counts[EVENT_CODES["edit"]],
+            "unique_versions": len(versions),
+            "ai_queries": counts[EVENT_CODES["ai_query"]],
+            "relevant_ai": relevant,
+            "paste_events": counts[EVENT_CODES["paste"]],
+            "keystrokes": keystrokes,
+            "self_explanations": counts[EVENT_CODES["self_explanation"]],
+            "duration_s": max(0.0, (t_max or 0.0) - (t_min or 0.0)),
+        }
+
+
+def write_event_log(path: str, events: Iterable[Dict[str, Any]]) -> int:
+    with EventLogWriter(path) as writer:
+        return writer.extend(events)
+
+
+def convert_sqlite_session(db_path: str, session_id: str, log_path: str) -> int:
+    """Archive one session from an events SQLite db (see event_store) into a binary log."""
+    from services import event_store
+    return write_event_log(log_path, event_store.iter_events(session_id, db_path=db_path))
@@ -0,0 +1,105 @@
+"""
+event_store.py
+
+Append-only per-session event storage backed by SQLite.
+
+The table layout matches what evaluation_engine.evaluate_session_from_sqlite
+expects (events: session_id, event_type, payload, timestamp), so sessions
+ingested here can be evaluated directly from the same database file.
+
+Functions:
+- append_events(session_id: str, events: list) -> int
+- iter_events(session_id: str) -> iterator of event dicts
+- count_events(session_id: str) -> int
+- delete_events(session_id: str) -> int
+"""
+
+from typing import Any, Dict, Iterator, List, Optional
+import json
+import os
+import sqlite3
+
+DB_PATH = os.environ.get("EVENT_STORE_DB", "event_store.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    event_type TEXT NOT NULL,
+    payload TEXT,
+    timestamp REAL
+);
+CREATE INDEX IF NOT EXISTS idx_events_session_ts ON events (session_id, timestamp);
+"""
+
+_initialized = set()
+
+
+def _connect(db_path: Optional[str] = None) -> sqlite3.Connection:
+    path = db_path or DB_PATH
+    conn = sqlite3.connect(path)
+    if path not in _initialized:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        _initialized.add(path)
+    return conn
+
+
+def append_events(session_id: str, events: List[Dict[str, Any]], db_path: Optional[str] = None) -> int:
+    """Append a batch of normalized events to a session in one transaction."""
+    if not events:
+        return 0
+    rows = [
+        (session_id, ev.get("event_type"), json.dumps(ev.get("payload") or {}), ev.get("timestamp"))
+        for ev in events
+    ]
+    conn = _connect(db_path)
+    try:
+        with conn:
+            conn.executemany(
+                "INSERT INTO events (session_id, event_type, payload, timestamp) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+    finally:
+        conn.close()
+    return len(rows)
+
+
+def iter_events(session_id: str, db_path: Optional[str] = None, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+    """Yield a session's events ordered by timestamp without loading them all at once."""
+    conn = _connect(db_path)
+    try:
+        cur = conn.execute(
+            "SELECT event_type, payload, timestamp FROM events WHERE session_id = ? ORDER BY timestamp, seq",
+            (session_id,),
+        )
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            for ev_type, payload, timestamp in rows:
+                try:
+                    payload_obj = json.loads(payload) if payload else {}
+                except (json.JSONDecodeError, ValueError):
+                    payload_obj = {"raw": payload}
+                yield {"event_type": ev_type, "payload": payload_obj, "timestamp": timestamp}
+    finally:
+        conn.close()
+
+
+def count_events(session_id: str, db_path: Optional[str] = None) -> int:
+    conn = _connect(db_path)
+    try:
+        row = conn.execute("SELECT COUNT(*) FROM events WHERE session_id = ?", (session_id,)).fetchone()
+        return int(row[0]) if row else 0
+    finally:
+        conn.close()
+
+
+def delete_events(session_id: str, db_path: Optional[str] = None) -> int:
+    conn = _connect(db_path)
+    try:
+        with conn:
+            return conn.execute("DELETE FROM events WHERE session_id = ?", (session_id,)).rowcount
+    finally:
+        conn.close()
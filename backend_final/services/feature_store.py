@@ -0,0 +1,208 @@
+"""
+feature_store.py
+
+Persists per-session evaluation features so sessions can be re-scored
+without replaying raw events.
+
+Stores the output of extract_core_features / compute_core_metrics for each
+session together with the last profile score, and the per-task scoring
+profiles themselves (see scoring_profiles). Backed by SQLite.
+
+Functions:
+- save_features(session_id, candidate_id, task_id, features, core_metrics) -> None
+- iter_features(task_id=None) -> iterator of rows
+- update_scores(rows) -> int
+- save_profile(task_id, profile) / load_profile(task_id)
+- candidate_scores(candidate_id) -> list of (task_id, final_score)
+- task_score_stats() -> {task_id: (sessions, mean final_score)}
+- save_item_params(rows) / load_item_params() (IRT calibration, see adaptive_selection)
+- item_params_version() -> (last calibration time, rows), changes whenever any worker calibrates
+"""
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import json
+import os
+import sqlite3
+import time
+
+DB_PATH = os.environ.get("FEATURE_STORE_DB", "feature_store.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS session_features (
+    session_id TEXT PRIMARY KEY,
+    candidate_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    features TEXT NOT NULL,
+    core_metrics TEXT NOT NULL,
+    profile TEXT,
+    final_score REAL,
+    updated_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_session_features_task ON session_features (task_id);
+CREATE INDEX IF NOT EXISTS idx_session_features_candidate ON session_features (candidate_id);
+CREATE TABLE IF NOT EXISTS scoring_profiles (
+    task_id TEXT PRIMARY KEY,
+    profile TEXT NOT NULL,
+    updated_at REAL
+);
+CREATE TABLE IF NOT EXISTS irt_items (
+    task_id TEXT PRIMARY KEY,
+    a REAL NOT NULL,
+    b REAL NOT NULL,
+    responses INTEGER NOT NULL,
+    updated_at REAL
+);
+"""
+
+_initialized = set()
+
+
+def _connect(db_path: Optional[str] = None) -> sqlite3.Connection:
+    path = db_path or DB_PATH
+    conn = sqlite3.connect(path)
+    if path not in _initialized:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        _initialized.add(path)
+    return conn
+
+
+def save_features(session_id: str, candidate_id: str, task_id: str,
+                  features: Dict[str, Any], core_metrics: Dict[str, Any],
+                  final_score: Optional[float] = None, profile: Optional[str] = None,
+                  db_path: Optional[str] = None) -> None:
+    conn = _connect(db_path)
+    try:
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO session_features "
+                "(session_id, candidate_id, task_id, features, core_metrics, profile, final_score, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (session_id, candidate_id, task_id, json.dumps(features), json.dumps(core_metrics),
+                 profile, final_score, time.time()),
+            )
+    finally:
+        conn.close()
+
+
+def iter_features(task_id: Optional[str] = None, db_path: Optional[str] = None,
+                  batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+    """Stored rows (optionally for one task) with features / core_metrics decoded."""
+    conn = _connect(db_path)
+    try:
+        if task_id is None:
+            cur = conn.execute("SELECT session_id, candidate_id, task_id, features, core_metrics, profile, final_score FROM session_features")
+        else:
+            cur = conn.execute(
+                "SELECT session_id, candidate_id, task_id, features, core_metrics, profile, final_score "
+                "FROM session_features WHERE task_id = ?", (task_id,))
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            for session_id, candidate_id, tid, features, core_metrics, profile, final_score in rows:
+                yield {
+                    "session_id": session_id,
+                    "candidate_id": candidate_id,
+                    "task_id": tid,
+                    "features": json.loads(features),
+                    "core_metrics": json.loads(core_metrics),
+                    "profile": profile,
+                    "final_score": final_score,
+                }
+    finally:
+        conn.close()
+
+
+def update_scores(rows: Iterable[Tuple[str, float, str]], db_path: Optional[str] = None) -> int:
+    """Bulk-write (session_id, final_score, profile_name) in one transaction."""
+    now = time.time()
+    params = [(score, profile, now, session_id) for session_id, score, profile in rows]
+    conn = _connect(db_path)
+    try:
+        with conn:
+            conn.executemany(
+                "UPDATE session_features SET final_score = ?, profile = ?, updated_at = ? WHERE session_id = ?",
+                params,
+            )
+    finally:
+        conn.close()
+    return len(params)
+
+
+def save_profile(task_id: str, profile: Dict[str, Any], db_path: Optional[str] = None) -> None:
+    conn = _connect(db_path)
+    try:
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO scoring_profiles (task_id, profile, updated_at) VALUES (?, ?, ?)",
+                (task_id, json.dumps(profile), time.time()),
+            )
+    finally:
+        conn.close()
+
+
+def load_profile(task_id: str, db_path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    conn = _connect(db_path)
+    try:
+        row = conn.execute("SELECT profile FROM scoring_profiles WHERE task_id = ?", (task_id,)).fetchone()
+    finally:
+        conn.close()
+    return json.loads(row[0]) if row else None
+
+
+def candidate_scores(candidate_id: str, db_path: Optional[str] = None) -> List[Tuple[str, float]]:
+    """(task_id, final_score) of every scored session of a candidate."""
+    conn = _connect(db_path)
+    try:
+        return conn.execute(
+            "SELECT task_id, final_score FROM session_features WHERE candidate_id = ? AND final_score IS NOT NULL",
+            (candidate_id,)).fetchall()
+    finally:
+        conn.close()
+
+
+def task_score_stats(db_path: Optional[str] = None) -> Dict[str, Tuple[int, float]]:
+    """Per task: number of scored sessions and their mean final_score, in one query."""
+    conn = _connect(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT task_id, COUNT(*), AVG(final_score) FROM session_features "
+            "WHERE final_score IS NOT NULL GROUP BY task_id").fetchall()
+    finally:
+        conn.close()
+    return {task_id: (n, mean) for task_id, n, mean in rows}
+
+
+def save_item_params(rows: Iterable[Tuple[str, float, float, int]], db_path: Optional[str] = None) -> int:
+    """Bulk-write (task_id, a, b, responses) calibration rows in one transaction."""
+    now = time.time()
+    params = [(task_id, a, b, n, now) for task_id, a, b, n in rows]
+    conn = _connect(db_path)
+    try:
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO irt_items (task_id, a, b, responses, updated_at) VALUES (?, ?, ?, ?, ?)",
+                params,
+            )
+    finally:
+        conn.close()
+    return len(params)
+
+
+def item_params_version(db_path: Optional[str] = None) -> Tuple[Optional[float], int]:
+    conn = _connect(db_path)
+    try:
+        row = conn.execute("SELECT MAX(updated_at), COUNT(*) FROM irt_items").fetchone()
+    finally:
+        conn.close()
+    return row[0], row[1]
+
+
+def load_item_params(db_path: Optional[str] = None) -> Dict[str, Tuple[float, float]]:
+    conn = _connect(db_path)
+    try:
+        rows = conn.execute("SELECT task_id, a, b FROM irt_items").fetchall()
+    finally:
+        conn.close()
+    return {task_id: (a, b) for task_id, a, b in rows}
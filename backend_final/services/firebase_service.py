@@ -1,17 +1,31 @@
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from starlette.concurrency import run_in_threadpool
 from config import firebase_config
+from models.candidate_model import CandidateAttempt
+from utils.metrics import span, timed
 import time
 
-# Ensure firebase initialized (safe to call repeatedly)
-firebase_config.init_app()
-_db = getattr(firebase_config, "db", None)
+# the client is created on first use (firebase_config.get_db), not at import
 
+# The *_async variants are for async routes: they await the AsyncClient
+# (firebase_config.get_async_db) so a request holds no thread while Firestore
+# answers. Without an async client they run the sync function on the
+# threadpool, or inline in mock mode where there is no I/O.
 
+
+async def _sync_fallback(fn: Callable, *args):
+    if firebase_config.get_db() is None:
+        return fn(*args)
+    return await run_in_threadpool(fn, *args)
+
+
+@timed("firestore.list_test_cases_for_question")
 def list_test_cases_for_question(question_id: str) -> List[Dict[str, Any]]:
     """Return test cases for a question from Firestore (collection: test_cases)."""
-    if not _db:
+    db = firebase_config.get_db()
+    if not db:
         return []
-    coll = _db.collection("test_cases")
+    coll = db.collection("test_cases")
     docs = coll.where("questionId", "==", question_id).stream()
     result = []
     for d in docs:
@@ -21,48 +35,288 @@ def list_test_cases_for_question(question_id: str) -> List[Dict[str, Any]]:
     return result
 
 
+@timed("firestore.save_evaluation_result")
 def save_evaluation_result(result: Dict[str, Any]) -> Optional[str]:
-    if not _db:
+    db = firebase_config.get_db()
+    if not db:
         return None
-    ref = _db.collection("evaluationResults").document()
+    ref = db.collection("evaluationResults").document()
     result["createdAt"] = time.time()
     ref.set(result)
     return ref.id
 
 
+@timed("firestore.save_metric")
 def save_metric(metric: Dict[str, Any]) -> Optional[str]:
-    if not _db:
+    db = firebase_config.get_db()
+    if not db:
         return None
-    ref = _db.collection("metrics").document()
+    ref = db.collection("metrics").document()
     metric["createdAt"] = time.time()
     ref.set(metric)
     return ref.id
 
 
+@timed("firestore.save_ai_analysis")
 def save_ai_analysis(analysis: Dict[str, Any]) -> Optional[str]:
-    if not _db:
+    db = firebase_config.get_db()
+    if not db:
         return None
-    ref = _db.collection("aiAnalysis").document()
+    ref = db.collection("aiAnalysis").document()
     analysis["generatedAt"] = time.time()
     ref.set(analysis)
     return ref.id
 
 
+@timed("firestore.save_gpt_prompt")
 def save_gpt_prompt(prompt: Dict[str, Any]) -> Optional[str]:
-    if not _db:
+    db = firebase_config.get_db()
+    if not db:
         return None
-    ref = _db.collection("gptPrompts").document()
+    ref = db.collection("gptPrompts").document()
     prompt["createdAt"] = time.time()
     ref.set(prompt)
     return ref.id
 
 
+@timed("firestore.get_question")
 def get_question(question_id: str) -> Optional[Dict[str, Any]]:
-    if not _db:
+    db = firebase_config.get_db()
+    if not db:
+        return None
+    ref = db.collection("questions").document(question_id).get()
+    if not ref.exists:
+        return None
+    d = ref.to_dict()
+    d["id"] = ref.id
+    return d
+
+
+@timed("firestore.list_tasks")
+def list_tasks() -> List[Dict[str, Any]]:
+    """All task documents (collection: tasks); the catalog indexes them in memory."""
+    db = firebase_config.get_db()
+    if not db:
+        return []
+    result = []
+    for d in db.collection("tasks").stream():
+        doc = d.to_dict()
+        doc.setdefault("id", d.id)
+        result.append(doc)
+    return result
+
+
+@timed("firestore.save_evaluation")
+def save_evaluation(candidate_id: str, task_id: str, scores: Dict[str, Any], summary: Dict[str, Any]) -> Optional[str]:
+    """Store the evaluation of one candidate/task pair (collection: evaluations)."""
+    db = firebase_config.get_db()
+    if not db:
+        return None
+    doc_id = f"{candidate_id}_{task_id}"
+    db.collection("evaluations").document(doc_id).set({
+        "candidate_id": candidate_id,
+        "task_id": task_id,
+        "scores": scores,
+        "summary": summary,
+        "createdAt": time.time(),
+    })
+    return doc_id
+
+
+@timed("firestore.get_evaluation")
+def get_evaluation(candidate_id: str, task_id: str) -> Optional[Dict[str, Any]]:
+    db = firebase_config.get_db()
+    if not db:
         return None
-    ref = _db.collection("questions").document(question_id).get()
+    ref = db.collection("evaluations").document(f"{candidate_id}_{task_id}").get()
     if not ref.exists:
         return None
     d = ref.to_dict()
     d["id"] = ref.id
     return d
+
+
+@timed("firestore.list_all_evaluations")
+def list_all_evaluations() -> List[Dict[str, Any]]:
+    db = firebase_config.get_db()
+    if not db:
+        return []
+    result = []
+    for d in db.collection("evaluations").stream():
+        doc = d.to_dict()
+        doc["id"] = d.id
+        result.append(doc)
+    return result
+
+
+def iter_evaluation_pages(page_size: int = 200, task_id: Optional[str] = None) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Stored evaluations (optionally of one task) in document-id order, one page
+    per query: each page resumes after the last document of the previous one
+    (a storage cursor), so memory is bounded by page_size however many exist.
+    """
+    db = firebase_config.get_db()
+    if not db:
+        return
+    query = db.collection("evaluations")
+    if task_id:
+        query = query.where("task_id", "==", task_id)
+    query = query.order_by("__name__").limit(page_size)
+    last = None
+    while True:
+        page_query = query.start_after(last) if last is not None else query
+        with span("firestore.iter_evaluation_pages"):
+            snaps = list(page_query.stream())
+        if not snaps:
+            return
+        page = []
+        for d in snaps:
+            doc = d.to_dict()
+            doc["id"] = d.id
+            page.append(doc)
+        last = snaps[-1]
+        yield page
+        if len(snaps) < page_size:
+            return
+
+
+@timed("firestore.save_candidate_attempt")
+def save_candidate_attempt(attempt: CandidateAttempt) -> Optional[str]:
+    """Persist an attempt with snapshot code delta-compressed into `code_history`."""
+    db = firebase_config.get_db()
+    if not db:
+        return None
+    attempt.compact_code_history()
+    doc_id = f"{attempt.candidate_id}_{attempt.task_id}"
+    data = attempt.dict(exclude_none=True)
+    data["createdAt"] = time.time()
+    db.collection("candidateAttempts").document(doc_id).set(data)
+    return doc_id
+
+
+@timed("firestore.get_candidate_attempt")
+def get_candidate_attempt(candidate_id: str, task_id: str) -> Optional[CandidateAttempt]:
+    db = firebase_config.get_db()
+    if not db:
+        return None
+    ref = db.collection("candidateAttempts").document(f"{candidate_id}_{task_id}").get()
+    if not ref.exists:
+        return None
+    d = ref.to_dict()
+    d.pop("createdAt", None)
+    # validated when it was saved; skip re-validating the snapshot lists on load
+    return CandidateAttempt.from_trusted(d)
+
+
+# ------------------------------------------------
+# Async variants
+# ------------------------------------------------
+@timed("firestore.list_test_cases_for_question_async")
+async def list_test_cases_for_question_async(question_id: str) -> List[Dict[str, Any]]:
+    adb = firebase_config.get_async_db()
+    if adb is None:
+        return await _sync_fallback(list_test_cases_for_question, question_id)
+    result = []
+    async for d in adb.collection("test_cases").where("questionId", "==", question_id).stream():
+        doc = d.to_dict()
+        doc["id"] = d.id
+        result.append(doc)
+    return result
+
+
+@timed("firestore.get_question_async")
+async def get_question_async(question_id: str) -> Optional[Dict[str, Any]]:
+    adb = firebase_config.get_async_db()
+    if adb is None:
+        return await _sync_fallback(get_question, question_id)
+    ref = await adb.collection("questions").document(question_id).get()
+    if not ref.exists:
+        return None
+    d = ref.to_dict()
+    d["id"] = ref.id
+    return d
+
+
+async def _add_async(collection: str, data: Dict[str, Any], stamp: str, sync_fn: Callable) -> Optional[str]:
+    adb = firebase_config.get_async_db()
+    if adb is None:
+        return await _sync_fallback(sync_fn, data)
+    ref = adb.collection(collection).document()
+    data[stamp] = time.time()
+    await ref.set(data)
+    return ref.id
+
+
+@timed("firestore.save_evaluation_result_async")
+async def save_evaluation_result_async(result: Dict[str, Any]) -> Optional[str]:
+    return await _add_async("evaluationResults", result, "createdAt", save_evaluation_result)
+
+
+@timed("firestore.save_metric_async")
+async def save_metric_async(metric: Dict[str, Any]) -> Optional[str]:
+    return await _add_async("metrics", metric, "createdAt", save_metric)
+
+
+@timed("firestore.save_ai_analysis_async")
+async def save_ai_analysis_async(analysis: Dict[str, Any]) -> Optional[str]:
+    return await _add_async("aiAnalysis", analysis, "generatedAt", save_ai_analysis)
+
+
+@timed("firestore.save_gpt_prompt_async")
+async def save_gpt_prompt_async(prompt: Dict[str, Any]) -> Optional[str]:
+    return await _add_async("gptPrompts", prompt, "createdAt", save_gpt_prompt)
+
+
+@timed("firestore.save_evaluation_async")
+async def save_evaluation_async(candidate_id: str, task_id: str, scores: Dict[str, Any], summary: Dict[str, Any]) -> Optional[str]:
+    adb = firebase_config.get_async_db()
+    if adb is None:
+        return await _sync_fallback(save_evaluation, candidate_id, task_id, scores, summary)
+    doc_id = f"{candidate_id}_{task_id}"
+    await adb.collection("evaluations").document(doc_id).set({
+        "candidate_id": candidate_id,
+        "task_id": task_id,
+        "scores": scores,
+        "summary": summary,
+        "createdAt": time.time(),
+    })
+    return doc_id
+
+
+@timed("firestore.get_evaluation_async")
+async def get_evaluation_async(candidate_id: str, task_id: str) -> Optional[Dict[str, Any]]:
+    adb = firebase_config.get_async_db()
+    if adb is None:
+        return await _sync_fallback(get_evaluation, candidate_id, task_id)
+    ref = await adb.collection("evaluations").document(f"{candidate_id}_{task_id}").get()
+    if not ref.exists:
+        return None
+    d = ref.to_dict()
+    d["id"] = ref.id
+    return d
+
+
+@timed("firestore.list_all_evaluations_async")
+async def list_all_evaluations_async() -> List[Dict[str, Any]]:
+    adb = firebase_config.get_async_db()
+    if adb is None:
+        return await _sync_fallback(list_all_evaluations)
+    result = []
+    async for d in adb.collection("evaluations").stream():
+        doc = d.to_dict()
+        doc["id"] = d.id
+        result.append(doc)
+    return result
+
+
+@timed("firestore.save_candidate_attempt_async")
+async def save_candidate_attempt_async(attempt: CandidateAttempt) -> Optional[str]:
+    adb = firebase_config.get_async_db()
+    if adb is None:
+        return await _sync_fallback(save_candidate_attempt, attempt)
+    attempt.compact_code_history()
+    doc_id = f"{attempt.candidate_id}_{attempt.task_id}"
+    data = attempt.dict(exclude_none=True)
+    data["createdAt"] = time.time()
+    await adb.collection("candidateAttempts").document(doc_id).set(data)
+    return doc_id
@@ -0,0 +1,200 @@
+"""
+job_queue.py
+
+Background evaluation jobs: a bounded in-process queue drained by a
+configurable worker pool, with job IDs that clients poll (or follow over
+SSE, see routes/job_routes.py).
+
+Workers are threads; with JOB_WORKER_MODE=process each thread hands its job
+to a process pool instead, for CPU-heavy work (the job function and its
+arguments must then be picklable). Like the code-analysis pool, its workers
+come from a forkserver (or spawn; CODE_ANALYSIS_START_METHOD), never a fork
+of the threaded server. The app starts the queue in its lifespan hook
+(start_queue / shutdown_queue); other callers get one created on first use.
+
+Functions:
+- get_queue() -> JobQueue
+- JobQueue.submit(name, fn, *args, **kwargs) -> job id
+- JobQueue.get(job_id) -> Job or None
+- queue_stats() -> dict or None
+- start_queue() / shutdown_queue()
+"""
+
+from typing import Any, Callable, Dict, Optional
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import atexit
+import contextvars
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import uuid
+from services.code_analysis import START_METHOD
+
+logger = logging.getLogger("job_queue")
+
+WORKERS = int(os.environ.get("JOB_WORKERS", "4"))
+QUEUE_SIZE = int(os.environ.get("JOB_QUEUE_SIZE", "1000"))
+WORKER_MODE = os.environ.get("JOB_WORKER_MODE", "thread")  # "thread" | "process"
+KEEP_FINISHED = int(os.environ.get("JOB_KEEP_FINISHED", "10000"))
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class QueueFull(Exception):
+    """Raised by submit() when the bounded queue has no room."""
+
+
+class Job:
+    __slots__ = ("id", "name", "fn", "args", "kwargs", "status", "result", "error",
+                 "created_at", "started_at", "finished_at", "done", "context")
+
+    def __init__(self, name: str, fn: Callable, args, kwargs):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.done = threading.Event()
+        # the submitting request's context, so the job's log lines carry its request ID
+        self.context = contextvars.copy_context()
+
+    def to_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        d = {
+            "jobId": self.id,
+            "name": self.name,
+            "status": self.status,
+            "createdAt": self.created_at,
+            "startedAt": self.started_at,
+            "finishedAt": self.finished_at,
+        }
+        if self.status == FAILED:
+            d["error"] = self.error
+        if include_result and self.status == DONE:
+            d["result"] = self.result
+        return d
+
+
+class JobQueue:
+    def __init__(self, workers: int = WORKERS, max_pending: int = QUEUE_SIZE, mode: str = WORKER_MODE,
+                 start_method: str = START_METHOD):
+        self.workers = max(1, workers)
+        self.mode = mode
+        self._queue: "queue.Queue[Job]" = queue.Queue(maxsize=max_pending)
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = None
+        if mode == "process":
+            context = multiprocessing.get_context(start_method)
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+            atexit.register(self._pool.shutdown, wait=False, cancel_futures=True)
+        self._threads = []
+        for i in range(self.workers):
+            t = threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def submit(self, name: str, fn: Callable, *args, **kwargs) -> str:
+        job = Job(name, fn, args, kwargs)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._trim()
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                self._jobs.pop(job.id, None)
+            raise QueueFull(f"job queue full ({self._queue.maxsize} pending)")
+        return job.id
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+        return {"workers": self.workers, "mode": self.mode, "pending": self._queue.qsize(),
+                "capacity": self._queue.maxsize, "jobs": counts}
+
+    def shutdown(self) -> None:
+        """Stop the process pool; jobs still waiting for it fail."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def _trim(self) -> None:
+        # drop the oldest finished jobs once too many are retained
+        if len(self._jobs) <= KEEP_FINISHED:
+            return
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= KEEP_FINISHED:
+                break
+            if self._jobs[job_id].status in (DONE, FAILED):
+                del self._jobs[job_id]
+
+    def _worker(self) -> None:
+        while True:
+            job = self._queue.get()
+            job.context.run(self._run, job)
+
+    def _run(self, job: Job) -> None:
+        job.status = RUNNING
+        job.started_at = time.time()
+        try:
+            if self._pool is not None:
+                job.result = self._pool.submit(job.fn, *job.args, **job.kwargs).result()
+            else:
+                job.result = job.fn(*job.args, **job.kwargs)
+            job.status = DONE
+        except Exception as e:  # job failures are reported to the client, never kill the worker
+            logger.exception("job %s (%s) failed", job.id, job.name)
+            job.error = f"{type(e).__name__}: {e}"
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+            job.fn = job.args = job.kwargs = job.context = None
+            job.done.set()
+            self._queue.task_done()
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def start_queue() -> JobQueue:
+    """Create the process-wide job queue (and its process pool) if it does not exist yet."""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = JobQueue()
+    return _queue
+
+
+def get_queue() -> JobQueue:
+    """Process-wide job queue, started on first use."""
+    return _queue if _queue is not None else start_queue()
+
+
+def shutdown_queue() -> None:
+    global _queue
+    with _queue_lock:
+        q, _queue = _queue, None
+    if q is not None:
+        q.shutdown()
+
+
+def queue_stats() -> Optional[Dict[str, Any]]:
+    """stats() of the process-wide queue, or None if it was never started."""
+    return _queue.stats() if _queue is not None else None
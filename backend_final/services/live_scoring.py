@@ -0,0 +1,155 @@
+"""
+live_scoring.py
+
+Incremental scoring for live sessions streamed over a WebSocket.
+
+A LiveSession holds the per-connection state: the feature accumulator, the
+AI usage tracker and the online timing accumulator. Adding an event costs
+O(1) regardless of how long the session has run; update() turns the
+current state into metrics, a score and proctoring flags.
+
+The whole state serializes to JSON, so it is checkpointed to SQLite
+(LIVE_STATE_DB) periodically and on disconnect. A reconnecting client gets
+back the number of events already received and resumes from there instead
+of replaying the session. Rejected events count as received, so the offset
+always matches the client's own position in its event stream.
+
+Functions:
+- LiveSession(session_id).add(event) / update() -> dict
+- load_session(session_id) -> LiveSession (from checkpoint, or new)
+- save_checkpoint(session) -> None
+"""
+
+from typing import Any, Dict, List, Optional
+import json
+import os
+import sqlite3
+import time
+
+from services.ai_usage_analyzer import AIUsageTracker
+from services.data_processing import VALID_EVENT_TYPES, normalize_event
+from services.evaluation_engine import FeatureAccumulator, score_features
+from services.timing_analysis import TimingAccumulator
+
+DB_PATH = os.environ.get("LIVE_STATE_DB", "live_state.db")
+CHECKPOINT_EVERY = 500   # events between checkpoints
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS live_checkpoints (
+    session_id TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    events_seen INTEGER NOT NULL,
+    updated_at REAL
+);
+"""
+
+_initialized = set()
+
+
+def _connect(db_path: Optional[str] = None) -> sqlite3.Connection:
+    path = db_path or DB_PATH
+    conn = sqlite3.connect(path)
+    if path not in _initialized:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        _initialized.add(path)
+    return conn
+
+
+class LiveSession:
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.features = FeatureAccumulator()
+        self.tracker = AIUsageTracker()
+        self.timing = TimingAccumulator()
+        self.events_seen = 0       # every event received, accepted or not: the client's resume offset
+        self.events_rejected = 0
+        self.last_timestamp = None
+        self.checkpointed_at = 0   # events_seen at the last checkpoint
+
+    def add(self, raw: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Fold one raw event into the state. Returns the normalized event, or None if rejected."""
+        self.events_seen += 1
+        if not isinstance(raw, dict):
+            self.events_rejected += 1
+            return None
+        ev = normalize_event(raw)
+        if ev["event_type"] not in VALID_EVENT_TYPES:
+            self.events_rejected += 1
+            return None
+        if not isinstance(ev["payload"], dict):
+            ev["payload"] = {}
+        self.features.add(ev)
+        self.tracker.update(ev)
+        ts = ev["timestamp"]
+        if isinstance(ts, (int, float)):
+            ks = ev["payload"].get("keystrokes")
+            self.timing.add(float(ts), ks if isinstance(ks, (int, float)) else 0)
+            self.last_timestamp = ts
+        return ev
+
+    def update(self) -> Dict[str, Any]:
+        """Current metrics and flags, in the message shape pushed to the client."""
+        ai = self.tracker.result()
+        result = score_features(self.features.features(), ai, self.timing.result())
+        flags: List[str] = list(result["anomaly_flags"])
+        if ai.get("ethical_flag") == "overuse":
+            flags.append("ai_overuse")
+        if ai.get("paste_matched_ai"):
+            flags.append("paste_matches_ai_response")
+        return {
+            "type": "update",
+            "events_seen": self.events_seen,
+            "events_rejected": self.events_rejected,
+            "core_metrics": result["core_metrics"],
+            "score": result["final_score"],
+            "flags": flags,
+            "ai": {"ethical_flag": ai.get("ethical_flag"), "engagement_score": ai.get("engagement_score")},
+        }
+
+    def needs_checkpoint(self) -> bool:
+        return self.events_seen - self.checkpointed_at >= CHECKPOINT_EVERY
+
+    def to_state(self) -> Dict[str, Any]:
+        return {
+            "events_seen": self.events_seen,
+            "events_rejected": self.events_rejected,
+            "last_timestamp": self.last_timestamp,
+            "features": self.features.to_state(),
+            "tracker": self.tracker.to_state(),
+            "timing": self.timing.to_state(),
+        }
+
+    @classmethod
+    def from_state(cls, session_id: str, state: Dict[str, Any]) -> "LiveSession":
+        session = cls(session_id)
+        session.features = FeatureAccumulator.from_state(state["features"])
+        session.tracker = AIUsageTracker.from_state(state["tracker"])
+        session.timing = TimingAccumulator.from_state(state["timing"])
+        session.events_seen = state["events_seen"]
+        session.events_rejected = state.get("events_rejected", 0)
+        session.last_timestamp = state.get("last_timestamp")
+        session.checkpointed_at = session.events_seen
+        return session
+
+
+def save_checkpoint(session: LiveSession, db_path: Optional[str] = None) -> None:
+    conn = _connect(db_path)
+    try:
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO live_checkpoints (session_id, state, events_seen, updated_at) VALUES (?, ?, ?, ?)",
+                (session.session_id, json.dumps(session.to_state()), session.events_seen, time.time()),
+            )
+    finally:
+        conn.close()
+    session.checkpointed_at = session.events_seen
+
+
+def load_session(session_id: str, db_path: Optional[str] = None) -> LiveSession:
+    conn = _connect(db_path)
+    try:
+        row = conn.execute("SELECT state FROM live_checkpoints WHERE session_id = ?", (session_id,)).fetchone()
+    finally:
+        conn.close()
+    return LiveSession.from_state(session_id, json.loads(row[0])) if row else LiveSession(session_id)
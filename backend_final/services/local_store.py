@@ -0,0 +1,232 @@
+"""
+local_store.py
+
+In-memory stand-in for the Firestore client, for load tests and local runs
+without credentials.
+
+Implements the subset of the google-cloud-firestore API that
+firebase_service uses: collection(), document(), add(), where(), limit(),
+order_by(), start_after(), stream(), get(), set() and
+DocumentSnapshot.to_dict()/exists/id. Documents are deep-copied on write
+and read, like a real round trip, and an optional per-call delay
+(LOCAL_STORE_LATENCY_MS) approximates network latency.
+
+AsyncLocalFirestore exposes the same data through the AsyncClient API
+(awaitable get/set/add, async-iterable stream()); its simulated latency is
+an asyncio.sleep, so waiting on it does not hold a thread.
+
+Enabled with FIREBASE_BACKEND=local (see config/firebase_config.py).
+
+Classes:
+- LocalFirestore
+- AsyncLocalFirestore
+"""
+
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+import asyncio
+import copy
+import os
+import threading
+import time
+import uuid
+
+LATENCY_S = float(os.environ.get("LOCAL_STORE_LATENCY_MS", "0")) / 1000.0
+
+_OPS = {
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "<": lambda a, b: a is not None and a < b,
+    "<=": lambda a, b: a is not None and a <= b,
+    ">": lambda a, b: a is not None and a > b,
+    ">=": lambda a, b: a is not None and a >= b,
+    "in": lambda a, b: a in b,
+    "array_contains": lambda a, b: isinstance(a, list) and b in a,
+}
+
+
+def _round_trip() -> None:
+    if LATENCY_S:
+        time.sleep(LATENCY_S)
+
+
+async def _async_round_trip() -> None:
+    if LATENCY_S:
+        await asyncio.sleep(LATENCY_S)
+
+
+class DocumentSnapshot:
+    def __init__(self, doc_id: str, data: Optional[Dict[str, Any]]):
+        self.id = doc_id
+        self._data = data
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+
+class DocumentReference:
+    def __init__(self, store: "LocalFirestore", collection: str, doc_id: str):
+        self._store = store
+        self._collection = collection
+        self.id = doc_id
+
+    def set(self, data: Dict[str, Any], merge: bool = False) -> None:
+        _round_trip()
+        self._set(data, merge)
+
+    def get(self) -> DocumentSnapshot:
+        _round_trip()
+        return self._get()
+
+    def delete(self) -> None:
+        _round_trip()
+        self._delete()
+
+    def _set(self, data: Dict[str, Any], merge: bool) -> None:
+        data = copy.deepcopy(data)
+        with self._store._lock:
+            docs = self._store._collections.setdefault(self._collection, {})
+            if merge and self.id in docs:
+                docs[self.id].update(data)
+            else:
+                docs[self.id] = data
+
+    def _get(self) -> DocumentSnapshot:
+        with self._store._lock:
+            data = self._store._collections.get(self._collection, {}).get(self.id)
+            return DocumentSnapshot(self.id, copy.deepcopy(data) if data is not None else None)
+
+    def _delete(self) -> None:
+        with self._store._lock:
+            self._store._collections.get(self._collection, {}).pop(self.id, None)
+
+
+class Query:
+    def __init__(self, store: "LocalFirestore", collection: str,
+                 filters: Tuple[Tuple[str, str, Any], ...] = (), limit: Optional[int] = None,
+                 order: Optional[str] = None, after: Optional[Any] = None):
+        self._store = store
+        self._collection = collection
+        self._filters = filters
+        self._limit = limit
+        self._order = order
+        self._after = after
+
+    def _replace(self, **changes) -> "Query":
+        state = {"filters": self._filters, "limit": self._limit, "order": self._order, "after": self._after}
+        state.update(changes)
+        return type(self)(self._store, self._collection, **state)
+
+    def where(self, field: str, op: str, value: Any) -> "Query":
+        if op not in _OPS:
+            raise ValueError(f"unsupported operator {op!r}")
+        return self._replace(filters=self._filters + ((field, op, value),))
+
+    def limit(self, n: int) -> "Query":
+        return self._replace(limit=n)
+
+    def order_by(self, field: str) -> "Query":
+        """Ascending order on `field` ("__name__" = document id)."""
+        return self._replace(order=field)
+
+    def start_after(self, cursor: Any) -> "Query":
+        """Resume after a DocumentSnapshot (or a {field: value} dict) in the current order."""
+        return self._replace(after=cursor)
+
+    def _sort_value(self, doc_id: str, data: Dict[str, Any]):
+        return doc_id if self._order == "__name__" else (data.get(self._order), doc_id)
+
+    def stream(self) -> Iterator[DocumentSnapshot]:
+        _round_trip()
+        return self._matches()
+
+    def _matches(self) -> Iterator[DocumentSnapshot]:
+        with self._store._lock:
+            items = list(self._store._collections.get(self._collection, {}).items())
+        if self._order is not None:
+            items.sort(key=lambda kv: self._sort_value(*kv))
+            if self._after is not None:
+                if isinstance(self._after, DocumentSnapshot):
+                    last = self._sort_value(self._after.id, self._after._data or {})
+                else:
+                    last = self._after.get(self._order) if self._order == "__name__" else (self._after.get(self._order), "")
+                items = [kv for kv in items if self._sort_value(*kv) > last]
+        produced = 0
+        for doc_id, data in items:
+            if self._limit is not None and produced >= self._limit:
+                return
+            if all(_OPS[op](data.get(field), value) for field, op, value in self._filters):
+                produced += 1
+                yield DocumentSnapshot(doc_id, copy.deepcopy(data))
+
+
+class CollectionReference(Query):
+    def document(self, doc_id: Optional[str] = None) -> DocumentReference:
+        return DocumentReference(self._store, self._collection, doc_id or uuid.uuid4().hex[:20])
+
+    def add(self, data: Dict[str, Any]) -> Tuple[float, DocumentReference]:
+        ref = self.document()
+        ref.set(data)
+        return time.time(), ref
+
+
+class AsyncDocumentReference(DocumentReference):
+    async def set(self, data: Dict[str, Any], merge: bool = False) -> None:
+        await _async_round_trip()
+        self._set(data, merge)
+
+    async def get(self) -> DocumentSnapshot:
+        await _async_round_trip()
+        return self._get()
+
+    async def delete(self) -> None:
+        await _async_round_trip()
+        self._delete()
+
+
+class AsyncQuery(Query):
+    async def stream(self) -> AsyncIterator[DocumentSnapshot]:
+        await _async_round_trip()
+        for snap in self._matches():
+            yield snap
+
+
+class AsyncCollectionReference(AsyncQuery):
+    def document(self, doc_id: Optional[str] = None) -> AsyncDocumentReference:
+        return AsyncDocumentReference(self._store, self._collection, doc_id or uuid.uuid4().hex[:20])
+
+    async def add(self, data: Dict[str, Any]) -> Tuple[float, AsyncDocumentReference]:
+        ref = self.document()
+        await ref.set(data)
+        return time.time(), ref
+
+
+class LocalFirestore:
+    def __init__(self):
+        self._collections: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._lock = threading.RLock()
+
+    def collection(self, name: str) -> CollectionReference:
+        return CollectionReference(self, name)
+
+    def seed(self, collection: str, docs: Dict[str, Dict[str, Any]]) -> None:
+        """Bulk-load documents without simulated latency."""
+        with self._lock:
+            self._collections.setdefault(collection, {}).update(copy.deepcopy(docs))
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            return {name: len(docs) for name, docs in self._collections.items()}
+
+
+class AsyncLocalFirestore:
+    """AsyncClient-shaped view of a LocalFirestore; both see the same documents."""
+
+    def __init__(self, store: LocalFirestore):
+        self._store = store
+
+    def collection(self, name: str) -> AsyncCollectionReference:
+        return AsyncCollectionReference(self._store, name)
@@ -0,0 +1,96 @@
+"""
+narrative_store.py
+
+Persistent cache of report narratives produced by the LLM provider.
+
+Entries are keyed by a hash of the inputs that determine the narrative (core
+metrics, recommendations and the prompt version, see
+summary_generator.narrative_key), so re-rendering a report for the same
+result reads the cache instead of calling the provider. Backed by SQLite
+with an in-process LRU in front.
+
+Functions:
+- get_many(keys) -> {key: narrative} for the keys present
+- put_many(items) -> int
+- cache_stats() -> dict
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+import os
+import sqlite3
+import time
+
+from utils.lru import LRUCache
+
+DB_PATH = os.environ.get("NARRATIVE_STORE_DB", "narratives.db")
+CACHE_MAX_ENTRIES = int(os.environ.get("NARRATIVE_CACHE_ENTRIES", "4096"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS narratives (
+    key TEXT PRIMARY KEY,
+    narrative TEXT NOT NULL,
+    provider TEXT,
+    created_at REAL
+);
+"""
+
+_initialized = set()
+_cache = LRUCache(CACHE_MAX_ENTRIES, 16 * 1024 * 1024)
+
+
+def _connect(db_path: Optional[str] = None) -> sqlite3.Connection:
+    path = db_path or DB_PATH
+    conn = sqlite3.connect(path)
+    if path not in _initialized:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        _initialized.add(path)
+    return conn
+
+
+def get_many(keys: Iterable[str], db_path: Optional[str] = None) -> Dict[str, str]:
+    found: Dict[str, str] = {}
+    missing: List[str] = []
+    for key in dict.fromkeys(keys):
+        value = _cache.get(key)
+        if value is None:
+            missing.append(key)
+        else:
+            found[key] = value
+    if not missing:
+        return found
+    conn = _connect(db_path)
+    try:
+        # chunked to stay under SQLite's bound-parameter limit
+        for start in range(0, len(missing), 500):
+            chunk = missing[start:start + 500]
+            rows = conn.execute(
+                f"SELECT key, narrative FROM narratives WHERE key IN ({','.join('?' * len(chunk))})", chunk).fetchall()
+            for key, narrative in rows:
+                found[key] = narrative
+                _cache.put(key, narrative)
+    finally:
+        conn.close()
+    return found
+
+
+def put_many(items: Iterable[Tuple[str, str, str]], db_path: Optional[str] = None) -> int:
+    """Store (key, narrative, provider) rows in one transaction."""
+    now = time.time()
+    params = [(key, narrative, provider, now) for key, narrative, provider in items]
+    if not params:
+        return 0
+    conn = _connect(db_path)
+    try:
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO narratives (key, narrative, provider, created_at) VALUES (?, ?, ?, ?)", params)
+    finally:
+        conn.close()
+    for key, narrative, _, _ in params:
+        _cache.put(key, narrative)
+    return len(params)
+
+
+def cache_stats() -> dict:
+    return {"entries": len(_cache), "hits": _cache.hits, "misses": _cache.misses}
@@ -0,0 +1,126 @@
+"""
+report_export.py
+
+Streaming bulk export of stored evaluations with their summaries, for
+recruiters pulling a whole cohort.
+
+Evaluations are read page by page through storage cursors
+(firebase_service.iter_evaluation_pages), summaries are generated per page
+(generate_summaries, so narratives are batched and cached), and each page
+is encoded and handed to the response before the next one is fetched.
+Memory stays bounded by one page whatever the cohort size. Output is NDJSON
+or CSV, optionally gzip-compressed with a sync flush per page so the client
+receives data as it is produced, and restricted to the requested fields.
+
+CSV cells that a spreadsheet would read as a formula (starting with = + - @
+tab or CR) are prefixed with a single quote, so exported candidate input
+cannot run as a formula when the file is opened.
+
+Fields are dotted paths into a row of the form
+    {"id", "candidate_id", "task_id", "created_at", "scores": {...}, "summary": {...}}
+e.g. "summary.grade" or "scores.core_metrics.reasoning_score". Summaries
+are only computed when a "summary.*" field is requested.
+
+Functions:
+- parse_fields(spec) -> tuple of field paths (ValueError on unknown roots)
+- export_chunks(fmt, fields, task_id=None, narrative=False, gzip=False, page_size=200) -> iterator of bytes
+"""
+
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+import csv
+import io
+import json
+import zlib
+
+from services import firebase_service, summary_generator
+from utils.metrics import count
+
+FORMATS = ("ndjson", "csv")
+ROOTS = ("id", "candidate_id", "task_id", "created_at", "scores", "summary")
+DEFAULT_FIELDS = ("candidate_id", "task_id", "scores.final_score", "summary.grade", "summary.short_summary")
+_MISSING = object()
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def parse_fields(spec: Optional[str]) -> tuple:
+    if not spec:
+        return DEFAULT_FIELDS
+    fields = tuple(dict.fromkeys(f.strip() for f in spec.split(",") if f.strip()))
+    unknown = [f for f in fields if f.split(".", 1)[0] not in ROOTS]
+    if unknown or not fields:
+        raise ValueError(f"unknown fields {unknown}; fields start with one of {', '.join(ROOTS)}")
+    return fields
+
+
+def _lookup(row: Dict[str, Any], path: str) -> Any:
+    value: Any = row
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part, _MISSING)
+        if value is _MISSING:
+            return None
+    return value
+
+
+def _rows(page: List[Dict[str, Any]], fields: Sequence[str], narrative: bool) -> Iterator[Dict[str, Any]]:
+    summaries: List[Optional[Dict[str, Any]]] = [None] * len(page)
+    if any(f.startswith("summary") for f in fields):
+        scored = [i for i, doc in enumerate(page) if doc.get("scores")]
+        for i, summary in zip(scored, summary_generator.generate_summaries([page[i]["scores"] for i in scored], narrative)):
+            summaries[i] = summary
+    for doc, summary in zip(page, summaries):
+        row = {
+            "id": doc.get("id"),
+            "candidate_id": doc.get("candidate_id"),
+            "task_id": doc.get("task_id"),
+            "created_at": doc.get("createdAt"),
+            "scores": doc.get("scores") or {},
+            "summary": summary or {},
+        }
+        yield {f: _lookup(row, f) for f in fields}
+
+
+def _csv_cell(value: Any) -> Any:
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, separators=(",", ":"))
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return "" if value is None else value
+
+
+def export_chunks(fmt: str, fields: Sequence[str], task_id: Optional[str] = None, narrative: bool = False,
+                  gzip: bool = False, page_size: int = 200) -> Iterator[bytes]:
+    """Encoded export, one chunk per storage page (plus the CSV header / gzip header up front)."""
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {FORMATS}")
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if gzip else None  # wbits 31: gzip container
+
+    def emit(data: bytes) -> bytes:
+        if compressor is None:
+            return data
+        return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n") if fmt == "csv" else None
+    if writer is not None:
+        writer.writerow(fields)
+    # first bytes go out before the first storage round trip
+    yield emit(buf.getvalue().encode("utf-8"))
+
+    exported = 0
+    for page in firebase_service.iter_evaluation_pages(page_size, task_id):
+        buf.seek(0)
+        buf.truncate()
+        for row in _rows(page, fields, narrative):
+            if writer is not None:
+                writer.writerow([_csv_cell(row[f]) for f in fields])
+            else:
+                buf.write(json.dumps(row, separators=(",", ":"), default=str))
+                buf.write("\n")
+        exported += len(page)
+        yield emit(buf.getvalue().encode("utf-8"))
+
+    count("export_rows_total", exported, format=fmt)
+    if compressor is not None:
+        yield compressor.flush()
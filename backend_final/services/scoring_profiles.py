@@ -0,0 +1,144 @@
+"""
+scoring_profiles.py
+
+Per-task scoring profiles and bulk re-scoring from the feature store.
+
+A profile (models.metrics_model.ScoringProfile) blends a weighted sum of
+metrics (MetricWeights) with the same fuzzy score that final_score uses
+(evaluation_engine.fuzzy_score). Because features and core metrics are
+persisted per session, applying a new profile to a whole task is a single
+pass over stored rows: no raw events are replayed.
+
+Profiles are cached per process and re-read from the feature store after
+PROFILE_CACHE_TTL seconds, so a profile saved by another worker takes
+effect within that time.
+
+Functions:
+- get_profile(task_id) -> ScoringProfile
+- set_profile(task_id, profile) -> None
+- score(core_metrics, features, profile) -> float
+- rescore_task(task_id, profile=None, persist=True) -> dict
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+from functools import lru_cache
+import os
+import time
+
+from models.metrics_model import ScoringProfile
+from services import feature_store
+from services.evaluation_engine import fuzzy_score
+from utils.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+# MetricWeights fields, in the column order produced by _metric_row()
+WEIGHT_ORDER = ("adaptability", "debug_efficiency", "ethical_ai", "time_efficiency", "creativity")
+
+PROFILE_CACHE_TTL = float(os.environ.get("PROFILE_CACHE_TTL", "30"))
+
+# task_id -> (stored profile or None for "use the default", monotonic load time)
+_profiles: Dict[str, Tuple[Optional[ScoringProfile], float]] = {}
+
+
+def get_profile(task_id: Optional[str]) -> ScoringProfile:
+    if not task_id:
+        return ScoringProfile()
+    cached = _profiles.get(task_id)
+    if cached is None or time.monotonic() - cached[1] > PROFILE_CACHE_TTL:
+        stored = feature_store.load_profile(task_id)
+        cached = (ScoringProfile(**stored) if stored else None, time.monotonic())
+        _profiles[task_id] = cached
+    return cached[0] or ScoringProfile()
+
+
+def set_profile(task_id: str, profile: ScoringProfile) -> None:
+    feature_store.save_profile(task_id, profile.dict())
+    _profiles[task_id] = (profile, time.monotonic())
+
+
+def _metric_row(core_metrics: Dict[str, float], features: Dict[str, Any]) -> Tuple[float, ...]:
+    idle_ratio = features.get("idle_ratio")
+    time_efficiency = 1.0 - idle_ratio if idle_ratio is not None else 0.5
+    edits = features.get("edits", 0) or 0
+    creativity = min(1.0, (features.get("unique_versions", 0) or 0) / (edits + 1))
+    return (
+        core_metrics.get("adaptability", 0.0),
+        core_metrics.get("debugging_efficiency", 0.0),
+        core_metrics.get("ethical_ai_usage", 0.0),
+        max(0.0, min(1.0, time_efficiency)),
+        creativity,
+    )
+
+
+def _weight_vector(profile: ScoringProfile) -> "np.ndarray":
+    w = np.array([getattr(profile.weights, name) for name in WEIGHT_ORDER], dtype=np.float64)
+    total = w.sum()
+    return w / total if total > 0 else w
+
+
+@lru_cache(maxsize=65536)
+def _fuzzy_score(rs: float, de: float, ad: float, ea: float, runs: int, ai_queries: int, edits: int) -> float:
+    # core metrics are rounded to 3 decimals and counts are small, so many sessions share an input
+    score, _, _ = fuzzy_score(
+        {"reasoning_score": rs, "debugging_efficiency": de, "adaptability": ad, "ethical_ai_usage": ea},
+        {"runs": runs, "ai_queries": ai_queries, "edits": edits})
+    return score
+
+
+def _session_fuzzy(core_metrics: Dict[str, float], features: Dict[str, Any]) -> float:
+    return _fuzzy_score(core_metrics.get("reasoning_score", 0), core_metrics.get("debugging_efficiency", 0),
+                        core_metrics.get("adaptability", 0), core_metrics.get("ethical_ai_usage", 0),
+                        int(features.get("runs", 0) or 0), int(features.get("ai_queries", 0) or 0),
+                        int(features.get("edits", 0) or 0))
+
+
+def score(core_metrics: Dict[str, float], features: Dict[str, Any], profile: ScoringProfile) -> float:
+    weighted = float(np.dot(_metric_row(core_metrics, features), _weight_vector(profile))) * 100.0
+    fuzzy = _session_fuzzy(core_metrics, features)
+    return round(profile.fuzzy_blend * fuzzy + (1.0 - profile.fuzzy_blend) * weighted, 2)
+
+
+def rescore_task(task_id: str, profile: Optional[ScoringProfile] = None, persist: bool = True,
+                 chunk_size: int = 5000) -> Dict[str, Any]:
+    """
+    Apply `profile` (default: the task's current profile) to every stored session
+    of `task_id`. Rows are scored in vectorized chunks and written back in bulk.
+    """
+    profile = profile or get_profile(task_id)
+    w = _weight_vector(profile)
+    count = 0
+    total = 0.0
+    best: List[Tuple[float, str]] = []
+
+    def flush(chunk: List[Dict[str, Any]]):
+        nonlocal count, total
+        fuzzy = np.array([_session_fuzzy(r["core_metrics"], r["features"]) for r in chunk], dtype=np.float64)
+        matrix = np.array([_metric_row(r["core_metrics"], r["features"]) for r in chunk], dtype=np.float64)
+        scores = profile.fuzzy_blend * fuzzy + (1.0 - profile.fuzzy_blend) * (matrix @ w) * 100.0
+        scores = np.round(scores, 2)
+        if persist:
+            feature_store.update_scores((r["session_id"], float(s), profile.name) for r, s in zip(chunk, scores))
+        count += len(chunk)
+        total += float(scores.sum())
+        for r, s in zip(chunk, scores):
+            best.append((float(s), r["candidate_id"]))
+        best.sort(reverse=True)
+        del best[10:]
+
+    chunk: List[Dict[str, Any]] = []
+    for row in feature_store.iter_features(task_id):
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            flush(chunk)
+            chunk = []
+    if chunk:
+        flush(chunk)
+
+    return {
+        "task_id": task_id,
+        "profile": profile.name,
+        "rescored": count,
+        "mean_score": round(total / count, 2) if count else None,
+        "top": [{"candidate_id": c, "score": s} for s, c in best],
+    }
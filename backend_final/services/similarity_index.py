@@ -0,0 +1,231 @@
+"""
+similarity_index.py
+
+Near-duplicate detection for code snippets with shingling + MinHash + LSH.
+
+Snippets (snapshot code, AI responses, paste payloads, submissions) are cut
+into overlapping token k-grams, summarized by a fixed-size MinHash signature
+and bucketed by LSH bands. Inserts are incremental and a query only compares
+against candidates that share at least one band bucket, so lookups stay
+sub-linear in the size of the cohort.
+
+An index can be capped with max_entries; past the cap the least recently
+inserted entry is evicted. The cohort index lives in process memory and is
+capped at COHORT_INDEX_MAX_ENTRIES: each worker process only compares a
+submission against the submissions it has seen itself, most recent first.
+Only submissions are recorded (check_plagiarism(record=True)); evaluation
+queries the index without changing it. cohort_is_complete() is False when
+the server runs several worker processes (WEB_CONCURRENCY > 1), i.e. when
+a miss may only mean another worker saw the matching submission.
+
+Classes / functions:
+- MinHashLSHIndex: insert(key, text, source), remove(key), query(text, threshold),
+  to_state() / from_state(state)
+- cohort_index() -> per-process index of recent candidate submissions
+- cohort_is_complete() -> bool
+- check_plagiarism(candidate_id, task_id, code, record=True) -> dict
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import os
+import random
+import re
+import threading
+import zlib
+
+from utils.lazy import lazy_import
+
+np = lazy_import("numpy")  # None without NumPy: pure-Python fallback below
+
+_TOKEN_RE = re.compile(r"[A-Za-z_]\w*|\d+|[^\s\w]")
+_PRIME = (1 << 31) - 1  # shingles are reduced mod this, so a*x + b fits in uint64
+
+NUM_PERM = 128
+BANDS = 32  # 32 bands x 4 rows: ~50% collision probability at Jaccard 0.42
+SHINGLE_SIZE = 5
+PLAGIARISM_THRESHOLD = 0.8
+COHORT_INDEX_MAX_ENTRIES = int(os.environ.get("COHORT_INDEX_MAX_ENTRIES", "50000"))
+SERVER_WORKERS = int(os.environ.get("WEB_CONCURRENCY", "1") or 1)  # what uvicorn/gunicorn read for --workers
+SIGNATURE_MEMO_SIZE = 64  # recent texts whose signature is reused (a paste of an AI answer repeats its text)
+_MISS = object()
+
+
+def shingles(text: str, k: int = SHINGLE_SIZE) -> List[int]:
+    """Hashed token k-grams of a code snippet (whitespace and formatting ignored)."""
+    tokens = _TOKEN_RE.findall(text or "")
+    if not tokens:
+        return []
+    if len(tokens) < k:
+        k = len(tokens)
+    grams = {" ".join(tokens[i:i + k]) for i in range(len(tokens) - k + 1)}
+    return [zlib.crc32(g.encode("utf-8")) % _PRIME for g in grams]
+
+
+class MinHashLSHIndex:
+    def __init__(self, num_perm: int = NUM_PERM, bands: int = BANDS, seed: int = 1,
+                 max_entries: Optional[int] = None):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.seed = seed
+        self.max_entries = max_entries
+        rng = random.Random(seed)
+        self._a = [rng.randrange(1, _PRIME) for _ in range(num_perm)]
+        self._b = [rng.randrange(0, _PRIME) for _ in range(num_perm)]
+        if np is not None:
+            self._a_np = np.array(self._a, dtype=np.uint64)[:, None]
+            self._b_np = np.array(self._b, dtype=np.uint64)[:, None]
+        self._buckets: List[Dict[Tuple[int, ...], set]] = [{} for _ in range(bands)]
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._memo: Dict[bytes, Optional[Tuple[int, ...]]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def signature(self, text: str) -> Optional[Tuple[int, ...]]:
+        digest = hashlib.blake2b((text or "").encode("utf-8"), digest_size=16).digest()
+        # one lookup: another thread may evict the entry between a membership test and a read
+        sig = self._memo.get(digest, _MISS)
+        if sig is not _MISS:
+            return sig
+        sh = shingles(text)
+        if not sh:
+            sig = None
+        elif np is not None:
+            x = np.array(sh, dtype=np.uint64)
+            sig = tuple(((self._a_np * x + self._b_np) % _PRIME).min(axis=1).tolist())
+        else:
+            sig = tuple(min((a * v + b) % _PRIME for v in sh) for a, b in zip(self._a, self._b))
+        with self._lock:
+            if len(self._memo) >= SIGNATURE_MEMO_SIZE:
+                self._memo.pop(next(iter(self._memo)))
+            self._memo[digest] = sig
+        return sig
+
+    def _band_keys(self, sig: Tuple[int, ...]):
+        r = self.rows
+        return [sig[i * r:(i + 1) * r] for i in range(self.bands)]
+
+    def insert(self, key: str, text: str, source: Optional[str] = None, meta: Optional[Dict[str, Any]] = None) -> bool:
+        """Add (or replace) a snippet. Returns False when the text has no tokens."""
+        sig = self.signature(text)
+        if sig is None:
+            return False
+        self.insert_signature(key, sig, source, meta)
+        return True
+
+    def insert_signature(self, key: str, sig: Tuple[int, ...], source: Optional[str] = None,
+                         meta: Optional[Dict[str, Any]] = None) -> None:
+        """Add an entry whose signature was computed earlier (see to_state)."""
+        sig = tuple(sig)
+        with self._lock:
+            self._remove_locked(key)
+            for band, bkey in zip(self._buckets, self._band_keys(sig)):
+                band.setdefault(bkey, set()).add(key)
+            self._entries[key] = {"signature": sig, "source": source, "meta": meta or {}}
+            # entries are in insertion order (a re-insert moves to the end), so the first is the oldest
+            while self.max_entries is not None and len(self._entries) > self.max_entries:
+                self._remove_locked(next(iter(self._entries)))
+
+    def to_state(self) -> Dict[str, Any]:
+        """Signatures and parameters; snippets are not kept, so this stays compact."""
+        with self._lock:
+            entries = [[key, list(e["signature"]), e["source"], e["meta"]] for key, e in self._entries.items()]
+        return {"num_perm": self.num_perm, "bands": self.bands, "seed": self.seed,
+                "max_entries": self.max_entries, "entries": entries}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "MinHashLSHIndex":
+        index = cls(num_perm=state["num_perm"], bands=state["bands"], seed=state["seed"],
+                    max_entries=state.get("max_entries"))
+        for key, sig, source, meta in state["entries"]:
+            index.insert_signature(key, sig, source, meta)
+        return index
+
+    def remove(self, key: str) -> None:
+        with self._lock:
+            self._remove_locked(key)
+
+    def _remove_locked(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if not entry:
+            return
+        for band, bkey in zip(self._buckets, self._band_keys(entry["signature"])):
+            members = band.get(bkey)
+            if members:
+                members.discard(key)
+                if not members:
+                    del band[bkey]
+
+    def query(self, text: str, threshold: float = 0.5, source: Optional[str] = None,
+              exclude: Optional[set] = None) -> List[Dict[str, Any]]:
+        """
+        Near-duplicates of `text` with estimated Jaccard similarity >= threshold,
+        best first. `source` restricts matches to entries inserted with that source.
+        """
+        sig = self.signature(text)
+        if sig is None:
+            return []
+        with self._lock:
+            candidates = set()
+            for band, bkey in zip(self._buckets, self._band_keys(sig)):
+                members = band.get(bkey)
+                if members:
+                    candidates.update(members)
+            matches = []
+            for key in candidates:
+                if exclude and key in exclude:
+                    continue
+                entry = self._entries[key]
+                if source is not None and entry["source"] != source:
+                    continue
+                other = entry["signature"]
+                sim = sum(1 for x, y in zip(sig, other) if x == y) / self.num_perm
+                if sim >= threshold:
+                    matches.append({"key": key, "similarity": round(sim, 3), "source": entry["source"], "meta": entry["meta"]})
+        matches.sort(key=lambda m: m["similarity"], reverse=True)
+        return matches
+
+
+_cohort = None
+_cohort_lock = threading.Lock()
+
+
+def cohort_index() -> MinHashLSHIndex:
+    """Per-process index of the most recent candidate submissions, keyed by candidate/task."""
+    global _cohort
+    if _cohort is None:
+        with _cohort_lock:
+            if _cohort is None:
+                _cohort = MinHashLSHIndex(max_entries=COHORT_INDEX_MAX_ENTRIES)
+    return _cohort
+
+
+def cohort_is_complete() -> bool:
+    """True when this process sees every submission (a single server worker)."""
+    return SERVER_WORKERS <= 1
+
+
+def check_plagiarism(candidate_id: str, task_id: str, code: Optional[str],
+                     threshold: float = PLAGIARISM_THRESHOLD, record: bool = True) -> Dict[str, Any]:
+    """
+    Compare a submission against other candidates' submissions for the same task,
+    then, with `record`, add it to the cohort index (submissions only: an
+    evaluation of the same code must not change what later checks see).
+    """
+    if not code:
+        return {"plagiarism_flag": False, "matches": []}
+    index = cohort_index()
+    key = f"{candidate_id}:{task_id}"
+    matches = [
+        {"candidate_id": m["meta"].get("candidate_id"), "similarity": m["similarity"]}
+        for m in index.query(code, threshold=threshold, source=task_id, exclude={key})
+        if m["meta"].get("candidate_id") != candidate_id
+    ]
+    if record:
+        index.insert(key, code, source=task_id, meta={"candidate_id": candidate_id})
+    return {"plagiarism_flag": bool(matches), "matches": matches[:5]}
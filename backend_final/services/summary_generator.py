@@ -4,11 +4,35 @@ summary_generator.py
 Takes evaluation output and produces readable summaries and structured insights
 for display or storage.
 
+With narrative=True the summary also gets an LLM-written "narrative"
+(config.langchain_config.get_narrative_provider: LangChain when configured,
+a deterministic local stand-in otherwise). Narratives are cached
+persistently by narrative_key() (services/narrative_store), so the provider
+is called once per distinct result, not per report view, and
+generate_summaries() sends the distinct misses of a whole cohort in batches
+of NARRATIVE_BATCH_SIZE per provider call.
+
 Functions:
-- generate_summary(evaluation_result: dict) -> dict
+- generate_summary(evaluation_result: dict, narrative: bool = False) -> dict
+- generate_summaries(evaluation_results: list, narrative: bool = False) -> list
+- narrative_key(evaluation_result: dict, prompt_version: str) -> str
 """
 
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
+import hashlib
+import json
+import logging
+import os
+
+from config import langchain_config
+from services import narrative_store
+from utils.metrics import count, timed
+
+logger = logging.getLogger("summary_generator")
+
+# bump when the prompt or the narrative format changes; old cache entries are then ignored
+PROMPT_VERSION = "v1"
+NARRATIVE_BATCH_SIZE = int(os.environ.get("NARRATIVE_BATCH_SIZE", "8"))
 
 GRADE_THRESHOLDS = {
     "A": 85,
@@ -25,11 +49,29 @@ def grade_from_score(score: float) -> str:
     return "F"
 
 
-def generate_summary(evaluation_result: Dict[str, Any]) -> Dict[str, Any]:
+@timed("generate_summary")
+def generate_summary(evaluation_result: Dict[str, Any], narrative: bool = False) -> Dict[str, Any]:
     """
     Given the output of evaluation_engine.evaluate_candidate_session,
     produce a structured summary.
     """
+    summary = _template_summary(evaluation_result)
+    if narrative:
+        _add_narratives([summary], [evaluation_result])
+    return summary
+
+
+@timed("generate_summaries")
+def generate_summaries(evaluation_results: List[Dict[str, Any]], narrative: bool = False,
+                       batch_size: Optional[int] = None) -> List[Dict[str, Any]]:
+    """generate_summary for many results; narratives missing from the cache are requested in batches."""
+    summaries = [_template_summary(r) for r in evaluation_results]
+    if narrative and summaries:
+        _add_narratives(summaries, evaluation_results, batch_size or NARRATIVE_BATCH_SIZE)
+    return summaries
+
+
+def _template_summary(evaluation_result: Dict[str, Any]) -> Dict[str, Any]:
     fuzzy = evaluation_result.get("fuzzy_result", {})
     metrics = evaluation_result.get("core_metrics", {})
     recs = evaluation_result.get("recommendations", [])
@@ -79,6 +121,57 @@ def generate_summary(evaluation_result: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
+def _narrative_item(evaluation_result: Dict[str, Any]) -> Dict[str, Any]:
+    """What the provider sees (and the cache key covers) for one result."""
+    score = round(float(evaluation_result.get("fuzzy_result", {}).get("score", 0.0)), 1)
+    metrics = evaluation_result.get("core_metrics", {}) or {}
+    return {
+        "grade": grade_from_score(score),
+        "score": score,
+        "metrics": {k: round(float(v), 4) for k, v in sorted(metrics.items()) if isinstance(v, (int, float))},
+        "recommendations": list(evaluation_result.get("recommendations", []) or []),
+    }
+
+
+def narrative_key(evaluation_result: Dict[str, Any], prompt_version: str) -> str:
+    item = _narrative_item(evaluation_result)
+    raw = json.dumps([item["metrics"], item["recommendations"], item["score"], prompt_version],
+                     sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _add_narratives(summaries: List[Dict[str, Any]], results: List[Dict[str, Any]],
+                    batch_size: int = NARRATIVE_BATCH_SIZE) -> None:
+    provider = langchain_config.get_narrative_provider()
+    # the provider is part of the version, so switching from the stand-in to a real model re-generates
+    version = f"{provider.name}:{PROMPT_VERSION}"
+    keys = [narrative_key(r, version) for r in results]
+    found = narrative_store.get_many(keys)
+
+    pending: Dict[str, Dict[str, Any]] = {}
+    for key, result in zip(keys, results):
+        if key not in found and key not in pending:
+            pending[key] = _narrative_item(result)
+
+    todo = list(pending.items())
+    for start in range(0, len(todo), max(1, batch_size)):
+        batch = todo[start:start + max(1, batch_size)]
+        try:
+            texts = provider.narrate([item for _, item in batch])
+        except Exception as e:  # a provider outage degrades reports to the template text
+            logger.warning("narrative provider %s failed for %d results: %s", provider.name, len(batch), e)
+            texts = [None] * len(batch)
+        count("llm_provider_calls_total", provider=provider.name)
+        fresh = [(key, text, provider.name) for (key, _), text in zip(batch, texts) if text]
+        narrative_store.put_many(fresh)
+        found.update((key, text) for key, text, _ in fresh)
+
+    for key, summary in zip(keys, summaries):
+        text = found.get(key)
+        summary["narrative"] = text or summary["long_summary"]
+        summary["narrative_source"] = provider.name if text else "template"
+
+
 if __name__ == "__main__":
     # smoke test
     demo_eval = {
@@ -0,0 +1,168 @@
+"""
+task_catalog.py
+
+Task catalog loaded from storage (Firestore collection `tasks`, falling back
+to the built-in tasks when it is empty or unavailable), indexed for the
+/tasks routes.
+
+Each load builds id, tag and difficulty indexes, serializes every task to
+JSON once and derives an ETag from the serialized catalog. Queries
+intersect index postings instead of scanning, pages are assembled from the
+pre-serialized bytes, and a client whose If-None-Match matches the ETag can
+be answered 304 before any query work. The catalog is reloaded after
+TASK_CATALOG_TTL seconds (or on refresh()); an unchanged reload keeps its
+ETag.
+
+Functions / classes:
+- TaskCatalog(tasks).query(tags=(), difficulty=None, min_difficulty=None, max_difficulty=None, offset=0, limit=None) -> (body, total)
+- TaskCatalog.get(task_id) -> Task or None; TaskCatalog.task_json(task_id) -> bytes or None
+- get_catalog() -> TaskCatalog (reloads when stale)
+- is_stale() -> bool
+- refresh() -> TaskCatalog
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+from models.task_model import Task
+
+logger = logging.getLogger("task_catalog")
+
+TTL = float(os.environ.get("TASK_CATALOG_TTL", "300"))
+
+DEFAULT_TASKS = [
+    Task(id="TAPI1", title="API Debug", description="Fix and document bug in API", tags=["backend", "debug"], difficulty=3),
+    Task(id="TFE1", title="React Integration", description="Integrate public API into dashboard", tags=["frontend", "integration"], difficulty=3),
+    Task(id="TFS1", title="Dockerize Service", description="Create Dockerfile and run container", tags=["devops"], difficulty=4),
+]
+
+
+def _dumps(obj) -> bytes:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+class TaskCatalog:
+    """Immutable, indexed snapshot of the tasks; a reload builds a new one."""
+
+    def __init__(self, tasks: Iterable[Task]):
+        by_id: Dict[str, Task] = {}
+        for task in tasks:
+            by_id[task.id] = task  # later duplicates win, like a Firestore overwrite
+        self.tasks: List[Task] = sorted(by_id.values(), key=lambda t: t.id)
+        self._pos: Dict[str, int] = {t.id: i for i, t in enumerate(self.tasks)}
+        self._json: List[bytes] = [_dumps(t.dict()) for t in self.tasks]
+
+        # postings: positions in catalog order, so merged results stay ordered
+        self._by_tag: Dict[str, List[int]] = {}
+        self._by_difficulty: Dict[int, List[int]] = {}
+        for i, t in enumerate(self.tasks):
+            for tag in dict.fromkeys(t.tags):
+                self._by_tag.setdefault(tag, []).append(i)
+            self._by_difficulty.setdefault(t.difficulty, []).append(i)
+
+        self._all_body = b"[" + b",".join(self._json) + b"]"
+        self.etag = '"' + hashlib.sha256(self._all_body).hexdigest()[:32] + '"'
+        self.loaded_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self.tasks)
+
+    def get(self, task_id: str) -> Optional[Task]:
+        i = self._pos.get(task_id)
+        return self.tasks[i] if i is not None else None
+
+    def task_json(self, task_id: str) -> Optional[bytes]:
+        i = self._pos.get(task_id)
+        return self._json[i] if i is not None else None
+
+    def tags(self) -> Dict[str, int]:
+        return {tag: len(p) for tag, p in sorted(self._by_tag.items())}
+
+    def positions(self, tags: Sequence[str] = (), difficulty: Optional[int] = None,
+                  min_difficulty: Optional[int] = None, max_difficulty: Optional[int] = None) -> Optional[List[int]]:
+        """Matching positions in catalog order, or None for "no filter" (every task)."""
+        postings: List[List[int]] = [self._by_tag.get(tag, []) for tag in dict.fromkeys(tags)]
+        if difficulty is not None:
+            postings.append(self._by_difficulty.get(difficulty, []))
+        elif min_difficulty is not None or max_difficulty is not None:
+            lo = min_difficulty if min_difficulty is not None else float("-inf")
+            hi = max_difficulty if max_difficulty is not None else float("inf")
+            merged = [i for d, p in self._by_difficulty.items() if lo <= d <= hi for i in p]
+            postings.append(sorted(merged))
+        if not postings:
+            return None
+        # AND: walk the shortest posting list and probe the others
+        postings.sort(key=len)
+        head, rest = postings[0], [set(p) for p in postings[1:]]
+        return [i for i in head if all(i in s for s in rest)]
+
+    def query(self, tags: Sequence[str] = (), difficulty: Optional[int] = None,
+              min_difficulty: Optional[int] = None, max_difficulty: Optional[int] = None,
+              offset: int = 0, limit: Optional[int] = None) -> Tuple[bytes, int]:
+        """(JSON array body, total matches before pagination)."""
+        positions = self.positions(tags, difficulty, min_difficulty, max_difficulty)
+        if positions is None:
+            total = len(self.tasks)
+            if offset == 0 and (limit is None or limit >= total):
+                return self._all_body, total
+            positions = range(total)
+        else:
+            total = len(positions)
+        end = total if limit is None else offset + limit
+        return b"[" + b",".join(self._json[i] for i in positions[offset:end]) + b"]", total
+
+
+_catalog: Optional[TaskCatalog] = None
+_lock = threading.Lock()
+
+
+def _load() -> Optional[List[Task]]:
+    """Tasks from storage, the built-in tasks if there are none, or None if storage failed."""
+    try:
+        from services import firebase_service
+        docs = firebase_service.list_tasks()
+    except Exception as e:  # storage trouble must not take the catalog down
+        logger.warning("loading tasks from storage failed: %s", e)
+        return None
+    tasks = []
+    for doc in docs:
+        try:
+            tasks.append(Task(**doc))
+        except (TypeError, ValueError) as e:
+            logger.warning("skipping invalid task %s: %s", doc.get("id"), e)
+    return tasks or list(DEFAULT_TASKS)
+
+
+def is_stale() -> bool:
+    return _catalog is None or time.monotonic() - _catalog.loaded_at > TTL
+
+
+def refresh() -> TaskCatalog:
+    with _lock:
+        return _reload()
+
+
+def get_catalog() -> TaskCatalog:
+    if is_stale():
+        with _lock:
+            if is_stale():  # another thread may have reloaded while we waited
+                return _reload()
+    return _catalog
+
+
+def _reload() -> TaskCatalog:
+    global _catalog
+    tasks = _load()
+    if tasks is None:
+        if _catalog is not None:
+            _catalog.loaded_at = time.monotonic()  # keep serving the last good catalog, retry after TTL
+            return _catalog
+        tasks = list(DEFAULT_TASKS)
+    _catalog = TaskCatalog(tasks)
+    logger.info("task catalog loaded: %d tasks, etag %s", len(_catalog), _catalog.etag)
+    return _catalog
@@ -0,0 +1,260 @@
+"""
+timing_analysis.py
+
+Vectorized keystroke / idle-time dynamics for a session.
+
+Takes per-event timestamps (and optionally per-event keystroke counts) as
+NumPy arrays and derives inter-event interval statistics, idle gaps, burst
+segmentation and typing-rhythm measures without Python-level loops, so
+sessions with 100k+ events are analyzed in milliseconds.
+
+Functions:
+- timing_arrays(events: iterable) -> (timestamps, keystrokes)
+- analyze_timing(timestamps, keystrokes=None) -> {"features": {...}, "flags": [...]}
+- TimingAccumulator: the same measures updated one event at a time (live sessions)
+
+Both paths flag superhuman typing on the same statistic: keys per second
+over all multi-event bursts (total keys / total burst time). TimingAccumulator
+needs no NumPy; analyze_timing does (HAS_NUMPY).
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from utils.lazy import lazy_import
+from utils.metrics import timed
+
+np = lazy_import("numpy")  # loaded on first use, see utils/lazy.py; None when not installed
+HAS_NUMPY = np is not None
+
+IDLE_THRESHOLD_S = 60.0     # gap counted as idle time
+BURST_GAP_S = 2.0           # events closer than this belong to the same burst
+LONG_IDLE_S = 600.0         # single gap long enough to flag
+MAX_HUMAN_KEYS_PER_S = 15.0
+ROBOTIC_CV = 0.05           # interval coefficient of variation below this looks scripted
+MIN_EVENTS_FOR_RHYTHM = 20
+
+
+def timing_arrays(events: Iterable[Dict[str, Any]]) -> Tuple["np.ndarray", "np.ndarray"]:
+    """Collect timestamps and keystroke counts of an event list into arrays in one pass."""
+    ts = []
+    ks = []
+    for ev in events:
+        try:
+            t = float(ev.get("timestamp"))
+        except (TypeError, ValueError):
+            continue
+        payload = ev.get("payload")
+        k = payload.get("keystrokes") if isinstance(payload, dict) else None
+        ts.append(t)
+        ks.append(k if isinstance(k, (int, float)) else 0)
+    return np.asarray(ts, dtype=np.float64), np.asarray(ks, dtype=np.float64)
+
+
+@timed("timing_analysis")
+def analyze_timing(timestamps, keystrokes=None,
+                   idle_threshold: float = IDLE_THRESHOLD_S,
+                   burst_gap: float = BURST_GAP_S) -> Dict[str, Any]:
+    """
+    Interval distribution, idle gaps, bursts and typing rhythm for one session.
+    `keystrokes`, if given, is aligned with `timestamps` (0 for non-typing events).
+    """
+    ts = np.asarray(timestamps, dtype=np.float64)
+    ks = np.asarray(keystrokes, dtype=np.float64) if keystrokes is not None else None
+    n = ts.size
+    if n < 2:
+        return {"features": {"event_count": int(n)}, "flags": []}
+
+    if np.any(ts[1:] < ts[:-1]):
+        order = np.argsort(ts, kind="stable")
+        ts = ts[order]
+        if ks is not None:
+            ks = ks[order]
+
+    intervals = np.diff(ts)
+    duration = float(ts[-1] - ts[0])
+    mean = float(intervals.mean())
+    std = float(intervals.std())
+    p50, p90, p99 = (float(v) for v in np.percentile(intervals, [50, 90, 99]))
+
+    idle_mask = intervals > idle_threshold
+    idle_time = float(intervals[idle_mask].sum())
+    longest_gap = float(intervals.max())
+
+    # bursts: maximal runs of events separated by <= burst_gap
+    breaks = np.flatnonzero(intervals > burst_gap)
+    starts = np.concatenate(([0], breaks + 1))
+    ends = np.concatenate((breaks, [n - 1]))
+    burst_sizes = ends - starts + 1
+    burst_durations = ts[ends] - ts[starts]
+    multi = burst_sizes > 1
+
+    features = {
+        "event_count": int(n),
+        "interval_mean_s": round(mean, 4),
+        "interval_median_s": round(p50, 4),
+        "interval_p90_s": round(p90, 4),
+        "interval_p99_s": round(p99, 4),
+        "interval_cv": round(std / mean, 4) if mean > 0 else 0.0,
+        "idle_gaps": int(idle_mask.sum()),
+        "idle_time_s": round(idle_time, 3),
+        "idle_ratio": round(idle_time / duration, 4) if duration > 0 else 0.0,
+        "longest_gap_s": round(longest_gap, 3),
+        "active_time_s": round(duration - idle_time, 3),
+        "burst_count": int(multi.sum()),
+        "burst_mean_events": round(float(burst_sizes[multi].mean()), 3) if multi.any() else 0.0,
+        "burst_max_events": int(burst_sizes.max()),
+    }
+
+    flags: List[str] = []
+    if longest_gap > LONG_IDLE_S:
+        flags.append("long_idle")
+    if n >= MIN_EVENTS_FOR_RHYTHM and mean > 0 and std / mean < ROBOTIC_CV:
+        flags.append("robotic_rhythm")
+
+    if ks is not None and ks.size == n:
+        total_keys = float(ks.sum())
+        features["keystrokes"] = int(total_keys)
+        # typing speed inside bursts: keys typed per second of burst time
+        burst_id = np.repeat(np.arange(starts.size), burst_sizes)
+        keys_per_burst = np.bincount(burst_id, weights=ks, minlength=starts.size)
+        has_duration = multi & (burst_durations > 0)
+        if has_duration.any():
+            rates = keys_per_burst[has_duration] / burst_durations[has_duration]
+            rate_mean = float(keys_per_burst[has_duration].sum() / burst_durations[has_duration].sum())
+            features["typing_rate_mean"] = round(rate_mean, 3)
+            features["typing_rate_median"] = round(float(np.median(rates)), 3)
+            features["typing_rate_max"] = round(float(rates.max()), 3)
+            features["typing_rate_cv"] = round(float(rates.std() / rates.mean()), 4) if rates.mean() > 0 else 0.0
+            if rate_mean > MAX_HUMAN_KEYS_PER_S:
+                flags.append("superhuman_typing")
+
+    return {"features": features, "flags": flags}
+
+
+class TimingAccumulator:
+    """
+    Constant-time, constant-memory counterpart of analyze_timing for live
+    sessions: add() one event at a time, result() at any point. Interval mean
+    and variance use Welford's update; percentiles are not tracked. Events
+    arriving slightly out of order count as zero-length intervals.
+
+    to_state() / from_state() round-trip through JSON for checkpoints.
+    """
+
+    _FIELDS = ("n", "first", "last", "mean", "m2", "longest_gap", "idle_gaps", "idle_time",
+               "burst_count", "burst_len", "burst_start", "burst_keys", "burst_max_events",
+               "burst_time", "burst_key_total", "rate_max", "keystrokes")
+
+    def __init__(self, idle_threshold: float = IDLE_THRESHOLD_S, burst_gap: float = BURST_GAP_S):
+        self.idle_threshold = idle_threshold
+        self.burst_gap = burst_gap
+        self.n = 0
+        self.first = None
+        self.last = None
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.longest_gap = 0.0
+        self.idle_gaps = 0
+        self.idle_time = 0.0
+        self.burst_count = 0        # completed bursts with more than one event
+        self.burst_len = 0          # current burst
+        self.burst_start = None
+        self.burst_keys = 0.0
+        self.burst_max_events = 0
+        self.burst_time = 0.0       # summed duration / keys of completed timed bursts
+        self.burst_key_total = 0.0
+        self.rate_max = 0.0
+        self.keystrokes = 0.0
+
+    def add(self, timestamp: float, keystrokes: float = 0.0) -> None:
+        self.n += 1
+        self.keystrokes += keystrokes
+        if self.last is None:
+            self.first = self.last = timestamp
+            self.burst_start = timestamp
+            self.burst_len = 1
+            self.burst_keys = keystrokes
+            self.burst_max_events = 1
+            return
+
+        prev = self.last
+        gap = max(0.0, timestamp - prev)
+        self.last = max(prev, timestamp)
+        k = self.n - 1  # number of intervals so far
+        delta = gap - self.mean
+        self.mean += delta / k
+        self.m2 += delta * (gap - self.mean)
+        if gap > self.longest_gap:
+            self.longest_gap = gap
+        if gap > self.idle_threshold:
+            self.idle_gaps += 1
+            self.idle_time += gap
+
+        if gap > self.burst_gap:
+            self._close_burst(prev)
+            self.burst_start = timestamp
+            self.burst_len = 1
+            self.burst_keys = keystrokes
+        else:
+            self.burst_len += 1
+            self.burst_keys += keystrokes
+        if self.burst_len > self.burst_max_events:
+            self.burst_max_events = self.burst_len
+
+    def _close_burst(self, end: float) -> None:
+        if self.burst_len > 1:
+            self.burst_count += 1
+            duration = end - self.burst_start
+            if duration > 0:
+                self.burst_time += duration
+                self.burst_key_total += self.burst_keys
+                self.rate_max = max(self.rate_max, self.burst_keys / duration)
+
+    def result(self) -> Dict[str, Any]:
+        features: Dict[str, Any] = {"event_count": self.n}
+        if self.n < 2:
+            return {"features": features, "flags": []}
+        duration = self.last - self.first
+        std = (self.m2 / (self.n - 1)) ** 0.5
+        open_burst = 1 if self.burst_len > 1 else 0
+        features.update({
+            "interval_mean_s": round(self.mean, 4),
+            "interval_cv": round(std / self.mean, 4) if self.mean > 0 else 0.0,
+            "idle_gaps": self.idle_gaps,
+            "idle_time_s": round(self.idle_time, 3),
+            "idle_ratio": round(self.idle_time / duration, 4) if duration > 0 else 0.0,
+            "longest_gap_s": round(self.longest_gap, 3),
+            "active_time_s": round(duration - self.idle_time, 3),
+            "burst_count": self.burst_count + open_burst,
+            "burst_max_events": self.burst_max_events,
+            "keystrokes": int(self.keystrokes),
+        })
+        flags: List[str] = []
+        if self.longest_gap > LONG_IDLE_S:
+            flags.append("long_idle")
+        if self.n >= MIN_EVENTS_FOR_RHYTHM and self.mean > 0 and std / self.mean < ROBOTIC_CV:
+            flags.append("robotic_rhythm")
+        # the open burst counts as if it ended now, as the last burst does in analyze_timing
+        burst_time, burst_keys, rate_max = self.burst_time, self.burst_key_total, self.rate_max
+        open_duration = self.last - self.burst_start
+        if open_burst and open_duration > 0:
+            burst_time += open_duration
+            burst_keys += self.burst_keys
+            rate_max = max(rate_max, self.burst_keys / open_duration)
+        if burst_time > 0:
+            features["typing_rate_mean"] = round(burst_keys / burst_time, 3)
+            features["typing_rate_max"] = round(rate_max, 3)
+            if burst_keys / burst_time > MAX_HUMAN_KEYS_PER_S:
+                flags.append("superhuman_typing")
+        return {"features": features, "flags": flags}
+
+    def to_state(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self._FIELDS}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any], **kwargs) -> "TimingAccumulator":
+        acc = cls(**kwargs)
+        for name in cls._FIELDS:
+            if name in state:
+                setattr(acc, name, state[name])
+        return acc
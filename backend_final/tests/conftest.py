@@ -0,0 +1,11 @@
+import os
+import tempfile
+
+# SQLite-backed stores read their paths at import time; keep test data out of the working tree
+_tmp = tempfile.mkdtemp(prefix="backend-tests-")
+for var, name in (("EVENT_STORE_DB", "events.db"), ("BLOB_STORE_DB", "blobs.db"),
+                  ("FEATURE_STORE_DB", "features.db"), ("LIVE_STATE_DB", "live.db"),
+                  ("NARRATIVE_STORE_DB", "narratives.db")):
+    os.environ.setdefault(var, os.path.join(_tmp, name))
+os.environ.setdefault("FIREBASE_BACKEND", "local")
+os.environ.setdefault("ADMISSION_CONTROL", "0")
@@ -0,0 +1,34 @@
+import uuid
+
+from models.task_model import Task
+from services import adaptive_selection, feature_store, task_catalog
+
+
+def _install_catalog(monkeypatch, n=30):
+    tasks = [Task(id=f"AT{i:03d}", title=f"t{i}", description="d", tags=["even" if i % 2 else "odd"],
+                  difficulty=1 + i % 10) for i in range(n)]
+    monkeypatch.setattr(task_catalog, "_catalog", task_catalog.TaskCatalog(tasks))
+    return tasks
+
+
+def test_calibration_stored_by_another_worker_rebuilds_the_bank(monkeypatch):
+    _install_catalog(monkeypatch)
+    monkeypatch.setattr(adaptive_selection, "CALIBRATION_CHECK_S", 0.0)
+    bank = adaptive_selection.get_bank()
+    assert adaptive_selection.get_bank() is bank
+    feature_store.save_item_params([("AT003", 1.0, 2.5, 40)])  # as calibrate() in another process would
+    rebuilt = adaptive_selection.get_bank()
+    assert rebuilt is not bank
+    assert rebuilt.b[rebuilt.index["AT003"]] == 2.5
+
+
+def test_next_task_picks_from_the_bank_catalog(monkeypatch):
+    _install_catalog(monkeypatch)
+    candidate = f"cand-{uuid.uuid4().hex}"
+    bank = adaptive_selection.get_bank()
+    # a newer, smaller catalog appearing mid-request must not be indexed with the old bank's positions
+    monkeypatch.setattr(adaptive_selection, "get_bank", lambda: bank)
+    monkeypatch.setattr(task_catalog, "_catalog", task_catalog.TaskCatalog(task_catalog.DEFAULT_TASKS))
+    picked = adaptive_selection.next_task(candidate, tags=["even"])
+    assert picked["task"]["id"] in bank.task_ids
+    assert "even" in picked["task"]["tags"]
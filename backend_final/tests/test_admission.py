@@ -0,0 +1,42 @@
+import asyncio
+
+from utils import admission
+
+
+def _scope(peer, *headers):
+    return {"type": "http", "path": "/api/submit", "client": (peer, 5000),
+            "headers": [(k.encode(), v.encode()) for k, v in headers]}
+
+
+def test_direct_clients_are_keyed_by_address_whatever_they_claim():
+    assert admission._user_key(_scope("1.2.3.4", ("x-user-id", "alice")), frozenset()) == "1.2.3.4"
+
+
+def test_trusted_proxy_forwards_the_user():
+    trusted = frozenset({"10.0.0.1"})
+    assert admission._user_key(_scope("10.0.0.1", ("x-user-id", "alice")), trusted) == "user:alice"
+    # only the hop the proxy appended counts, not what the client put in front of it
+    assert admission._user_key(_scope("10.0.0.1", ("x-forwarded-for", "6.6.6.6, 5.5.5.5")), trusted) == "5.5.5.5"
+    assert admission._user_key(_scope("10.0.0.1"), trusted) == "10.0.0.1"
+
+
+def test_rotating_user_header_does_not_reset_the_rate_limit():
+    sent = []
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            sent.append(message["status"])
+
+    async def run():
+        mw = admission.AdmissionMiddleware(app, trusted_proxies=())
+        for i in range(10):
+            await mw(_scope("1.2.3.4", ("x-user-id", f"u{i}")), None, send)
+
+    asyncio.run(run())
+    burst = next(p.burst for p in admission.DEFAULT_POLICIES if p.name == "submit")
+    assert sent.count(200) == int(burst)
+    assert sent.count(429) == 10 - int(burst)
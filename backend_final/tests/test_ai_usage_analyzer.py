@@ -0,0 +1,22 @@
+from services import ai_usage_analyzer
+from services.evaluation_engine import evaluate_event_stream
+
+EVENTS = [
+    {"event_type": "ai_query", "payload": {"relevant": True}, "timestamp": 10},
+    {"event_type": "paste", "payload": None, "timestamp": 15},
+    {"event_type": "edit", "payload": "not an object", "timestamp": 20},
+    {"event_type": "edit", "payload": None, "timestamp": 22},
+    {"event_type": "edit", "payload": {}, "timestamp": 25},
+]
+
+
+def test_null_and_non_object_payloads_do_not_fail_the_analysis():
+    result = ai_usage_analyzer.analyze_ai_usage(EVENTS, paste_windows=(10,), edit_windows=(30,))
+    assert (result["ai_queries"], result["copy_paste_total"], result["paste_after_ai"]) == (1, 1, 1)
+    assert result["edits_after_ai"] == 2  # the string-payload edit is skipped
+    assert result["window_attribution"]["edit_windows"]["30"]["attributed"] == 2
+
+
+def test_streaming_evaluation_survives_a_null_payload():
+    result = evaluate_event_stream(iter(EVENTS))
+    assert result["fuzzy_result"]["ai_analysis"]["copy_paste_total"] == 1
@@ -0,0 +1,28 @@
+import uuid
+
+from services import blob_store, event_ingest, event_store
+
+
+def test_blob_is_collected_when_the_last_reference_goes():
+    code = f"print({uuid.uuid4().hex!r})"
+    code_hash = blob_store.put(code)
+    assert blob_store.put_many([code], refs=2) == [code_hash]
+    assert blob_store.release(code_hash, 2) == 1
+    assert blob_store.get(code_hash) == code
+    assert blob_store.release(code_hash) == 0
+    assert blob_store.get(code_hash) is None
+    assert blob_store.release(code_hash) == 0  # already gone
+
+
+def test_deleting_a_session_releases_its_code():
+    shared, own = f"x = {uuid.uuid4().hex!r}", f"y = {uuid.uuid4().hex!r}"
+    first, second = f"s-{uuid.uuid4().hex}", f"s-{uuid.uuid4().hex}"
+    event_ingest.store_events(first, [{"event_type": "edit", "timestamp": 1.0, "payload": {"code": shared}},
+                                      {"event_type": "edit", "timestamp": 2.0, "payload": {"code": own}},
+                                      {"event_type": "edit", "timestamp": 3.0, "payload": {"code": own}}])
+    event_ingest.store_events(second, [{"event_type": "edit", "timestamp": 1.0, "payload": {"code": shared}}])
+
+    assert event_ingest.delete_session(first) == 3
+    assert event_store.count_events(first) == 0
+    assert blob_store.get(blob_store.hash_code(own)) is None
+    assert blob_store.get(blob_store.hash_code(shared)) == shared  # still referenced by the second session
@@ -0,0 +1,33 @@
+from models.candidate_model import CandidateAttempt, CodeSnapshot, LazyModelList
+
+ATTEMPT = {
+    "candidate_id": "c1",
+    "task_id": "TAPI1",
+    "session_start": 0,
+    "session_end": 60,
+    "code_snapshots": [{"timestamp": 1, "code": "a = 1"}, {"timestamp": 2, "run_status": "ok"}],
+    "ai_interactions": [{"timestamp": 3, "query": "why?"}],
+    "behavior_metrics": {"total_runs": 2},
+}
+
+
+def test_trusted_attempt_dumps_like_a_validated_one():
+    validated = CandidateAttempt(**ATTEMPT)
+    assert CandidateAttempt.from_trusted(ATTEMPT).model_dump() == validated.model_dump()
+    assert CandidateAttempt.from_trusted(ATTEMPT).model_dump_json() == validated.model_dump_json()
+
+
+def test_lazy_list_returns_models_from_every_accessor():
+    items = LazyModelList(CodeSnapshot, [{"timestamp": 1}, {"timestamp": 2}, {"timestamp": 3}])
+    assert isinstance(next(reversed(items)), CodeSnapshot)
+    assert items.pop().timestamp == 3
+    assert items.index(CodeSnapshot(timestamp=2)) == 1
+    assert all(isinstance(item, CodeSnapshot) for item in items.copy())
+    assert items == [CodeSnapshot(timestamp=1), CodeSnapshot(timestamp=2)]
+
+
+def test_lazy_list_validates_only_what_is_read():
+    items = LazyModelList(CodeSnapshot, [{"timestamp": 1}, {"timestamp": 2}])
+    assert isinstance(items[0], CodeSnapshot)
+    assert isinstance(list(items.raw())[1], dict)
+    assert items.pending
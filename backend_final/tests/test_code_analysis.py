@@ -0,0 +1,27 @@
+from fastapi.testclient import TestClient
+
+import main
+from services import code_analysis
+
+DEEP_EXPRESSION = "x=" + "+".join(["1"] * 5000)
+
+
+def test_too_deep_for_the_parser_is_a_parse_failure():
+    assert code_analysis.analyze_code(DEEP_EXPRESSION)["parsed"] is False
+
+
+def test_nesting_depth_of_long_chains():
+    # parses fine but is far deeper than the recursion limit
+    result = code_analysis.analyze_code("x=" + "+".join(["1"] * 2000))
+    assert result["parsed"] is True
+    assert result["max_nesting"] == 0
+    nested = "def f(x):\n    for i in x:\n        if i:\n            try:\n                pass\n            except ValueError:\n                raise\n"
+    assert code_analysis.analyze_code(nested)["max_nesting"] == 4
+
+
+def test_evaluate_route_survives_deeply_nested_code():
+    client = TestClient(main.app)
+    attempt = {"candidate_id": "c1", "task_id": "TAPI1", "session_start": 0, "session_end": 60,
+               "code_snapshots": [{"timestamp": 1, "code": "a = 1"}, {"timestamp": 2, "code": DEEP_EXPRESSION}]}
+    resp = client.post("/candidate/evaluate", json=attempt)
+    assert resp.status_code == 200
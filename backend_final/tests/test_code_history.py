@@ -0,0 +1,66 @@
+import random
+
+from models.candidate_model import CandidateAttempt
+from models.code_history import CodeHistory, apply_delta, diff_lines
+
+
+def _edits(n, seed=0):
+    """n successive versions of a file, each a few random line edits away from the last."""
+    rng = random.Random(seed)
+    lines = [f"line {i}\n" for i in range(30)]
+    versions = []
+    for step in range(n):
+        for _ in range(rng.randint(1, 4)):
+            op = rng.random()
+            pos = rng.randrange(len(lines) + 1)
+            if op < 0.4 or len(lines) < 5:
+                lines.insert(pos, f"added {step}\n")
+            elif op < 0.7:
+                del lines[min(pos, len(lines) - 1)]
+            else:
+                lines[min(pos, len(lines) - 1)] = f"changed {step}\n"
+        code = "".join(lines)
+        # the editor does not always end the buffer with a newline
+        versions.append(code.rstrip("\n") if step % 3 == 0 else code)
+    return versions
+
+
+def test_delta_round_trip():
+    versions = _edits(50)
+    for old, new in zip(versions, versions[1:]):
+        assert apply_delta(old, diff_lines(old, new)) == new
+
+
+def test_every_version_rebuilds_in_any_order():
+    versions = _edits(60, seed=1)
+    history = CodeHistory.from_codes(versions, keyframe_interval=7)
+    assert list(history.iter_codes()) == versions
+    order = list(range(len(versions)))
+    random.Random(2).shuffle(order)
+    for i in order:
+        assert history.get(i) == versions[i]
+    assert history.get(-1) == versions[-1]
+
+
+def test_history_survives_serialization():
+    versions = _edits(40, seed=3)
+    history = CodeHistory.from_codes(versions, keyframe_interval=10)
+    restored = CodeHistory.model_validate(history.model_dump())
+    assert [restored.get(i) for i in range(len(versions))] == versions
+    # appending after a reload diffs against the stored last version
+    restored.append(versions[0])
+    assert restored.get(len(versions)) == versions[0]
+
+
+def test_compacted_attempt_reads_back_snapshot_code():
+    versions = _edits(25, seed=4)
+    codes = [versions[0]] + versions + [versions[-1]]  # repeated code shares one history entry
+    attempt = CandidateAttempt(candidate_id="c1", task_id="t1", session_start=0, session_end=100,
+                               code_snapshots=[{"timestamp": i, "code": c} for i, c in enumerate(codes)])
+    attempt.compact_code_history(keyframe_interval=5)
+    assert all(snap.code is None for snap in attempt.code_snapshots)
+    assert len(attempt.code_history) == len(versions)
+    assert [attempt.snapshot_code(i) for i in range(len(codes))] == codes
+
+    stored = CandidateAttempt.from_trusted(attempt.model_dump())
+    assert [stored.snapshot_code(i) for i in range(len(codes))] == codes
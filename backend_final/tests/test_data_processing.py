@@ -0,0 +1,51 @@
+from benchmarks.synthetic import session_attempt
+from models.candidate_model import CandidateAttempt
+from services import data_processing, evaluation_engine
+
+
+def _concatenated_and_sorted(attempt):
+    # the order attempt_to_events must reproduce: editor events, then AI, then the explanation, stably sorted
+    editor, ai = [], []
+    for snap in attempt.code_snapshots:
+        editor.append(("edit", snap.timestamp))
+        if snap.run_status:
+            editor.append(("run", snap.timestamp))
+    ai = [("ai_query", item.timestamp) for item in attempt.ai_interactions]
+    tail = [("self_explanation", attempt.session_end)] if attempt.self_explanation else []
+    return sorted(editor + ai + tail, key=lambda e: e[1])
+
+
+def test_attempt_events_are_merged_in_time_order():
+    for seed in range(3):
+        attempt = CandidateAttempt(**session_attempt(60, seed=seed))
+        events = data_processing.attempt_to_events(attempt)
+        assert [(ev["event_type"], ev["timestamp"]) for ev in events] == _concatenated_and_sorted(attempt)
+
+
+def test_out_of_order_source_and_same_second_snapshots():
+    attempt = CandidateAttempt(
+        candidate_id="c1", task_id="t1", session_start=0, session_end=100, self_explanation="why",
+        code_snapshots=[{"timestamp": 5, "code": "a"}, {"timestamp": 5, "code": "b", "run_status": "ok"},
+                        {"timestamp": 9, "code": "c"}],
+        ai_interactions=[{"timestamp": 7, "query": "q2"}, {"timestamp": 3, "query": "q1"}],
+    )
+    events = data_processing.attempt_to_events(attempt)
+    assert [(ev["event_type"], ev["timestamp"]) for ev in events] == _concatenated_and_sorted(attempt)
+    assert sum(ev["event_type"] == "edit" for ev in events) == 3  # same-second snapshots are both kept
+
+
+def test_compacted_history_keeps_version_keys():
+    # A-B-A: two distinct versions whether the code is inline or in the delta history
+    attempt = CandidateAttempt(candidate_id="c1", task_id="t1", session_start=0, session_end=100,
+                               code_snapshots=[{"timestamp": i, "code": c} for i, c in enumerate("aba")])
+    inline = data_processing.attempt_to_events(attempt)
+    attempt.compact_code_history()
+    assert data_processing.attempt_to_events(attempt) == inline
+    assert evaluation_engine.extract_core_features(inline)["unique_versions"] == 2
+
+
+def test_merge_drops_duplicates_only_inside_the_window():
+    a = [{"event_type": "run", "timestamp": t} for t in (1, 2, 3)]
+    b = [{"event_type": "run", "timestamp": t} for t in (2, 3, 4)]
+    assert [ev["timestamp"] for ev in data_processing.merge_event_streams(a, b)] == [1, 2, 3, 4]
+    assert len(list(data_processing.merge_event_streams(a, b, dedup_window=None))) == 6
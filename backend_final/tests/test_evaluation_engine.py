@@ -0,0 +1,56 @@
+import pytest
+
+from services import evaluation_engine
+from utils import metrics
+
+DEMO_EVENTS = [
+    {"event_type": "edit", "payload": {"keystrokes": 30, "code_hash": "a"}, "timestamp": 1},
+    {"event_type": "run", "payload": {"result": "fail"}, "timestamp": 2},
+    {"event_type": "ai_query", "payload": {"relevant": True}, "timestamp": 3},
+    {"event_type": "run", "payload": {"result": "success"}, "timestamp": 60},
+    {"event_type": "edit", "payload": {"keystrokes": 40, "code_hash": "b"}, "timestamp": 70},
+    {"event_type": "self_explanation", "payload": {"text": "checked the endpoints"}, "timestamp": 80},
+]
+
+
+def _metrics(rs, de, ad, ea):
+    return {"reasoning_score": rs, "debugging_efficiency": de, "adaptability": ad, "ethical_ai_usage": ea}
+
+
+@pytest.mark.parametrize("metrics, expected", [
+    (_metrics(1.0, 1.0, 1.0, 1.0), 83.33),
+    (_metrics(0.5, 0.5, 0.5, 0.5), 55.0),
+    (_metrics(0.2, 0.1, 0.3, 0.9), 31.0),
+])
+def test_fuzzy_score_follows_core_metrics(metrics, expected):
+    # the raw counts must not matter: runs=1, edits=1 once read as "already normalized" metrics
+    score, _, membership = evaluation_engine.fuzzy_score(metrics, {"runs": 1, "edits": 1, "ai_queries": 0})
+    assert score == expected
+    assert membership is not None
+
+
+def test_final_score_for_known_session():
+    result = evaluation_engine.evaluate_candidate_session({"events": DEMO_EVENTS})
+    assert result["core_metrics"] == _metrics(0.567, 0.5, 0.397, 0.917)
+    assert result["final_score"] == 55.0
+    assert result["fuzzy_result"]["summary"] == \
+        "moderate debugging; ethical AI use; moderate adaptability; some reasoning evidence"
+
+
+def test_timing_and_code_features_reach_the_score():
+    features = dict(evaluation_engine.extract_core_features(DEMO_EVENTS), successful_runs=2)
+    assert evaluation_engine.score_features(dict(features), None)["final_score"] == 80.0
+    # active time from the timing stage replaces the wall-clock duration in adaptability
+    assert evaluation_engine.score_features(dict(features, active_time_s=20), None)["final_score"] == 79.03
+    structured = evaluation_engine.score_features(
+        dict(features, code_complexity=2, code_functions=3, code_error_handling=1.0, code_max_nesting=1), None)
+    assert structured["core_metrics"]["reasoning_score"] == 0.653
+
+
+def test_fuzzy_scoring_is_timed_for_either_engine(monkeypatch):
+    stage = metrics.histogram(metrics.STAGE_METRIC, stage="fuzzy_scoring")
+    before = stage.count
+    evaluation_engine.fuzzy_score(_metrics(0.5, 0.5, 0.5, 0.5), {})
+    monkeypatch.setattr(evaluation_engine, "fuzzy_evaluate", lambda runs, ai_queries, edits: (50.0, "external"))
+    assert evaluation_engine.fuzzy_score(_metrics(0.5, 0.5, 0.5, 0.5), {})[:2] == (50.0, "external")
+    assert stage.count == before + 2
@@ -0,0 +1,68 @@
+import asyncio
+import gzip
+import json
+import uuid
+
+from fastapi.testclient import TestClient
+
+import main
+from services import event_ingest, event_store
+
+
+def _ndjson(events):
+    return b"".join(json.dumps(ev).encode() + b"\n" for ev in events)
+
+
+def _events(n, start=0):
+    return [{"event_type": "edit", "timestamp": float(start + i), "payload": {"keystrokes": i}} for i in range(n)]
+
+
+def _ingest(body, chunk_size, gzipped=True, batch_size=event_ingest.BATCH_SIZE):
+    session_id = f"ing-{uuid.uuid4().hex}"
+
+    async def chunks():
+        for i in range(0, len(body), chunk_size):
+            yield body[i:i + chunk_size]
+
+    result = asyncio.run(event_ingest.ingest_ndjson_stream(session_id, chunks(), gzipped=gzipped, batch_size=batch_size))
+    return session_id, result
+
+
+def test_plain_ndjson_counts_rejects_and_stores_in_batches():
+    body = _ndjson(_events(25)) + b"not json\n\n[1, 2]\n" + _ndjson([{"event_type": "teleport", "timestamp": 1}])
+    session_id, result = _ingest(body, chunk_size=13, gzipped=False, batch_size=10)
+    assert (result["accepted"], result["rejected"]) == (25, 3)
+    assert [ev["timestamp"] for ev in event_store.iter_events(session_id)] == [float(i) for i in range(25)]
+
+
+def test_multi_member_gzip_body_is_read_to_the_end():
+    body = gzip.compress(_ndjson(_events(300))) + gzip.compress(_ndjson(_events(200, start=300))) + b"\x00" * 8
+    for chunk_size in (7, 4096, len(body)):
+        session_id, result = _ingest(body, chunk_size)
+        assert result["accepted"] == 500
+        assert event_store.count_events(session_id) == 500
+
+
+def test_gzip_route_and_invalid_stream():
+    client = TestClient(main.app)
+    session_id = f"ing-{uuid.uuid4().hex}"
+    body = gzip.compress(_ndjson(_events(3))) + gzip.compress(_ndjson(_events(2, start=3)))
+    resp = client.post(f"/candidate/sessions/{session_id}/events", content=body,
+                       headers={"Content-Type": "application/x-ndjson", "Content-Encoding": "gzip"})
+    assert resp.status_code == 200
+    assert resp.json()["accepted"] == 5
+
+    resp = client.post(f"/candidate/sessions/{session_id}/events", content=b"\x1f\x8bnot really gzip",
+                       headers={"Content-Encoding": "gzip"})
+    assert resp.status_code == 400
+
+
+def test_truncated_gzip_body_is_rejected():
+    client = TestClient(main.app)
+    session_id = f"ing-{uuid.uuid4().hex}"
+    complete = gzip.compress(_ndjson(_events(3)))
+    for body in (complete[:-4], complete + gzip.compress(_ndjson(_events(2)))[:20]):
+        resp = client.post(f"/candidate/sessions/{session_id}/events", content=body,
+                           headers={"Content-Type": "application/x-ndjson", "Content-Encoding": "gzip"})
+        assert resp.status_code == 400
+        assert "truncated" in resp.json()["detail"]
@@ -0,0 +1,63 @@
+import os
+import tempfile
+
+from services import event_log
+from services.ai_usage_analyzer import analyze_ai_usage
+from services.evaluation_engine import evaluate_session_from_log
+
+EVENTS = [
+    {"event_type": "edit", "timestamp": 100.0, "payload": {"keystrokes": 5}},
+    {"event_type": "run", "payload": {"result": "pass"}},  # no timestamp
+    {"event_type": "ai_query", "timestamp": None, "payload": {"relevant": True}},
+    {"event_type": "edit", "timestamp": "soon", "payload": {"keystrokes": 2}},
+    {"event_type": "run", "timestamp": 160.0, "payload": {"result": "fail"}},
+]
+
+
+def _log(events):
+    path = os.path.join(tempfile.mkdtemp(), "session.evlog")
+    event_log.write_event_log(path, events)
+    return path
+
+
+def test_missing_timestamps_do_not_stretch_the_duration():
+    path = _log(EVENTS)
+    with event_log.EventLogReader(path) as reader:
+        assert reader.extract_features()["duration_s"] == 60.0
+        assert reader._extract_features_scalar()["duration_s"] == 60.0
+        assert ["timestamp" in ev for ev in reader.iter_events()] == [True, False, False, False, True]
+        timestamps, _ = reader.timing_arrays()
+        assert list(timestamps) == [100.0, 160.0]
+    assert evaluate_session_from_log(path)["features"]["duration_s"] == 60.0
+
+
+def test_log_without_any_timestamp():
+    with event_log.EventLogReader(_log([{"event_type": "edit"}, {"event_type": "run"}])) as reader:
+        assert reader.extract_features()["duration_s"] == 0.0
+        assert reader._extract_features_scalar()["duration_s"] == 0.0
+
+
+def test_ai_analysis_decodes_only_the_payloads_it_reads():
+    events = [
+        {"event_type": "ai_query", "timestamp": 1.0, "payload": {"relevant": True, "response": "def f(x):\n    return x * 2\n"}},
+        {"event_type": "paste", "timestamp": 50.0, "payload": {"text": "def f(x):\n    return x * 2\n"}},
+        {"event_type": "edit", "timestamp": 60.0, "payload": {"keystrokes": 9, "code_hash": "abc"}},
+    ]
+    path = _log(events)
+    with event_log.EventLogReader(path) as reader:
+        payloads = [ev["payload"] for ev in reader.iter_events(payload_types=("ai_query", "paste"))]
+    assert payloads == [events[0]["payload"], events[1]["payload"], {}]
+    expected = analyze_ai_usage([dict(ev) for ev in events])
+    assert evaluate_session_from_log(path)["fuzzy_result"]["ai_analysis"] == expected
+
+
+def test_empty_log_file_has_no_events():
+    path = os.path.join(tempfile.mkdtemp(), "fresh.evlog")
+    open(path, "wb").close()  # what a session leaves before its first flush
+    with event_log.EventLogReader(path) as reader:
+        assert len(reader) == 0
+        assert list(reader.iter_events()) == []
+        assert reader.extract_features()["runs"] == 0
+        assert reader._extract_features_scalar()["runs"] == 0
+        assert len(reader.columns()) == 0
+    assert evaluate_session_from_log(path)["features"]["edits"] == 0
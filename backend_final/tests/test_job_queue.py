@@ -0,0 +1,100 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from services import job_queue
+
+
+def _events(lines):
+    """(event, data) pairs from an SSE line iterator, skipping comments."""
+    event = None
+    for line in lines:
+        if line.startswith("event: "):
+            event = line[len("event: "):]
+        elif line.startswith("data: "):
+            yield event, json.loads(line[len("data: "):])
+
+
+def test_submit_runs_job_and_keeps_result():
+    q = job_queue.JobQueue(workers=1, max_pending=10)
+    job_id = q.submit("add", lambda a, b: a + b, 2, 3)
+    job = q.get(job_id)
+    assert job.done.wait(5)
+    assert job.to_dict() == dict(job.to_dict(include_result=False), result=5)
+    assert job.status == job_queue.DONE
+
+
+def test_failed_job_reports_error():
+    def boom():
+        raise ValueError("bad input")
+
+    q = job_queue.JobQueue(workers=1, max_pending=10)
+    job = q.get(q.submit("boom", boom))
+    assert job.done.wait(5)
+    assert job.status == job_queue.FAILED
+    assert job.to_dict()["error"] == "ValueError: bad input"
+
+
+def test_full_queue_rejects_and_forgets_job():
+    release = threading.Event()
+    q = job_queue.JobQueue(workers=1, max_pending=1)
+    q.submit("block", release.wait)
+    time.sleep(0.1)  # the worker has taken the first job
+    q.submit("queued", lambda: None)
+    with pytest.raises(job_queue.QueueFull):
+        q.submit("overflow", lambda: None)
+    assert q.stats()["jobs"][job_queue.QUEUED] == 1
+    release.set()
+
+
+def test_process_workers_do_not_fork_the_server():
+    q = job_queue.JobQueue(workers=1, max_pending=10, mode="process")
+    try:
+        assert q._pool._mp_context.get_start_method() == job_queue.START_METHOD != "fork"
+        job = q.get(q.submit("pid", os.getpid))
+        assert job.done.wait(30)
+        assert job.status == job_queue.DONE and job.result != os.getpid()
+    finally:
+        q.shutdown()
+
+
+def test_lifespan_starts_and_stops_the_queue():
+    job_queue.shutdown_queue()
+    with TestClient(main.app):
+        assert job_queue.queue_stats() is not None
+    assert job_queue.queue_stats() is None
+
+
+def test_sse_stream_ends_with_result():
+    client = TestClient(main.app)
+    job_id = job_queue.get_queue().submit("slow", lambda: time.sleep(0.3) or {"ok": True})
+    with client.stream("GET", f"/jobs/{job_id}/events") as resp:
+        events = list(_events(resp.iter_lines()))
+    assert events[-1][0] == job_queue.DONE
+    assert events[-1][1]["result"] == {"ok": True}
+
+
+def test_sse_sends_final_event_when_done_follows_status_change():
+    # status flips to done before done.set() (as in the worker); the stream must still finish
+    job = job_queue.Job("manual", None, (), {})
+    q = job_queue.get_queue()
+    with q._lock:
+        q._jobs[job.id] = job
+    job.status = job_queue.DONE
+    job.result = 42
+
+    def finish():
+        time.sleep(0.3)
+        job.done.set()
+
+    threading.Thread(target=finish).start()
+    client = TestClient(main.app)
+    with client.stream("GET", f"/jobs/{job.id}/events") as resp:
+        events = list(_events(resp.iter_lines()))
+    assert [e for e, _ in events] == ["status", job_queue.DONE]
+    assert events[-1][1]["result"] == 42
@@ -0,0 +1,51 @@
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+import main
+
+
+def _url():
+    return f"/candidate/sessions/live-{uuid.uuid4().hex}/live"
+
+
+def test_resume_offset_counts_rejected_events():
+    client = TestClient(main.app)
+    url = _url()
+    with client.websocket_connect(url) as ws:
+        assert ws.receive_json()["events_seen"] == 0
+        ws.send_json([
+            {"event_type": "edit", "timestamp": 1.0, "payload": {"keystrokes": 3}},
+            {"event_type": "not_an_event", "timestamp": 2.0},
+            "garbage",
+        ])
+        update = ws.receive_json()
+        assert update["rejected"] == 2
+        assert update["events_seen"] == 3
+        ws.send_json({"event_type": "run", "timestamp": 3.0})
+        assert ws.receive_json()["events_seen"] == 4
+
+    with client.websocket_connect(url) as ws:
+        ready = ws.receive_json()
+    assert ready["resumed"] is True
+    assert ready["events_seen"] == 4
+    assert ready["last_timestamp"] == 3.0
+
+
+def test_binary_frame_closes_with_unsupported_data():
+    client = TestClient(main.app)
+    url = _url()
+    with client.websocket_connect(url) as ws:
+        ws.receive_json()
+        ws.send_json({"event_type": "edit", "timestamp": 1.0})
+        ws.receive_json()
+        ws.send_bytes(b"\x00\x01")
+        with pytest.raises(WebSocketDisconnect) as exc:
+            ws.receive_json()
+    assert exc.value.code == 1003
+
+    # what was received before the binary frame is still checkpointed
+    with client.websocket_connect(url) as ws:
+        assert ws.receive_json()["events_seen"] == 1
@@ -0,0 +1,34 @@
+import threading
+
+from utils import metrics
+
+
+def test_render_while_other_threads_register_series():
+    errors = []
+
+    def register(prefix):
+        for i in range(3000):
+            metrics.count("test_render_total", route=f"{prefix}{i}")
+            metrics.histogram("test_render_seconds", stage=f"{prefix}{i}").observe(0.001)
+
+    threads = [threading.Thread(target=register, args=(p,)) for p in "ab"]
+    for t in threads:
+        t.start()
+    while any(t.is_alive() for t in threads):
+        try:
+            metrics.render()
+        except RuntimeError as e:  # "dictionary changed size during iteration"
+            errors.append(e)
+    for t in threads:
+        t.join()
+    assert not errors
+    assert 'test_render_total{route="b2999"} 1' in metrics.render()
+
+
+def test_render_format():
+    metrics.count("test_format_total", 2, kind="x")
+    metrics.histogram("test_format_seconds", stage="y").observe(0.003)
+    text = metrics.render()
+    assert '# TYPE test_format_total counter\ntest_format_total{kind="x"} 2\n' in text
+    assert 'test_format_seconds_bucket{stage="y",le="0.005"} 1' in text
+    assert 'test_format_seconds_count{stage="y"} 1' in text
@@ -0,0 +1,54 @@
+import csv
+import gzip
+import io
+import json
+import uuid
+
+from fastapi.testclient import TestClient
+
+import main
+from services import firebase_service
+
+
+def _seed(n):
+    task_id = f"EXP-{uuid.uuid4().hex}"
+    for i in range(n):
+        scores = {"final_score": 50.0 + i, "core_metrics": {"reasoning_score": 0.5, "debugging_efficiency": 0.5,
+                                                           "adaptability": 0.5, "ethical_ai_usage": 0.5}}
+        firebase_service.save_evaluation(f"cand{i:03d}", task_id, scores, {})
+    return task_id
+
+
+def test_ndjson_export_pages_through_every_evaluation():
+    task_id = _seed(7)
+    resp = TestClient(main.app).get("/recruiter/export", params={
+        "task_id": task_id, "page_size": 3, "fields": "candidate_id,scores.final_score,summary.grade"})
+    assert resp.status_code == 200
+    rows = [json.loads(line) for line in resp.text.splitlines()]
+    assert [r["candidate_id"] for r in rows] == [f"cand{i:03d}" for i in range(7)]
+    assert rows[2]["scores.final_score"] == 52.0
+    assert all(r["summary.grade"] for r in rows)
+
+
+def test_gzip_csv_export():
+    task_id = _seed(4)
+    params = {"task_id": task_id, "format": "csv", "gzip": "true", "page_size": 2, "fields": "candidate_id,scores.core_metrics"}
+    with TestClient(main.app).stream("GET", "/recruiter/export", params=params) as resp:
+        assert resp.headers["content-type"].startswith("text/csv")
+        assert resp.headers["content-encoding"] == "gzip"
+        body = gzip.decompress(b"".join(resp.iter_raw()))
+    rows = list(csv.reader(io.StringIO(body.decode("utf-8"))))
+    assert rows[0] == ["candidate_id", "scores.core_metrics"]
+    assert len(rows) == 5
+    assert json.loads(rows[1][1])["reasoning_score"] == 0.5
+
+
+def test_csv_cells_cannot_start_a_formula():
+    task_id = f"EXP-{uuid.uuid4().hex}"
+    for cid in ("=HYPERLINK(\"http://x\")", "+1", "-2", "@SUM(A1)", "\tx", "plain"):
+        firebase_service.save_evaluation(cid, task_id, {"final_score": -1.5}, {})
+    resp = TestClient(main.app).get("/recruiter/export", params={
+        "task_id": task_id, "format": "csv", "fields": "candidate_id,scores.final_score"})
+    rows = list(csv.reader(io.StringIO(resp.text)))[1:]
+    assert sorted(r[0] for r in rows) == sorted(["'=HYPERLINK(\"http://x\")", "'+1", "'-2", "'@SUM(A1)", "'\tx", "plain"])
+    assert {r[1] for r in rows} == {"-1.5"}  # numbers are not text and are left alone
@@ -0,0 +1,23 @@
+import uuid
+
+from benchmarks.synthetic import session_attempt
+from models.candidate_model import CandidateAttempt
+from models.metrics_model import ScoringProfile
+from services import evaluation_engine, feature_store, scoring_profiles
+
+
+def test_fuzzy_only_profile_reproduces_final_score():
+    for seed in range(5):
+        result = evaluation_engine.evaluate_attempt(CandidateAttempt(**session_attempt(40, seed=seed)))
+        profile = ScoringProfile(fuzzy_blend=1.0)
+        assert scoring_profiles.score(result["core_metrics"], result["features"], profile) == round(result["final_score"], 2)
+
+
+def test_profile_saved_by_another_worker_is_picked_up(monkeypatch):
+    task_id = f"T-{uuid.uuid4().hex}"
+    assert scoring_profiles.get_profile(task_id).name == "default"
+    # another process writes straight to the store; this one only sees it once the cache entry expires
+    feature_store.save_profile(task_id, ScoringProfile(name="strict", fuzzy_blend=0.9).dict())
+    assert scoring_profiles.get_profile(task_id).name == "default"
+    monkeypatch.setattr(scoring_profiles, "PROFILE_CACHE_TTL", 0.0)
+    assert scoring_profiles.get_profile(task_id).name == "strict"
@@ -0,0 +1,56 @@
+import threading
+import uuid
+
+from services import similarity_index
+
+
+def test_signature_memo_under_concurrent_eviction():
+    index = similarity_index.MinHashLSHIndex()
+    texts = [f"def f{i}(x):\n    return x + {i}\n" for i in range(similarity_index.SIGNATURE_MEMO_SIZE * 2)]
+    expected = {t: index.signature(t) for t in texts}
+    errors = []
+
+    def hammer(offset):
+        try:
+            for _ in range(20):
+                for t in texts[offset:] + texts[:offset]:
+                    assert index.signature(t) == expected[t]
+        except Exception as e:  # a KeyError here is the race
+            errors.append(e)
+
+    threads = [threading.Thread(target=hammer, args=(i * 7,)) for i in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert index.signature("") is None and index.signature("") is None  # a memoized None is a hit
+
+
+def _attempt(candidate_id, task_id, code):
+    return {"candidate_id": candidate_id, "task_id": task_id, "session_start": 0, "session_end": 60,
+            "code_snapshots": [{"timestamp": 1, "code": code}]}
+
+
+def test_only_submissions_enter_the_cohort(monkeypatch):
+    from fastapi.testclient import TestClient
+    import main
+
+    client = TestClient(main.app)
+    task_id = f"T-{uuid.uuid4().hex}"
+    code = "def solve(items):\n    total = 0\n    for item in items:\n        total += item * item\n    return total\n"
+    index = similarity_index.cohort_index()
+    before = len(index)
+    for _ in range(2):
+        resp = client.post("/candidate/evaluate", json=_attempt("a", task_id, code))
+        assert resp.json()["scores"]["plagiarism"]["plagiarism_flag"] is False
+    assert len(index) == before
+
+    assert client.post("/candidate/submit", json=_attempt("a", task_id, code)).status_code == 200
+    assert len(index) == before + 1
+    resp = client.post("/candidate/evaluate", json=_attempt("b", task_id, code))
+    assert resp.json()["scores"]["plagiarism"]["plagiarism_flag"] is True
+
+    # with several workers this one only knows part of the cohort: no flag either way
+    monkeypatch.setattr(similarity_index, "SERVER_WORKERS", 4)
+    assert "plagiarism" not in client.post("/candidate/evaluate", json=_attempt("b", task_id, code)).json()["scores"]
@@ -0,0 +1,63 @@
+import itertools
+import json
+
+from fastapi.testclient import TestClient
+
+import main
+from models.task_model import Task
+from services import task_catalog
+
+TAGS = ("backend", "frontend", "debug", "devops")
+
+
+def _tasks(n=40):
+    return [Task(id=f"CT{i:03d}", title=f"t{i}", description="d", difficulty=1 + i % 10,
+                 tags=[tag for k, tag in enumerate(TAGS) if (i >> k) & 1]) for i in range(n)]
+
+
+def _ids(body):
+    return [t["id"] for t in json.loads(body)]
+
+
+def test_query_matches_a_scan():
+    tasks = _tasks()
+    catalog = task_catalog.TaskCatalog(reversed(tasks))
+    filters = [dict(tags=list(tags)) for r in range(3) for tags in itertools.combinations(TAGS, r)]
+    filters += [dict(tags=["debug"], difficulty=4), dict(min_difficulty=3, max_difficulty=5),
+                dict(tags=["backend"], max_difficulty=2), dict(min_difficulty=9), dict(difficulty=11)]
+    for f in filters:
+        expected = [t.id for t in tasks
+                    if all(tag in t.tags for tag in f.get("tags", ()))
+                    and f.get("difficulty", t.difficulty) == t.difficulty
+                    and f.get("min_difficulty", 1) <= t.difficulty <= f.get("max_difficulty", 10)]
+        body, total = catalog.query(**f)
+        assert (_ids(body), total) == (expected, len(expected)), f
+        body, total = catalog.query(**f, offset=2, limit=3)
+        assert (_ids(body), total) == (expected[2:5], len(expected)), f
+
+
+def test_etag_follows_content_not_load():
+    tasks = _tasks()
+    assert task_catalog.TaskCatalog(tasks).etag == task_catalog.TaskCatalog(reversed(tasks)).etag
+    changed = tasks[:-1] + [tasks[-1].model_copy(update={"difficulty": 2})]
+    assert task_catalog.TaskCatalog(changed).etag != task_catalog.TaskCatalog(tasks).etag
+
+
+def test_list_route_pages_and_answers_304(monkeypatch):
+    catalog = task_catalog.TaskCatalog(_tasks())
+    monkeypatch.setattr(task_catalog, "_catalog", catalog)
+    client = TestClient(main.app)
+
+    resp = client.get("/tasks/", params={"tag": ["backend", "debug"], "offset": 1, "limit": 2})
+    assert resp.status_code == 200
+    body, total = catalog.query(["backend", "debug"], offset=1, limit=2)
+    assert resp.content == body
+    assert resp.headers["X-Total-Count"] == str(total)
+    assert resp.headers["ETag"] == catalog.etag
+
+    resp = client.get("/tasks/", params={"difficulty": 3}, headers={"If-None-Match": f'"stale", {catalog.etag}'})
+    assert resp.status_code == 304
+    assert resp.content == b""
+    assert client.get("/tasks/CT005", headers={"If-None-Match": catalog.etag}).status_code == 304
+    assert client.get("/tasks/missing", headers={"If-None-Match": catalog.etag}).status_code == 404
+    assert client.get("/tasks/", headers={"If-None-Match": '"stale"'}).status_code == 200
@@ -0,0 +1,34 @@
+import random
+
+from services.timing_analysis import TimingAccumulator, analyze_timing
+
+
+def _live(ts, ks):
+    acc = TimingAccumulator()
+    for t, k in zip(ts, ks):
+        acc.add(t, k)
+    return acc.result()
+
+
+def test_batch_and_live_agree_on_typing_rate():
+    rng = random.Random(0)
+    for _ in range(20):
+        ts, t = [], 0.0
+        for _ in range(rng.randint(5, 200)):
+            t += rng.choice((0.2, 0.5, 1.0, 5.0, 90.0))
+            ts.append(t)
+        ks = [rng.randint(0, 40) for _ in ts]
+        batch, live = analyze_timing(ts, ks), _live(ts, ks)
+        assert batch["flags"] == live["flags"]
+        for key in ("typing_rate_mean", "typing_rate_max", "burst_count", "keystrokes"):
+            assert batch["features"].get(key) == live["features"].get(key), key
+
+
+def test_superhuman_typing_uses_the_same_statistic():
+    # two short 20 keys/s bursts and one long slow one: median says superhuman, overall rate does not
+    ts = [0, 1, 10, 11, 20, 22, 24, 26, 28, 30]
+    ks = [0, 20, 0, 20, 0, 2, 2, 2, 2, 2]
+    batch, live = analyze_timing(ts, ks), _live(ts, ks)
+    assert batch["features"]["typing_rate_median"] > 15
+    assert "superhuman_typing" not in batch["flags"]
+    assert "superhuman_typing" not in live["flags"]
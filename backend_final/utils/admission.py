@@ -0,0 +1,228 @@
+"""
+admission.py
+
+Admission control for the HTTP routes: per-route concurrency limits, a
+bounded FIFO wait queue with a deadline, and per-user token buckets.
+
+Requests are matched to a RoutePolicy by path prefix. A request that is
+over its user's rate gets 429; one that finds the wait queue full, or is
+still waiting when its deadline passes, gets 503. Both carry Retry-After.
+Interactive routes (run-code / run-tests) have their own, larger pool so
+heavy submits being shed never holds them up.
+
+Rate limits are keyed by the peer address. Only when the peer is a trusted
+proxy (TRUSTED_PROXIES, comma-separated addresses) is the identity it
+forwards used instead: X-User-Id (set by the proxy after authenticating the
+user), else the last X-Forwarded-For hop. Clients reaching the app directly
+cannot pick their own bucket.
+
+Everything runs on the event loop, so the counters need no locks.
+
+Classes / functions:
+- RoutePolicy, TokenBucket
+- AdmissionController.stats() -> dict
+- AdmissionMiddleware (ASGI)
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+from collections import OrderedDict, deque
+import asyncio
+import json
+import math
+import os
+import time
+
+ENABLED = os.environ.get("ADMISSION_CONTROL", "1") != "0"
+MAX_TRACKED_USERS = 100_000
+TRUSTED_PROXIES = frozenset(a.strip() for a in os.environ.get("TRUSTED_PROXIES", "").split(",") if a.strip())
+
+
+class RoutePolicy:
+    def __init__(self, name: str, prefixes: Tuple[str, ...], max_concurrent: int, max_queue: int,
+                 queue_timeout: float, rate: Optional[float] = None, burst: Optional[float] = None,
+                 retry_after: int = 1):
+        self.name = name
+        self.prefixes = prefixes
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.rate = rate            # tokens per second per user; None disables rate limiting
+        self.burst = burst or (rate * 2 if rate else None)
+        self.retry_after = retry_after
+
+
+# first match wins, so specific prefixes go before the catch-alls
+DEFAULT_POLICIES: List[RoutePolicy] = [
+    RoutePolicy("interactive", ("/api/run-code", "/api/run-tests", "/api/chatbot"),
+                max_concurrent=64, max_queue=256, queue_timeout=2.0, rate=5.0, burst=20.0, retry_after=1),
+    RoutePolicy("submit", ("/api/submit", "/candidate/submit", "/candidate/evaluate"),
+                max_concurrent=8, max_queue=32, queue_timeout=5.0, rate=0.5, burst=3.0, retry_after=5),
+    RoutePolicy("ingest", ("/candidate/sessions",),
+                max_concurrent=16, max_queue=64, queue_timeout=5.0, retry_after=2),
+    RoutePolicy("default", ("/api", "/candidate"),
+                max_concurrent=32, max_queue=128, queue_timeout=5.0, rate=10.0, burst=30.0, retry_after=1),
+]
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """Consume one token. Returns 0 on success, otherwise seconds until one is available."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        return (1.0 - self.tokens) / self.rate
+
+
+class _RouteState:
+    def __init__(self, policy: RoutePolicy):
+        self.policy = policy
+        self.in_flight = 0
+        self.waiters: "deque[asyncio.Future]" = deque()
+        self.buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self.admitted = 0
+        self.rejected = {"rate_limited": 0, "queue_full": 0, "deadline": 0}
+
+    def bucket(self, user: str) -> TokenBucket:
+        b = self.buckets.get(user)
+        if b is None:
+            b = self.buckets[user] = TokenBucket(self.policy.rate, self.policy.burst)
+            if len(self.buckets) > MAX_TRACKED_USERS:
+                self.buckets.popitem(last=False)
+        else:
+            self.buckets.move_to_end(user)
+        return b
+
+    async def acquire(self) -> Optional[str]:
+        """Take a slot, waiting in line if needed. Returns a rejection reason or None."""
+        if self.in_flight < self.policy.max_concurrent and not self.waiters:
+            self.in_flight += 1
+            return None
+        if len(self.waiters) >= self.policy.max_queue:
+            return "queue_full"
+        fut = asyncio.get_running_loop().create_future()
+        self.waiters.append(fut)
+        try:
+            await asyncio.wait_for(asyncio.shield(fut), self.policy.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if fut.done() and not fut.cancelled():  # handed a slot just as we gave up
+                self.release()
+            else:
+                fut.cancel()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            return "deadline"
+        finally:
+            try:
+                self.waiters.remove(fut)
+            except ValueError:
+                pass
+        return None
+
+    def release(self) -> None:
+        # hand the slot straight to the next waiter, so in_flight never over-commits
+        while self.waiters:
+            fut = self.waiters.popleft()
+            if not fut.done():
+                fut.set_result(None)
+                return
+        self.in_flight -= 1
+
+
+class AdmissionController:
+    def __init__(self, policies: Optional[List[RoutePolicy]] = None):
+        self._routes = [_RouteState(p) for p in (policies or DEFAULT_POLICIES)]
+
+    def match(self, path: str) -> Optional[_RouteState]:
+        for state in self._routes:
+            if path.startswith(state.policy.prefixes):
+                return state
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            s.policy.name: {
+                "in_flight": s.in_flight,
+                "queue_depth": len(s.waiters),
+                "max_concurrent": s.policy.max_concurrent,
+                "max_queue": s.policy.max_queue,
+                "admitted": s.admitted,
+                "rejected": dict(s.rejected),
+            }
+            for s in self._routes
+        }
+
+
+def _user_key(scope, trusted_proxies=TRUSTED_PROXIES) -> str:
+    client = scope.get("client")
+    peer = client[0] if client else "anonymous"
+    if peer not in trusted_proxies:
+        return peer
+    forwarded = None
+    for name, value in scope.get("headers", ()):
+        if name == b"x-user-id":
+            return "user:" + value.decode("latin-1")
+        if name == b"x-forwarded-for":
+            forwarded = value.decode("latin-1")
+    if forwarded:
+        # the trusted proxy appends the address it saw; earlier hops are client-supplied
+        return forwarded.rsplit(",", 1)[-1].strip() or peer
+    return peer
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying an AdmissionController to HTTP requests (WebSockets pass through)."""
+
+    def __init__(self, app, controller: Optional[AdmissionController] = None, trusted_proxies=TRUSTED_PROXIES):
+        self.app = app
+        self.controller = controller or AdmissionController()
+        self.trusted_proxies = frozenset(trusted_proxies)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        state = self.controller.match(scope["path"])
+        if state is None:
+            return await self.app(scope, receive, send)
+
+        policy = state.policy
+        if policy.rate:
+            wait = state.bucket(_user_key(scope, self.trusted_proxies)).take()
+            if wait:
+                state.rejected["rate_limited"] += 1
+                return await _reject(send, 429, "Rate limit exceeded", math.ceil(wait))
+
+        reason = await state.acquire()
+        if reason:
+            state.rejected[reason] += 1
+            return await _reject(send, 503, f"Server busy ({reason.replace('_', ' ')})", policy.retry_after)
+
+        state.admitted += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            state.release()
+
+
+async def _reject(send, status: int, detail: str, retry_after: int) -> None:
+    body = json.dumps({"detail": detail}).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("ascii")),
+            (b"retry-after", str(max(1, retry_after)).encode("ascii")),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
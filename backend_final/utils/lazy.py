@@ -0,0 +1,54 @@
+"""
+lazy.py
+
+Deferred imports for heavy optional dependencies (numpy, firebase_admin,
+langchain), so importing the app stays fast and the cost is paid on first
+use instead.
+
+lazy_import(name) returns a module placeholder. The first attribute access
+imports the real module (under a lock, so concurrent first uses are safe)
+and copies its namespace into the placeholder; later accesses are ordinary
+module attribute lookups.
+
+Functions:
+- lazy_import(name) -> module or None (when the module is not installed)
+- is_loaded(module) -> bool
+"""
+
+import importlib
+import importlib.util
+import sys
+import threading
+import types
+
+_lock = threading.RLock()
+
+
+class _LazyModule(types.ModuleType):
+    def __getattr__(self, attr):
+        # only reached for names not yet in the placeholder's namespace
+        with _lock:
+            real = self.__dict__.get("_lazy_real")
+            if real is None:
+                real = importlib.import_module(self.__name__)
+                ns = dict(real.__dict__)
+                ns["_lazy_real"] = real
+                self.__dict__.update(ns)
+        return getattr(real, attr)
+
+
+def lazy_import(name: str):
+    """Placeholder for module `name`, or None if it cannot be found."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    try:
+        if importlib.util.find_spec(name) is None:
+            return None
+    except (ImportError, ValueError):
+        return None
+    return _LazyModule(name)
+
+
+def is_loaded(module) -> bool:
+    return not isinstance(module, _LazyModule) or "_lazy_real" in module.__dict__
@@ -1,10 +1,187 @@
+"""
+logger.py
+
+Central logging setup for the backend.
+
+Request threads never write to the terminal: the root logger gets a
+QueueHandler that only puts the record on an in-memory queue, and a
+QueueListener thread formats and writes it. Every record carries the
+correlation ID of the request that logged it (X-Request-Id, generated when
+the client sends none), output is plain text or one JSON object per line,
+and DEBUG records from hot paths can be sampled so turning DEBUG on under
+load does not flood the output.
+
+Environment:
+- LOG_LEVEL     root level (default INFO)
+- LOG_FORMAT    "text" (default) or "json"
+- LOG_DEBUG_SAMPLE  keep 1 in N DEBUG records per call site (default 1 = all)
+
+Functions / classes:
+- setup_logging(level=None, fmt=None, debug_sample=None) -> None (idempotent)
+- shutdown_logging() -> None (flushes the queue)
+- get_request_id() -> str or None
+- JsonFormatter, SamplingFilter, CorrelationIdMiddleware (ASGI)
+"""
+
+from typing import Dict, Optional, Tuple
+import atexit
+import contextvars
+import json
 import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import uuid
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s [%(name)s] [%(request_id)s] %(message)s"
+REQUEST_ID_HEADER = b"x-request-id"
+
+_request_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+_listener: Optional[logging.handlers.QueueListener] = None
+_setup_lock = threading.Lock()
+
+
+def get_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+class CorrelationIdFilter(logging.Filter):
+    """Stamps the current request's ID on the record, in the thread that logged it."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get() or "-"
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps every record at INFO and above, and 1 in `every` DEBUG records per
+    call site (logger name + message template), so a debug line inside a
+    per-event loop costs one counter increment for the ones dropped.
+    """
+
+    def __init__(self, every: int = 1):
+        super().__init__()
+        self.every = max(1, int(every))
+        self._seen: Dict[Tuple[str, str], int] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.every == 1 or record.levelno > logging.DEBUG:
+            return True
+        key = (record.name, str(record.msg))
+        n = self._seen.get(key, 0)
+        self._seen[key] = n + 1  # racy across threads, which only blurs the sampling rate
+        if n % self.every:
+            return False
+        if n:
+            record.sampled = self.every
+        return True
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # merge msg % args now, so later mutation of the args cannot change the line,
+        # but leave timestamps, tracebacks and JSON encoding to the listener thread
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, request_id, message (+ exc_info, extras)."""
+
+    _RESERVED = frozenset(logging.LogRecord("", 0, "", 0, "", None, None).__dict__) | {"message", "request_id", "sampled"}
+
+    def format(self, record: logging.LogRecord) -> str:
+        out = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", None),
+            "message": record.getMessage(),
+        }
+        if getattr(record, "sampled", None):
+            out["sampled"] = record.sampled
+        if record.exc_info:
+            out["exc_info"] = self.formatException(record.exc_info)
+        for key, value in record.__dict__.items():
+            if key not in self._RESERVED and not key.startswith("_"):
+                out[key] = value
+        return json.dumps(out, default=str)
+
+
+def setup_logging(level: Optional[str] = None, fmt: Optional[str] = None, debug_sample: Optional[int] = None) -> None:
+    """Route all logging through the background queue writer. Safe to call more than once."""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return
+        level = (level or os.environ.get("LOG_LEVEL", "INFO")).upper()
+        fmt = (fmt or os.environ.get("LOG_FORMAT", "text")).lower()
+        if debug_sample is None:
+            debug_sample = int(os.environ.get("LOG_DEBUG_SAMPLE", "1"))
+
+        stream = logging.StreamHandler(sys.stderr)
+        stream.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT))
+
+        q: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        handler = _QueueHandler(q)
+        handler.addFilter(CorrelationIdFilter())
+        handler.addFilter(SamplingFilter(debug_sample))
+
+        root = logging.getLogger()
+        for h in list(root.handlers):
+            root.removeHandler(h)
+        root.addHandler(handler)
+        root.setLevel(level)
+
+        _listener = logging.handlers.QueueListener(q, stream, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Stop the writer thread after it has drained the queue."""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+class CorrelationIdMiddleware:
+    """
+    ASGI middleware that binds a request ID for the duration of each HTTP or
+    WebSocket request: the client's X-Request-Id if it sent one, a new one
+    otherwise. HTTP responses echo it back in the same header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            return await self.app(scope, receive, send)
+        request_id = None
+        for name, value in scope.get("headers", ()):
+            if name == REQUEST_ID_HEADER:
+                request_id = value.decode("latin-1")[:128]
+                break
+        request_id = request_id or uuid.uuid4().hex
+        token = _request_id.set(request_id)
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", ())) + [(REQUEST_ID_HEADER, request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            _request_id.reset(token)
 
-# Configure logging with proper format
-logging.basicConfig(
-    level=logging.INFO, 
-    format="%(asctime)s %(levelname)s %(message)s"
-)
 
 # Use descriptive logger name
 app_logger = logging.getLogger("backend_app")